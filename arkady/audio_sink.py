@@ -0,0 +1,181 @@
+import threading
+import time
+import wave
+
+
+class AudioSink:
+    """
+    Базовый выход аудио: принимает PCM int16 моно (bytes) и держит поток
+    открытым между фразами. write() блокирует, пока устройство не примет
+    данные; abort() выбрасывает недоигранное.
+    """
+
+    def __init__(self, sample_rate=24000, slice_seconds=0.05):
+        self.sample_rate = sample_rate
+        self.samples_written = 0
+        self.is_open = False
+        # write() пишет кусками по slice_seconds: abort() ждет не дольше одного куска
+        self.slice_bytes = max(int(sample_rate * slice_seconds), 1) * 2
+        self._epoch = 0
+
+    def open(self):
+        self.is_open = True
+        return self
+
+    def close(self):
+        self.is_open = False
+
+    def _write(self, data):
+        raise NotImplementedError
+
+    def write(self, data):
+        if not self.is_open:
+            self.open()
+        epoch = self._epoch
+        data = memoryview(data)
+        for start in range(0, len(data), self.slice_bytes):
+            if epoch != self._epoch:
+                return  # abort() - недописанное выбрасываем
+            part = data[start:start + self.slice_bytes]
+            self._write(part)
+            self.samples_written += len(part) // 2
+
+    def abort(self):
+        """Выбрасывает недоигранное (из любого потока)"""
+        self._epoch += 1
+        self._abort()
+
+    def _abort(self):
+        pass
+
+    @property
+    def latency(self):
+        """Задержка от write() до звука в динамике, сек"""
+        return 0.0
+
+    @property
+    def audio_seconds(self):
+        return self.samples_written / self.sample_rate
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SoundDeviceSink(AudioSink):
+    """Динамики через sounddevice (PortAudio): один поток на все фразы"""
+
+    def __init__(self, sample_rate=24000, device=None, latency='low'):
+        super().__init__(sample_rate)
+        self.device = device
+        self._latency = latency
+        self._stream = None
+        self._lock = threading.Lock()
+        self.underflows = 0
+
+    def open(self):
+        import sounddevice as sd
+
+        self._stream = sd.RawOutputStream(
+            samplerate=self.sample_rate,
+            device=self.device,
+            channels=1,
+            dtype='int16',
+            latency=self._latency
+        )
+        self._stream.start()
+        return super().open()
+
+    def _write(self, data):
+        with self._lock:
+            # Недогрузка между фразами - норма (тишина), считаем для статистики
+            if self._stream.write(data):
+                self.underflows += 1
+
+    def _abort(self):
+        """Сбрасывает буфер устройства и сразу готов играть дальше"""
+        if self._stream is not None:
+            # Пишущий поток держит замок не дольше одного куска write()
+            with self._lock:
+                self._stream.abort()
+                self._stream.start()
+
+    @property
+    def latency(self):
+        return self._stream.latency if self._stream is not None else 0.0
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        super().close()
+
+
+class NullSink(AudioSink):
+    """
+    Выход в никуда - для тестов без звуковой карты. realtime=True
+    "играет" со скоростью звука: write() ждет, как настоящее устройство.
+    """
+
+    def __init__(self, sample_rate=24000, realtime=False):
+        super().__init__(sample_rate)
+        self.realtime = realtime
+        self._clock = None
+
+    def _write(self, data):
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._clock is None or self._clock < now:
+            self._clock = now  # Поток простаивал - играем с текущего момента
+        self._clock += len(data) / 2 / self.sample_rate
+        ahead = self._clock - now
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def _abort(self):
+        self._clock = None
+
+
+class WavSink(AudioSink):
+    """Запись всего сыгранного в WAV (16 бит, моно)"""
+
+    def __init__(self, path, sample_rate=24000):
+        super().__init__(sample_rate)
+        self.path = path
+        self._wav = None
+
+    def open(self):
+        self._wav = wave.open(self.path, 'wb')
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(self.sample_rate)
+        return super().open()
+
+    def _write(self, data):
+        self._wav.writeframes(data)
+
+    def close(self):
+        if self._wav:
+            self._wav.close()
+            self._wav = None
+        super().close()
+
+
+def open_sink(spec, sample_rate=24000):
+    """
+    Выход по строке:
+        'sounddevice' / 'speaker'  - динамики
+        'null'                     - никуда (со скоростью звука)
+        'file.wav'                 - WAV файл
+    """
+    if spec in ('sounddevice', 'speaker'):
+        return SoundDeviceSink(sample_rate)
+    if spec == 'null':
+        return NullSink(sample_rate, realtime=True)
+    if spec.lower().endswith('.wav'):
+        return WavSink(spec, sample_rate)
+    raise ValueError(f"Неизвестный выход аудио: {spec}")
@@ -0,0 +1,269 @@
+import queue
+import sys
+import time
+import wave
+import numpy as np
+
+
+class AudioSource:
+    """
+    Базовый источник аудио: отдает блоки PCM int16 моно (bytes).
+    read() возвращает b'' когда поток закончился.
+
+    realtime=False у файловых источников - читаем быстрее реального времени,
+    чтобы мерить RTF и пропускную способность ASR без микрофона.
+    """
+
+    def __init__(self, sample_rate=16000, block_size=1600, realtime=False):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.realtime = realtime
+        self.samples_read = 0
+        self._started_at = None
+
+    def open(self):
+        self._started_at = time.perf_counter()
+        return self
+
+    def close(self):
+        pass
+
+    def _read(self, frames):
+        raise NotImplementedError
+
+    def read(self, frames=None):
+        """Следующий блок PCM int16; b'' - конец потока"""
+        if self._started_at is None:
+            self.open()
+        data = self._read(frames or self.block_size)
+        self.samples_read += len(data) // 2
+        if self.realtime and data:
+            self._pace()
+        return data
+
+    def _pace(self):
+        """Задерживает чтение до аудио-часов, если нужна скорость реального времени"""
+        ahead = self.audio_seconds - (time.perf_counter() - self._started_at)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def __iter__(self):
+        while True:
+            data = self.read()
+            if not data:
+                return
+            yield data
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def audio_seconds(self):
+        return self.samples_read / self.sample_rate
+
+    @property
+    def wall_seconds(self):
+        if self._started_at is None:
+            return 0.0
+        return time.perf_counter() - self._started_at
+
+
+class PyAudioSource(AudioSource):
+    """Микрофон через PyAudio"""
+
+    def __init__(self, sample_rate=16000, block_size=1600, device_index=None, pyaudio_instance=None):
+        super().__init__(sample_rate, block_size, realtime=False)
+        self.device_index = device_index
+        self._pyaudio = pyaudio_instance
+        self._owns_pyaudio = pyaudio_instance is None
+        self._stream = None
+
+    def open(self):
+        import pyaudio
+
+        if self._pyaudio is None:
+            self._pyaudio = pyaudio.PyAudio()
+        self._stream = self._pyaudio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.block_size
+        )
+        return super().open()
+
+    def _read(self, frames):
+        return self._stream.read(frames, exception_on_overflow=False)
+
+    def close(self):
+        if self._stream:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pyaudio and self._owns_pyaudio:
+            self._pyaudio.terminate()
+            self._pyaudio = None
+
+
+class SoundDeviceSource(AudioSource):
+    """Микрофон через sounddevice (PortAudio), захват в callback"""
+
+    def __init__(self, sample_rate=16000, block_size=1600, device=None, max_blocks=100):
+        super().__init__(sample_rate, block_size, realtime=False)
+        self.device = device
+        self._queue = queue.Queue(maxsize=max_blocks)
+        self._stream = None
+        self._pending = b''
+        self.dropped_blocks = 0
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            print(f"Ошибка аудио: {status}", file=sys.stderr)
+        try:
+            self._queue.put_nowait(bytes(indata))
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def open(self):
+        import sounddevice as sd
+
+        self._stream = sd.RawInputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.block_size,
+            device=self.device,
+            channels=1,
+            dtype='int16',
+            callback=self._callback
+        )
+        self._stream.start()
+        return super().open()
+
+    def _read(self, frames):
+        size = frames * 2
+        while len(self._pending) < size:
+            self._pending += self._queue.get()
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def close(self):
+        if self._stream:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class WavFileSource(AudioSource):
+    """Воспроизведение WAV (16 бит, моно) быстрее реального времени"""
+
+    def __init__(self, path, block_size=1600, realtime=False):
+        self.path = path
+        self._wav = None
+        with wave.open(path, 'rb') as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: нужен моно WAV 16 бит")
+            sample_rate = wf.getframerate()
+            self.total_samples = wf.getnframes()
+        super().__init__(sample_rate, block_size, realtime)
+
+    def open(self):
+        self._wav = wave.open(self.path, 'rb')
+        return super().open()
+
+    def _read(self, frames):
+        return self._wav.readframes(frames)
+
+    def close(self):
+        if self._wav:
+            self._wav.close()
+            self._wav = None
+
+    @property
+    def duration(self):
+        return self.total_samples / self.sample_rate
+
+
+class RawPcmSource(AudioSource):
+    """
+    Сырой PCM s16le моно из пайпа или файла, например:
+        arecord -f S16_LE -r 16000 -c 1 | python stt.py -
+    """
+
+    def __init__(self, stream=None, sample_rate=16000, block_size=1600, realtime=False):
+        super().__init__(sample_rate, block_size, realtime)
+        self._path = stream if isinstance(stream, str) else None
+        self._stream = None if self._path else (stream or sys.stdin.buffer)
+
+    def open(self):
+        if self._path:
+            self._stream = open(self._path, 'rb')
+        return super().open()
+
+    def _read(self, frames):
+        size = frames * 2
+        data = self._stream.read(size)
+        # Пайп может отдать меньше запрошенного - дочитываем до блока или EOF
+        while data and len(data) < size:
+            more = self._stream.read(size - len(data))
+            if not more:
+                break
+            data += more
+        return data[:len(data) - len(data) % 2]
+
+    def close(self):
+        if self._path and self._stream:
+            self._stream.close()
+            self._stream = None
+
+
+class GeneratorSource(AudioSource):
+    """
+    Источник из памяти: итерируемое блоков bytes или массивов NumPy
+    (int16 или float32 в [-1, 1]), нарезается на блоки block_size.
+    """
+
+    def __init__(self, chunks, sample_rate=16000, block_size=1600, realtime=False):
+        super().__init__(sample_rate, block_size, realtime)
+        self._chunks = iter(chunks)
+        self._pending = b''
+
+    def _to_bytes(self, chunk):
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            return bytes(chunk)
+        chunk = np.asarray(chunk)
+        if chunk.dtype != np.int16:
+            chunk = np.clip(chunk * 32768, -32768, 32767).astype(np.int16)
+        return chunk.tobytes()
+
+    def _read(self, frames):
+        size = frames * 2
+        while len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending += self._to_bytes(chunk)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def open_source(spec, sample_rate=16000, block_size=1600, realtime=False):
+    """
+    Источник по строке:
+        'pyaudio' / 'mic'  - микрофон через PyAudio
+        'sounddevice'      - микрофон через sounddevice
+        '-'                - сырой PCM из stdin
+        'file.wav'         - WAV файл
+        'file.raw'/'.pcm'  - сырой PCM из файла
+    """
+    if spec in ('mic', 'pyaudio'):
+        return PyAudioSource(sample_rate, block_size)
+    if spec == 'sounddevice':
+        return SoundDeviceSource(sample_rate, block_size)
+    if spec == '-':
+        return RawPcmSource(None, sample_rate, block_size, realtime)
+    if spec.lower().endswith('.wav'):
+        return WavFileSource(spec, block_size, realtime)
+    return RawPcmSource(spec, sample_rate, block_size, realtime)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Пакетная расшифровка записей на пуле процессов.
+
+Каждый процесс-воркер загружает модель Vosk один раз (через vosk_models),
+файлы читаются крупными блоками, результаты с таймингами слов пишутся
+в JSONL по мере готовности.
+
+Пример:
+    python -m arkady.batch_transcribe records/*.wav -o sessions.jsonl -j 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import vosk
+from . import vosk_models
+from .audio_source import open_source
+
+DEFAULT_MODEL_PATH = "vosk-model-small-ru-0.22"
+DEFAULT_BLOCK_SIZE = 64000  # 4 сек при 16 кГц - меньше вызовов через cffi
+
+_worker_model_path = None
+
+
+def _init_worker(model_path):
+    """Инициализатор воркера: модель грузится один раз на процесс"""
+    global _worker_model_path
+    # JSONL пишет только главный процесс; сообщения воркеров - в stderr
+    sys.stdout = sys.stderr
+    vosk.SetLogLevel(-1)
+    vosk_models.get_model(model_path)
+    _worker_model_path = model_path
+
+
+def _segment(result):
+    """Результат Vosk -> сегмент с таймингами слов"""
+    words = result.get('result', [])
+    return {
+        'text': result.get('text', ''),
+        'start': words[0]['start'] if words else None,
+        'end': words[-1]['end'] if words else None,
+        'words': words
+    }
+
+
+def transcribe_file(path, model_path=None, block_size=DEFAULT_BLOCK_SIZE, sample_rate=16000):
+    """Расшифровка одного файла (WAV или сырой PCM) в словарь для JSONL"""
+    model_path = model_path or _worker_model_path or DEFAULT_MODEL_PATH
+    started = time.perf_counter()
+    record = {'file': path, 'worker': os.getpid()}
+
+    try:
+        source = open_source(path, sample_rate=sample_rate, block_size=block_size)
+        pool = vosk_models.get_pool(model_path, source.sample_rate)
+        segments = []
+
+        with pool.recognizer() as rec, source:
+            rec.SetWords(True)
+            for data in source:
+                if rec.AcceptWaveform(data):
+                    segments.append(_segment(json.loads(rec.Result())))
+            segments.append(_segment(json.loads(rec.FinalResult())))
+
+        segments = [s for s in segments if s['text']]
+        record.update({
+            'duration': source.audio_seconds,
+            'text': " ".join(s['text'] for s in segments),
+            'segments': segments
+        })
+    except Exception as e:
+        record.update({'duration': 0.0, 'error': str(e)})
+
+    record['elapsed'] = time.perf_counter() - started
+    record['rtf'] = record['elapsed'] / record['duration'] if record['duration'] else None
+    return record
+
+
+def transcribe_batch(paths, output, model_path=DEFAULT_MODEL_PATH, workers=None,
+                     block_size=DEFAULT_BLOCK_SIZE, sample_rate=16000):
+    """
+    Расшифровывает файлы на пуле процессов, пишет JSONL в output (файловый объект).
+    Возвращает сводку: файлов в минуту, суммарный RTF и т.д.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Длинные файлы первыми - меньше простоя воркеров в конце
+    paths = sorted(paths, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0, reverse=True)
+
+    started = time.perf_counter()
+    audio_total = 0.0
+    busy_total = 0.0
+    errors = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path,)) as executor:
+        futures = [
+            executor.submit(transcribe_file, path, model_path, block_size, sample_rate)
+            for path in paths
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+            audio_total += record['duration']
+            busy_total += record['elapsed']
+            if 'error' in record:
+                errors += 1
+                print(f"✗ {record['file']}: {record['error']}", file=sys.stderr)
+            print(f"[{done}/{len(paths)}] {record['file']} ({record['elapsed']:.1f} сек)", file=sys.stderr)
+
+    wall = time.perf_counter() - started
+    return {
+        'files': len(paths),
+        'errors': errors,
+        'workers': workers,
+        'wall_seconds': wall,
+        'audio_seconds': audio_total,
+        'files_per_minute': len(paths) / wall * 60 if wall else 0.0,
+        # Суммарный RTF: реальное время пакета / длительность всего аудио
+        'aggregate_rtf': wall / audio_total if audio_total else None,
+        # Во сколько раз пул быстрее последовательной обработки
+        'parallel_speedup': busy_total / wall if wall else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная расшифровка записей Vosk")
+    parser.add_argument('files', nargs='+', help="WAV или сырой PCM (s16le) файлы")
+    parser.add_argument('-o', '--output', default='-', help="JSONL файл ('-' - stdout)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Число процессов (по умолчанию - все ядра)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--block', type=int, default=DEFAULT_BLOCK_SIZE, help="Размер блока в сэмплах")
+    parser.add_argument('--rate', type=int, default=16000, help="Частота для сырого PCM")
+    args = parser.parse_args()
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        summary = transcribe_batch(args.files, output, args.model, args.workers, args.block, args.rate)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"📊 {summary['files']} файлов на {summary['workers']} процессах за "
+          f"{summary['wall_seconds']:.1f} сек: {summary['files_per_minute']:.1f} файлов/мин, "
+          f"RTF {summary['aggregate_rtf'] or 0:.3f}, ускорение x{summary['parallel_speedup']:.1f}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+class Endpointer:
+    """
+    Определение конца команды по тишине в аудио-времени самого потока.
+
+    update() вызывается на каждый блок (включая отброшенные VAD) с его
+    длиной и флагом речи. Возвращает причину завершения или None:
+        'silence'    - после речи набралось trailing_silence тишины
+        'max_length' - команда длиннее max_utterance
+        'no_speech'  - после активации никто не заговорил за no_speech_timeout
+    """
+
+    def __init__(self, sample_rate=16000, trailing_silence=0.7, max_utterance=8.0,
+                 no_speech_timeout=5.0):
+        self.sample_rate = sample_rate
+        self.trailing_silence = trailing_silence
+        self.max_utterance = max_utterance
+        self.no_speech_timeout = no_speech_timeout
+        self.start()
+
+    def start(self):
+        """Начало новой команды"""
+        self.audio_time = 0.0       # Сколько аудио прошло с активации
+        self.speech_start = None    # Аудио-время начала речи
+        self.speech_end = None      # Аудио-время последнего блока с речью
+        self.reason = None
+
+    def update(self, samples, is_speech):
+        """Учитывает блок из samples сэмплов; возвращает причину конца или None"""
+        if self.reason:
+            return self.reason
+
+        self.audio_time += samples / self.sample_rate
+        if is_speech:
+            if self.speech_start is None:
+                self.speech_start = self.audio_time - samples / self.sample_rate
+            self.speech_end = self.audio_time
+
+        if self.speech_start is None:
+            if self.audio_time >= self.no_speech_timeout:
+                self.reason = 'no_speech'
+        elif self.audio_time - self.speech_start >= self.max_utterance:
+            self.reason = 'max_length'
+        elif self.audio_time - self.speech_end >= self.trailing_silence:
+            self.reason = 'silence'
+        return self.reason
+
+    @property
+    def silence(self):
+        """Текущая длина тишины после речи (сек)"""
+        if self.speech_end is None:
+            return 0.0
+        return self.audio_time - self.speech_end
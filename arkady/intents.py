@@ -0,0 +1,325 @@
+import random
+import re
+from collections import deque
+from datetime import datetime
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Числительные для слотов ("громкость на тридцать пять")
+_NUMBERS = {
+    "ноль": 0, "один": 1, "одна": 1, "два": 2, "две": 2, "три": 3, "четыре": 4, "пять": 5,
+    "шесть": 6, "семь": 7, "восемь": 8, "девять": 9, "десять": 10, "двадцать": 20,
+    "тридцать": 30, "сорок": 40, "пятьдесят": 50, "шестьдесят": 60, "семьдесят": 70,
+    "восемьдесят": 80, "девяносто": 90, "сто": 100
+}
+
+_MONTHS = ["января", "февраля", "марта", "апреля", "мая", "июня", "июля",
+           "августа", "сентября", "октября", "ноября", "декабря"]
+_WEEKDAYS = ["понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье"]
+
+# Слова, которые не меняют смысл команды ("ну все, пока, Аркадий")
+FILLER_WORDS = {
+    "ну", "а", "и", "вот", "так", "же", "ли", "ка", "эй", "ээ", "эээ", "мм", "слушай", "скажи", "вообще",
+    "пожалуйста", "давай", "ладно", "короче", "тогда", "уже", "сейчас", "сегодня", "все", "мне", "ты",
+    "аркадий", "аркаша", "браток"
+}
+
+FAREWELLS = [
+    "Ну давай, браток, удачи тебе",
+    "Пока-пока, дорогуша",
+    "До встречи, корешок",
+    "Ладно, бывай",
+    "Увидимся еще, мужик"
+]
+HELP_TEXT = ("Ну я Аркадий, короче. Говори что надо - отвечу как смогу, браток. "
+             "Могу время сказать, громче или тише сделать, повторить. Чтобы выйти - скажи 'пока'.")
+MUTED = "Ладно, молчу"
+LOUDER = "Так лучше слышно?"
+QUIETER = "Ладно, потише буду"
+NOTHING_TO_REPEAT = "Да я еще ничего не говорил, браток"
+
+# Слова при команде громкости: "сделай чуть погромче", "поставь на 30 процентов"
+VOLUME_ARGUMENTS = {
+    "сделай", "сделать", "поставь", "поставить", "установи", "говори", "можно", "можешь", "чуть",
+    "немного", "немножко", "еще", "побольше", "поменьше", "на", "до", "процентов", "процента", "процент"
+}
+
+# Ответы команд без подстановок - их звук можно заготовить заранее
+STATIC_PHRASES = FAREWELLS + [HELP_TEXT, MUTED, LOUDER, QUIETER, NOTHING_TO_REPEAT]
+
+
+def normalize_text(text):
+    """Нижний регистр, ё -> е, только слова через пробел"""
+    return " ".join(_NON_WORD.sub(" ", text.lower().replace("ё", "е")).split())
+
+
+def parse_number(words):
+    """Первое число среди слов: цифрами или словами ("тридцать пять"); иначе None"""
+    for i, word in enumerate(words):
+        if word.isdigit():
+            return int(word)
+        if word in _NUMBERS:
+            value = _NUMBERS[word]
+            # Десятки + единицы
+            if value >= 20 and value % 10 == 0 and i + 1 < len(words) and 0 < _NUMBERS.get(words[i + 1], 0) < 10:
+                value += _NUMBERS[words[i + 1]]
+            return value
+    return None
+
+
+class KeywordAutomaton:
+    """
+    Автомат Ахо-Корасик по символам нормализованного текста с учетом границ слов.
+
+    Шаблон - слова через пробел; "*" в конце - совпадение по началу слова
+    ("громкост*"), "^" и "$" - привязка к началу и концу фразы.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+
+    def add(self, pattern, value):
+        anchored_start = pattern.startswith("^")
+        anchored_end = pattern.endswith("$")
+        pattern = pattern.strip("^$")
+        prefix = pattern.endswith("*")
+        key = " " + normalize_text(pattern.rstrip("*"))
+
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append((len(key), prefix, anchored_start, anchored_end, value))
+        self._built = False
+
+    def build(self):
+        """Суффиксные ссылки обходом в ширину"""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def search(self, normalized):
+        """Совпадения (start, end, value) в уже нормализованном тексте; позиции - в " " + text"""
+        if not self._built:
+            self.build()
+        text = " " + normalized + " "
+        last = len(text) - 1
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        matches = []
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, prefix, anchored_start, anchored_end, value in out[node]:
+                end = i + 1
+                start = end - length
+                if not prefix and text[end] != " ":
+                    continue  # Шаблон кончился посреди слова
+                if anchored_start and start != 0:
+                    continue
+                if anchored_end and (prefix or end != last):
+                    continue
+                matches.append((start, end, value))
+        return matches
+
+
+class Intent:
+    """Намерение: шаблоны, обработчик и приоритет"""
+
+    def __init__(self, name, handler, priority=0, terminal=False, max_extra=None, arguments=(), numbers=False):
+        self.name = name
+        self.handler = handler
+        self.priority = priority
+        self.terminal = terminal  # После ответа разговор заканчивается
+        # Сколько значимых слов (не из FILLER_WORDS) может стоять вне
+        # совпадения; None - сколько угодно. 0 - фраза целиком команда:
+        # "выход" - да, "выход из ситуации" - вопрос для LLM
+        self.max_extra = max_extra
+        # Слова-аргументы команды, которые значимыми не считаются
+        # ("сделай погромче", "громкость на тридцать пять")
+        self.arguments = frozenset(arguments)
+        self.numbers = numbers
+
+    def _is_argument(self, word):
+        if word in FILLER_WORDS or word in self.arguments:
+            return True
+        return self.numbers and (word.isdigit() or word in _NUMBERS)
+
+    def accepts(self, normalized, start, end):
+        """Хватает ли совпадения [start, end) (позиции в " " + text) на всю фразу"""
+        if self.max_extra is None:
+            return True
+        padded = " " + normalized + " "
+        # Шаблон по началу слова ("громкост*") - остаток слова тоже его
+        end = padded.find(" ", end - 1)
+        extra = [word for word in (padded[:start] + padded[end:]).split() if not self._is_argument(word)]
+        return len(extra) <= self.max_extra
+
+
+class IntentMatch:
+    """Сработавшее намерение со слотами"""
+
+    def __init__(self, intent, slots, start, end, text):
+        self.intent = intent
+        self.slots = slots
+        self.start = start
+        self.end = end
+        self.text = text  # Нормализованная фраза
+
+    @property
+    def name(self):
+        return self.intent.name
+
+    def rest(self):
+        """Слова после совпадения"""
+        return self.text[max(self.end - 1, 0):].split()
+
+
+class IntentRouter:
+    """
+    Локальный маршрутизатор команд: один проход автомата по фразе,
+    LLM нужен только если ничего не совпало.
+    """
+
+    def __init__(self):
+        self.intents = {}
+        self._automaton = KeywordAutomaton()
+        self.routed = {}
+        self.fallbacks = 0
+
+    def add(self, name, patterns, handler, priority=0, terminal=False, max_extra=None, arguments=(), numbers=False):
+        """patterns - строки или пары (шаблон, фиксированные слоты)"""
+        intent = self.intents[name] = Intent(name, handler, priority, terminal, max_extra, arguments, numbers)
+        for pattern in patterns:
+            slots = {}
+            if isinstance(pattern, tuple):
+                pattern, slots = pattern
+            self._automaton.add(pattern, (intent, slots))
+        return intent
+
+    def compile(self):
+        self._automaton.build()
+        return self
+
+    def match(self, text):
+        """Лучшее совпадение: приоритет, затем длина, затем позиция; или None"""
+        normalized = normalize_text(text)
+        best = None
+        for start, end, (intent, slots) in self._automaton.search(normalized):
+            rank = (intent.priority, end - start, -start)
+            if (best is None or rank > best[0]) and intent.accepts(normalized, start, end):
+                best = (rank, intent, slots, start, end)
+        if best is None:
+            return None
+        _, intent, slots, start, end = best
+        return IntentMatch(intent, dict(slots), start, end, normalized)
+
+    def handle(self, text):
+        """(ответ, намерение) локального обработчика или None - тогда спрашиваем LLM"""
+        match = self.match(text)
+        if match is None:
+            self.fallbacks += 1
+            return None
+        response = match.intent.handler(match)
+        if response is None:
+            self.fallbacks += 1
+            return None
+        self.routed[match.name] = self.routed.get(match.name, 0) + 1
+        return response, match.intent
+
+    def stats(self):
+        return {'routed': dict(self.routed), 'fallbacks': self.fallbacks}
+
+
+class LocalCommands:
+    """
+    Команды, на которые Аркадий отвечает сам: время, дата, справка, выход,
+    громкость и "повтори". on_volume(level) вызывается с громкостью 0..100.
+    """
+
+    def __init__(self, on_volume=None, volume=100, volume_step=20):
+        self.on_volume = on_volume
+        self.volume = volume
+        self.volume_step = volume_step
+        self.last_response = None
+
+    def remember(self, response):
+        """Последняя реплика бота - для "повтори" """
+        self.last_response = response
+
+    def time(self, match):
+        template = random.choice(["Щас {}, браток", "Время {}, короче", "На часах {}, дорогуша"])
+        return template.format(datetime.now().strftime('%H:%M'))
+
+    def date(self, match):
+        now = datetime.now()
+        return f"Сегодня {_WEEKDAYS[now.weekday()]}, {now.day} {_MONTHS[now.month - 1]}, браток"
+
+    def help(self, match):
+        return HELP_TEXT
+
+    def exit(self, match):
+        return random.choice(FAREWELLS)
+
+    def set_volume(self, match):
+        level = parse_number(match.rest())
+        direction = match.slots.get('direction')
+        if level is None and direction is None:
+            return None  # "громкость" без числа - пусть отвечает LLM
+        if level is None:
+            step = self.volume_step if direction == 'up' else -self.volume_step
+            level = self.volume + step
+        self.volume = max(0, min(100, level))
+        if self.on_volume:
+            self.on_volume(self.volume)
+        if self.volume == 0:
+            return MUTED
+        return f"Громкость {self.volume}, браток" if direction is None else (
+            LOUDER if direction == 'up' else QUIETER)
+
+    def repeat(self, match):
+        if not self.last_response:
+            return NOTHING_TO_REPEAT
+        return self.last_response
+
+
+def default_router(commands):
+    """Маршрутизатор со встроенными командами LocalCommands"""
+    router = IntentRouter()
+    # Команда - вся фраза, кроме паразитов и аргументов: "какое время года",
+    # "помощь нужна с домашкой", "тише едешь - дальше будешь" - вопросы для LLM
+    router.add('time', ["который час", "сколько времени", "сколько сейчас времени",
+                        "какое время", "время", "скажи время"], commands.time, max_extra=0)
+    router.add('date', ["какое сегодня число", "какое число", "какой сегодня день", "какой день недели",
+                        "какой сегодня день недели", "какая дата", "какая сегодня дата", "дата"],
+               commands.date, max_extra=0)
+    router.add('help', ["помощь", "справка", "что умеешь", "что ты умеешь"], commands.help, max_extra=0)
+    router.add('exit', ["пока", "до свидания", "выход", "стоп", "хватит", "все", "выключайся", "отключись"],
+               commands.exit, priority=1, terminal=True, max_extra=0)
+    router.add('volume', [("громче", {'direction': 'up'}), ("погромче", {'direction': 'up'}),
+                          ("тише", {'direction': 'down'}), ("потише", {'direction': 'down'}),
+                          "громкост*", "звук на"], commands.set_volume,
+               max_extra=0, arguments=VOLUME_ARGUMENTS, numbers=True)
+    router.add('repeat', ["повтори", "еще раз", "что ты сказал", "не расслышал"], commands.repeat, max_extra=0)
+    return router.compile()
@@ -0,0 +1,351 @@
+import json
+import queue
+import socket
+import threading
+import time
+from .ollama_client import get_client, DEFAULT_KEEP_ALIVE
+from .tracing import Histogram
+
+# Признаки вопроса, которому нужна модель покрупнее
+COMPLEX_MARKERS = (
+    "почему", "объясни", "расскажи", "как сделать", "сравни", "в чем разница",
+    "что лучше", "посоветуй", "придумай", "план", "зачем"
+)
+
+
+class LLMUnavailable(Exception):
+    """Ни один бэкенд не ответил"""
+
+
+class LLMBackend:
+    """
+    Бэкенд LLM: open() отправляет потоковый запрос, chunks() переводит ответ
+    в чанки формата Ollama {'response': текст, 'done': bool}.
+    """
+
+    kind = None
+
+    def __init__(self, name, url, model, tier='fast', timeout=60):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.tier = tier            # 'fast' - маленькая быстрая модель, 'large' - крупная
+        self.timeout = timeout
+        self.client = get_client(url)
+
+        # Задержки первого токена для дедлайна хеджирования (свежие важнее)
+        self.first_token = Histogram(reservoir=256)
+        self.requests = 0
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.failures = 0           # Ошибки подряд
+        self.down_until = 0.0
+
+    def open(self, prompt, options):
+        raise NotImplementedError
+
+    def chunks(self, response):
+        raise NotImplementedError
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.down_until
+
+    def record_error(self, cooldown=10.0, max_failures=3):
+        """После max_failures ошибок подряд бэкенд отдыхает cooldown секунд"""
+        self.errors += 1
+        self.failures += 1
+        if self.failures >= max_failures:
+            self.down_until = time.monotonic() + cooldown
+
+    def record_success(self, first_token):
+        self.failures = 0
+        self.wins += 1
+        self.first_token.observe(first_token)
+
+    def stats(self):
+        summary = self.first_token.summary()
+        return {
+            'kind': self.kind,
+            'tier': self.tier,
+            'model': self.model,
+            'requests': self.requests,
+            'wins': self.wins,
+            'errors': self.errors,
+            'cancelled': self.cancelled,
+            'first_token_p50': summary['p50'],
+            'first_token_p95': summary['p95'],
+            'first_token_p99': summary['p99']
+        }
+
+
+class OllamaBackend(LLMBackend):
+    """Ollama /api/generate (NDJSON)"""
+
+    kind = 'ollama'
+
+    def __init__(self, name, url, model, tier='fast', timeout=60, keep_alive=DEFAULT_KEEP_ALIVE):
+        super().__init__(name, url, model, tier, timeout)
+        self.keep_alive = keep_alive
+
+    def open(self, prompt, options):
+        payload = {"model": self.model, "prompt": prompt, "stream": True,
+                   "keep_alive": self.keep_alive, "options": options}
+        return self.client.post("/api/generate", payload, stream=True, timeout=self.timeout)
+
+    def chunks(self, response):
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI-совместимый /v1/chat/completions (SSE): llama.cpp server, vLLM, LM Studio..."""
+
+    kind = 'openai'
+
+    def __init__(self, name, url, model, tier='fast', timeout=60, api_key=None):
+        super().__init__(name, url, model, tier, timeout)
+        self.api_key = api_key
+
+    def open(self, prompt, options):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+            "temperature": options.get("temperature"),
+            "top_p": options.get("top_p"),
+            "max_tokens": options.get("num_predict"),
+            "stop": options.get("stop")
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+        return self.client.post("/v1/chat/completions", payload, stream=True, timeout=self.timeout,
+                                headers=headers)
+
+    def chunks(self, response):
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                yield {'response': '', 'done': True}
+                return
+            chunk = json.loads(data)
+            choices = chunk.get('choices') or [{}]
+            content = (choices[0].get('delta') or {}).get('content') or ''
+            if content:
+                yield {'response': content, 'done': False}
+
+
+BACKEND_KINDS = {'ollama': OllamaBackend, 'openai': OpenAIBackend}
+
+
+class _Attempt(threading.Thread):
+    """Один запрос к бэкенду: чанки складывает в общую очередь роутера"""
+
+    def __init__(self, backend, prompt, options, events):
+        super().__init__(daemon=True)
+        self.backend = backend
+        self.prompt = prompt
+        self.options = options
+        self.events = events
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self._response = None
+
+    def run(self):
+        self.backend.requests += 1
+        try:
+            self._response = self.backend.open(self.prompt, self.options)
+            if self.cancelled:
+                return
+            self._response.raise_for_status()
+            for chunk in self.backend.chunks(self._response):
+                if self.cancelled:
+                    return
+                self.events.put((self, 'chunk', chunk))
+            self.events.put((self, 'end', None))
+        except Exception as e:
+            if not self.cancelled:
+                self.events.put((self, 'error', e))
+        finally:
+            if self._response is not None:
+                self._response.close()
+
+    def cancel(self):
+        """Отмена проигравшего: закрытие соединения обрывает и генерацию на сервере"""
+        if self.cancelled:
+            return
+        self.cancelled = True
+        self.backend.cancelled += 1
+        response = self._response
+        if response is None:
+            return
+        # close() ждет, пока поток попытки выйдет из чтения - сначала рвем сокет
+        connection = getattr(response.raw, '_connection', None)
+        sock = getattr(connection, 'sock', None)
+        try:
+            if sock is not None:
+                sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class LLMRouter:
+    """
+    Маршрутизатор запросов по нескольким бэкендам.
+
+    Простой вопрос идет на 'fast', сложный - на 'large' (classify()). Если
+    первый токен не пришел к дедлайну (p95 задержки этого бэкенда), тот же
+    запрос дублируется на следующий бэкенд; кто первым дал токен - отвечает,
+    остальные отменяются. Ошибка до первого токена - сразу следующий бэкенд.
+    """
+
+    def __init__(self, backends, hedge_quantile=0.95, min_samples=20, default_deadline=1.0,
+                 min_deadline=0.1, long_query_words=12, timeout=60):
+        self.backends = list(backends)
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.default_deadline = default_deadline  # Пока статистики мало
+        self.min_deadline = min_deadline
+        self.long_query_words = long_query_words
+        self.timeout = timeout
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.routed = {}
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """config - список словарей {kind, name, url, model, tier, ...} (например, из JSON)"""
+        backends = []
+        for entry in config:
+            entry = dict(entry)
+            backend_class = BACKEND_KINDS[entry.pop('kind', 'ollama')]
+            entry.setdefault('name', f"{entry['model']}@{entry['url']}")
+            backends.append(backend_class(**entry))
+        return cls(backends, **kwargs)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_config(json.load(f), **kwargs)
+
+    def classify(self, user_input):
+        """'large' для длинных и "объясняющих" вопросов, иначе 'fast'"""
+        text = user_input.lower()
+        if len(text.split()) > self.long_query_words or any(marker in text for marker in COMPLEX_MARKERS):
+            return 'large'
+        return 'fast'
+
+    def candidates(self, tier):
+        """Очередность бэкендов: доступные своего уровня по p50, потом остальные"""
+        def speed(backend):
+            p50 = backend.first_token.percentile(0.5)
+            return p50 if p50 is not None else self.default_deadline
+
+        ordered = sorted(self.backends, key=lambda b: (not b.available, b.tier != tier, speed(b)))
+        return ordered
+
+    def deadline(self, backend):
+        """Когда хеджировать: p95 первого токена бэкенда"""
+        if backend.first_token.count < self.min_samples:
+            return self.default_deadline
+        return max(self.min_deadline, backend.first_token.percentile(self.hedge_quantile))
+
+    def stream(self, prompt, options, tier='fast'):
+        """Чанки ответа {'response', 'done'} от самого быстрого бэкенда"""
+        candidates = self.candidates(tier)
+        if not candidates:
+            raise LLMUnavailable("Нет бэкендов")
+        self.routed[tier] = self.routed.get(tier, 0) + 1
+
+        events = queue.Queue()
+        attempts = []
+        pending = list(candidates)
+
+        def launch():
+            attempt = _Attempt(pending.pop(0), prompt, options, events)
+            attempts.append(attempt)
+            attempt.start()
+            return attempt
+
+        primary = launch()
+        hedge_at = primary.started + self.deadline(primary.backend)
+        winner = None
+        completed = False
+        try:
+            # До первого токена: ждем, хеджируем по дедлайну, переключаемся при ошибках
+            while winner is None:
+                timeout = None
+                if pending and len(attempts) == 1:
+                    timeout = max(hedge_at - time.perf_counter(), 0)
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout if timeout is not None else self.timeout)
+                except queue.Empty:
+                    if timeout is None:
+                        raise LLMUnavailable("Таймаут ожидания первого токена")
+                    self.hedges += 1
+                    launch()
+                    continue
+
+                if attempt.cancelled:
+                    continue
+                if kind == 'error':
+                    attempt.backend.record_error()
+                    attempt.cancelled = True
+                    if all(a.cancelled for a in attempts):
+                        if not pending:
+                            raise LLMUnavailable(f"Все бэкенды с ошибкой, последняя: {payload}")
+                        self.failovers += 1
+                        launch()
+                    continue
+                if kind == 'end' or payload.get('response') or payload.get('done'):
+                    winner = attempt
+                    winner.backend.record_success(time.perf_counter() - winner.started)
+                    if winner is not primary:
+                        self.hedge_wins += 1
+                    for other in attempts:
+                        if other is not winner and not other.cancelled:
+                            # Нижняя граница задержки проигравшего - чтобы p95 не "забыл" хвост
+                            other.backend.first_token.observe(time.perf_counter() - other.started)
+                            other.cancel()
+                    if kind == 'end':
+                        completed = True
+                        return
+                    yield payload
+                    if payload.get('done'):
+                        completed = True
+                        return
+
+            # Остаток ответа победителя
+            while True:
+                attempt, kind, payload = events.get(timeout=self.timeout)
+                if attempt is not winner:
+                    continue
+                if kind == 'end':
+                    completed = True
+                    return
+                if kind == 'error':
+                    winner.backend.record_error()
+                    raise LLMUnavailable(f"{winner.backend.name}: {payload}")
+                yield payload
+                if payload.get('done'):
+                    completed = True
+                    return
+        finally:
+            # Дочитавший победитель закроет соединение сам (и вернет его в пул)
+            for attempt in attempts:
+                if attempt.is_alive() and not attempt.cancelled and not (completed and attempt is winner):
+                    attempt.cancel()
+
+    def stats(self):
+        return {
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers,
+            'routed': dict(self.routed),
+            'backends': {backend.name: backend.stats() for backend in self.backends}
+        }
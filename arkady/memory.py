@@ -0,0 +1,170 @@
+import threading
+from collections import deque
+
+
+def estimate_tokens(text):
+    """
+    Грубая оценка числа токенов без токенизатора: русский текст у llama-
+    токенизаторов выходит примерно в токен на 3 символа.
+    """
+    return len(text) // 3 + 1
+
+
+def extract_summary(summary, exchanges, budget):
+    """Сводка без LLM: о чем спрашивал пользователь, самое свежее - в конце"""
+    topics = [entry['user'].strip().rstrip('?.!') for entry in exchanges]
+    text = "; ".join(filter(None, [summary] + topics))
+    # Обрезаем с начала - старое забывается первым
+    while estimate_tokens(text) > budget and "; " in text:
+        text = text.split("; ", 1)[1]
+    return text
+
+
+def fit_summary(text, budget):
+    """Сводка в бюджет: лишнее срезается с начала, по границе слова"""
+    if estimate_tokens(text) <= budget:
+        return text
+    text = text[-max(budget - 1, 1) * 3:]
+    if " " in text:
+        text = text.split(" ", 1)[1]
+    return text
+
+
+class ConversationMemory:
+    """
+    Память разговора с бюджетом токенов.
+
+    Последние обмены лежат в deque целиком, пока влезают в token_budget;
+    вытесненные сжимаются в текстовую сводку. Сводку делает summarizer
+    (summary, exchanges) -> str - в фоновом потоке (background=True) или
+    лениво при следующем render(). Без summarizer - extract_summary().
+    Сводка не бывает длиннее summary_budget: ответ модели подрезается.
+    Сжимает всегда кто-то один - флаг _summarizing под блокировкой.
+    """
+
+    def __init__(self, token_budget=400, summary_budget=120, summarizer=None, background=True):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summarizer = summarizer
+        self.background = background
+
+        self.exchanges = deque()  # {'user', 'bot', 'tokens'}
+        self.summary = ""
+        self._tokens = 0
+        self._evicted = deque()   # Ждут сжатия в сводку
+        self._lock = threading.Lock()
+        self._worker = None
+        self._summarizing = False  # Кто-то сейчас сжимает _evicted
+        self._generation = 0       # clear() - сводка старого разговора уже не нужна
+        self.summaries = 0
+
+    def add(self, user_input, bot_response):
+        """Добавляет обмен и вытесняет старые сверх бюджета"""
+        tokens = estimate_tokens(user_input) + estimate_tokens(bot_response)
+        with self._lock:
+            self.exchanges.append({'user': user_input, 'bot': bot_response, 'tokens': tokens})
+            self._tokens += tokens
+            # Последний обмен остается всегда, даже если сам больше бюджета
+            while self._tokens > self.token_budget and len(self.exchanges) > 1:
+                entry = self.exchanges.popleft()
+                self._tokens -= entry['tokens']
+                self._evicted.append(entry)
+            pending = bool(self._evicted)
+        if pending and self.background:
+            self._start_worker()
+
+    def _claim(self):
+        """Берет право сжимать; False - уже сжимает другой или нечего"""
+        with self._lock:
+            if self._summarizing or not self._evicted:
+                return False
+            self._summarizing = True
+            return True
+
+    def _start_worker(self):
+        # Право берется под блокировкой: два потока не запустят двух сжимателей
+        if self._claim():
+            self._worker = threading.Thread(target=self._summarize_pending, daemon=True)
+            self._worker.start()
+
+    def _summarize_pending(self):
+        """Сжимает вытесненное, пока оно есть; вызывать, только получив право (_claim)"""
+        try:
+            while True:
+                with self._lock:
+                    # Флаг снимаем в той же проверке: новое вытесненное после нее
+                    # запустит нового сжимателя, а не потеряется
+                    if not self._evicted:
+                        self._summarizing = False
+                        return
+                    batch = list(self._evicted)
+                    self._evicted.clear()
+                    summary = self.summary
+                    generation = self._generation
+                summary = fit_summary(self._summarize(summary, batch), self.summary_budget)
+                with self._lock:
+                    if generation == self._generation:
+                        self.summary = summary
+                        self.summaries += 1
+        except BaseException:
+            with self._lock:
+                self._summarizing = False
+            raise
+
+    def _summarize(self, summary, batch):
+        if self.summarizer:
+            try:
+                result = self.summarizer(summary, batch)
+                if result:
+                    return result
+            except Exception as e:
+                print(f"⚠️  Не удалось сжать историю: {e}")
+        return extract_summary(summary, batch, self.summary_budget)
+
+    def render(self):
+        """Текст памяти для промпта: сводка + последние обмены"""
+        if not self.background and self._claim():
+            self._summarize_pending()
+        with self._lock:
+            summary = self.summary
+            exchanges = list(self.exchanges)
+        text = ""
+        if summary:
+            text += f"Раньше говорили о: {summary}\n\n"
+        if exchanges:
+            text += "Предыдущий разговор:\n"
+            for entry in exchanges:
+                text += f"Пользователь: {entry['user']}\n"
+                text += f"Аркадий: {entry['bot']}\n"
+            text += "\n"
+        return text
+
+    def wait(self, timeout=None):
+        """Ждет фоновое сжатие (для тестов и бенчмарков)"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.exchanges.clear()
+            self._evicted.clear()
+            self._tokens = 0
+            self.summary = ""
+
+    def tokens(self):
+        """Оценка токенов памяти в промпте"""
+        with self._lock:
+            return self._tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def __len__(self):
+        return len(self.exchanges)
+
+    def stats(self):
+        return {
+            'exchanges': len(self.exchanges),
+            'tokens': self.tokens(),
+            'summary_tokens': estimate_tokens(self.summary) if self.summary else 0,
+            'summaries': self.summaries
+        }
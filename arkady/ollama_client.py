@@ -0,0 +1,96 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_URL = "http://localhost:11434"
+DEFAULT_KEEP_ALIVE = "30m"  # Сколько Ollama держит модель в памяти после запроса
+
+
+class OllamaClient:
+    """
+    HTTP-клиент Ollama с пулом keep-alive соединений (requests.Session)
+    и политикой удержания модели в памяти (keep_alive).
+
+    keep_alive - как в API Ollama: "5m", "1h", -1 (держать всегда), 0 (выгрузить сразу).
+    """
+
+    def __init__(self, base_url=DEFAULT_URL, keep_alive=DEFAULT_KEEP_ALIVE, pool_size=8, timeout=60):
+        self.base_url = base_url.rstrip('/')
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+
+        self.requests_sent = 0
+        self.warmups = []  # (модель, секунды) прогревов
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.requests_sent += 1
+
+    def get(self, path, timeout=5, **kwargs):
+        self._count()
+        return self.session.get(f"{self.base_url}{path}", timeout=timeout, **kwargs)
+
+    def post(self, path, payload, stream=False, timeout=None, headers=None):
+        """POST в API; для генерации подставляет keep_alive, если не задан"""
+        if path in ('/api/generate', '/api/chat') and 'keep_alive' not in payload:
+            payload = dict(payload, keep_alive=self.keep_alive)
+        self._count()
+        return self.session.post(
+            f"{self.base_url}{path}",
+            json=payload,
+            stream=stream,
+            timeout=timeout or self.timeout,
+            headers=headers
+        )
+
+    def warm_up(self, model, keep_alive=None):
+        """
+        Загружает модель заранее: пустой промпт в /api/generate заставляет
+        Ollama поднять модель в память без генерации. Возвращает секунды.
+        """
+        start = time.perf_counter()
+        payload = {'model': model, 'prompt': '', 'stream': False,
+                   'keep_alive': self.keep_alive if keep_alive is None else keep_alive}
+        with self.post('/api/generate', payload) as response:
+            response.raise_for_status()
+        elapsed = time.perf_counter() - start
+        self.warmups.append((model, elapsed))
+        return elapsed
+
+    def connections_opened(self):
+        """Сколько TCP-соединений пул открыл за все время"""
+        pools = self._adapter.poolmanager.pools
+        return sum(getattr(pools[key], 'num_connections', 0) for key in pools.keys())
+
+    def stats(self):
+        opened = self.connections_opened()
+        return {
+            'requests': self.requests_sent,
+            'connections_opened': opened,
+            'connections_reused': max(self.requests_sent - opened, 0),
+            'warmups': list(self.warmups)
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=DEFAULT_URL):
+    """Общий клиент на процесс для base_url: соединения переиспользуются всеми"""
+    key = base_url.rstrip('/')
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = OllamaClient(key)
+        return client
@@ -1,8 +1,9 @@
 import random
+from .style_rules import get_rules
 from .swears_config import CUSTOM_SWEAR_WORDS, CUSTOM_SWEAR_PHRASES, get_swear_config
 
 class ArkadyPersonality:
-    def __init__(self, swear_intensity='medium'):
+    def __init__(self, swear_intensity='medium', style_rules=None):
         # Приветствия
         self.greetings = [
             "Ну што, браток?",
@@ -12,17 +13,8 @@ class ArkadyPersonality:
             "Ну давай, выкладывай"
         ]
         
-        # Жаргонные фразы для вставки
-        self.jargon_phrases = [
-            "браток", "дорогуша", "корешок", "земеля", 
-            "чувак", "кент", "мужик", "батя"
-        ]
-        
-        # Междометия и паразиты речи
-        self.fillers = [
-            "ну", "вот", "значит", "короче", "слушай",
-            "понимаешь", "вообще", "блин", "черт", "елки-палки"
-        ]
+        # Замены слов, жаргон и паразиты речи - из файла правил (перечитывается на ходу)
+        self.style = get_rules(style_rules)
         
         # Грубые, но не матерные ответы
         self.rude_responses = [
@@ -41,6 +33,24 @@ class ArkadyPersonality:
         self.swear_probability = swear_config['probability']
         self.swear_enabled = True
         
+        # Резервные ответы, если ИИ не работает
+        self.fallback_responses = [
+            "Ну вот, не работает у меня башка сегодня, браток",
+            "Слушай, что-то я туплю сейчас",
+            "Давай по-другому спроси, а то не врубаюсь",
+            "Хм, не понял я тебя, дорогуша",
+            "Короче, не допер я, повтори",
+            "Что-то мозги не варят, скажи еще раз"
+        ]
+        
+        # Напоминания о себе после долгой тишины
+        self.reminders = [
+            "Я тут, браток",
+            "Слушаю тебя, дорогуша",
+            "Говори, не стесняйся",
+            "Че молчишь?"
+        ]
+        
         # Положительные реакции
         self.positive_responses = [
             "Вот это дело!",
@@ -69,43 +79,48 @@ class ArkadyPersonality:
         """Случайное приветствие"""
         return random.choice(self.greetings)
     
-    def add_jargon(self, text):
-        """Добавляет жаргон в текст"""
-        if random.random() < 0.3:  # 30% шанс добавить жаргон
-            jargon = random.choice(self.jargon_phrases)
-            # Добавляем в конец
-            if not text.endswith('.'):
-                text += ", " + jargon
-            else:
-                text = text[:-1] + ", " + jargon + "."
-        return text
+    def static_phrases(self):
+        """Фразы, которые звучат как есть, без обработки (для заготовки звука)"""
+        return (self.greetings + self.fallback_responses + self.reminders
+                + self.positive_responses + self.rude_responses)
     
-    def add_filler(self, text):
-        """Добавляет паразиты речи"""
-        if random.random() < 0.4:  # 40% шанс добавить паразит
-            filler = random.choice(self.fillers)
-            # Добавляем в начало
-            text = filler + ", " + text.lower()
-        return text
+    def clean_response(self, text):
+        """Убирает вежливость и делает грубее (без случайных вставок)"""
+        return self.style.apply(text)
     
     def process_response(self, ai_response):
-        """Обрабатывает ответ ИИ в стиле Аркадия"""
-        # Убираем лишнюю вежливость
-        response = ai_response.replace("Пожалуйста", "")
-        response = response.replace("Извините", "")
-        response = response.replace("Спасибо", "")
+        """Обрабатывает ответ ИИ в стиле Аркадия: замены слов и вставки срезами"""
+        jargon = self.style.jargon
+        filler = self.style.filler
+        prefix, suffix, infix, infix_at = "", "", "", 0
         
-        # Делаем более грубым
-        response = response.replace("Хорошо", "Ладно")
-        response = response.replace("Отлично", "Нормально")
-        response = response.replace("Замечательно", "Годно")
+        # Жаргон - в конец, паразит - в начало
+        if jargon['phrases'] and random.random() < jargon['probability']:
+            suffix = ", " + random.choice(jargon['phrases'])
+        if filler['phrases'] and random.random() < filler['probability']:
+            prefix = random.choice(filler['phrases']) + ", "
         
-        # Добавляем характер
-        response = self.add_jargon(response)
-        response = self.add_filler(response)
-        response = self.add_swearing(response)  # Добавляем маты
+        # Маты: слово в случайное место или фраза в начало/конец
+        if self.swear_enabled and random.random() < self.swear_probability:
+            if random.random() < 0.6:
+                infix = random.choice(self.swear_words)
+                infix_at = random.randrange(max(len(ai_response), 1))
+            elif random.random() < 0.5:
+                prefix = random.choice(self.swear_phrases) + ", " + prefix
+            else:
+                suffix += ", " + random.choice(self.swear_phrases)
         
-        return response
+        return self.style.apply(ai_response, prefix, suffix, infix, infix_at)
+    
+    def process_sentence(self, sentence, first=False):
+        """
+        Обработка одного предложения потокового ответа.
+        Характер добавляем только в первое - иначе вставок будет
+        больше, чем в целом ответе.
+        """
+        if first:
+            return self.process_response(sentence)
+        return self.clean_response(sentence)
     
     def get_random_reaction(self, positive=True):
         """Случайная реакция"""
@@ -114,33 +129,6 @@ class ArkadyPersonality:
         else:
             return random.choice(self.rude_responses)
     
-    def add_swearing(self, text):
-        """Добавляет маты в текст"""
-        if not self.swear_enabled:
-            return text
-            
-        # Шанс добавить мат
-        if random.random() < self.swear_probability:
-            # Случайно выбираем тип мата
-            if random.random() < 0.6:  # 60% - одиночное слово
-                swear = random.choice(self.swear_words)
-                # Добавляем в случайное место
-                words = text.split()
-                if len(words) > 2:
-                    pos = random.randint(1, len(words)-1)
-                    words.insert(pos, swear)
-                    text = " ".join(words)
-                else:
-                    text = swear + ", " + text
-            else:  # 40% - целая фраза
-                swear_phrase = random.choice(self.swear_phrases)
-                if random.random() < 0.5:
-                    text = swear_phrase + ", " + text.lower()
-                else:
-                    text = text + ", " + swear_phrase
-        
-        return text
-    
     def set_swearing(self, enabled=True, probability=0.3):
         """Настройка матов"""
         self.swear_enabled = enabled
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from . import tracing
+
+_END = object()  # Конец ответа в очереди синтеза
+
+
+class PipelineTurn:
+    """Ход конвейера: команда, ответ и флаг отмены"""
+
+    def __init__(self, command, reply=None, trace=tracing.NULL_TURN):
+        self.command = command
+        self.reply = reply          # Готовые фразы вместо LLM (напоминание)
+        self.trace = trace
+        self.cancelled = False
+        self.created = time.perf_counter()
+        self.first_audio = None     # Когда началось первое предложение
+        self.done = None
+
+
+class ConversationPipeline:
+    """
+    Асинхронный конвейер разговора: слух -> мозги -> голос.
+
+    Стадии - задачи asyncio, связанные ограниченными очередями, блокирующая
+    работа уходит в потоки (asyncio.to_thread).
+
+    barge_in=True: слушатель работает, пока бот говорит, и новая команда
+    во время ответа отменяет текущий ход во всех стадиях: генерация
+    закрывается, недосказанное выбрасывается. Нужен вход с эхоподавлением
+    (гарнитура, AEC) - иначе бот слышит свой голос и перебивает сам себя.
+    По умолчанию выключено: пока бот говорит, слух глушится через
+    mute_listener, а команды ждут конца ответа.
+
+    listen()            -> команда или None (должен возвращаться за ~секунду)
+    respond(command)    -> итератор предложений ответа
+    speak(sentence)     -> синтез и проигрывание, блокирующий
+    stop_speaking()     -> прерывает текущее проигрывание (опционально)
+    idle_phrase()       -> фраза-напоминание после idle_timeout тишины (опционально)
+    on_turn(turn)       -> вызывается для новой команды (метки трассировки)
+    mute_listener(flag) -> глушит слух на время речи бота (без barge-in, опционально)
+    """
+
+    def __init__(self, listen, respond, speak, stop_speaking=None, idle_phrase=None, on_turn=None,
+                 idle_timeout=30.0, queue_size=2, speech_queue_size=4, barge_in=False, mute_listener=None):
+        self.listen = listen
+        self.respond = respond
+        self.speak = speak
+        self.stop_speaking = stop_speaking
+        self.idle_phrase = idle_phrase
+        self.on_turn = on_turn
+        self.idle_timeout = idle_timeout
+        self.queue_size = queue_size
+        self.speech_queue_size = speech_queue_size
+        self.barge_in = barge_in
+        self.mute_listener = mute_listener
+
+        self.turns = []          # Завершенные ходы
+        self.cancelled = 0
+        self._active = []        # Ходы, которые еще думаются или говорятся
+        self._stop_when_idle = False
+        self._muted = False
+        self._loop = None
+        self._stopped = None
+
+    async def run(self, initial=None):
+        """Запускает стадии до stop(); initial - фразы, которые сказать сразу"""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._commands = asyncio.Queue(self.queue_size)
+        self._speech = asyncio.Queue(self.speech_queue_size)
+
+        if initial:
+            await self._enqueue(PipelineTurn(None, reply=list(initial)))
+
+        tasks = [
+            asyncio.create_task(self._listener()),
+            asyncio.create_task(self._thinker()),
+            asyncio.create_task(self._speaker())
+        ]
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for turn in list(self._active):
+                self._finish(turn)
+            self._mute(False)
+
+    def stop(self):
+        """Немедленная остановка (из любого потока)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def stop_after_reply(self):
+        """Остановка, когда договорим текущий ответ (из любого потока)"""
+        self._stop_when_idle = True
+
+    def cancel_active(self):
+        """Отменяет все ходы в работе"""
+        for turn in self._active:
+            if not turn.cancelled:
+                turn.cancelled = True
+                self.cancelled += 1
+        if self.stop_speaking:
+            self.stop_speaking()
+
+    async def _enqueue(self, turn):
+        self._active.append(turn)
+        await self._commands.put(turn)
+
+    async def _listener(self):
+        last_activity = time.perf_counter()
+        while True:
+            command = await asyncio.to_thread(self.listen)
+            now = time.perf_counter()
+            if command:
+                last_activity = now
+                if self.barge_in and self._active:
+                    self.cancel_active()
+                turn = PipelineTurn(command, trace=tracing.tracer.turn())
+                if self.on_turn:
+                    self.on_turn(turn)
+                await self._enqueue(turn)
+            elif self.idle_phrase and not self._active and now - last_activity >= self.idle_timeout:
+                last_activity = now
+                phrase = self.idle_phrase()
+                if phrase:
+                    await self._enqueue(PipelineTurn(None, reply=[phrase]))
+
+    async def _thinker(self):
+        while True:
+            turn = await self._commands.get()
+            if not turn.cancelled:
+                if turn.reply is not None:
+                    for sentence in turn.reply:
+                        await self._speech.put((turn, sentence))
+                else:
+                    await self._think(turn)
+            await self._speech.put((turn, _END))
+
+    async def _think(self, turn):
+        """Тянет предложения ответа из генератора в потоке, пока ход не отменен"""
+        sentences = iter(await asyncio.to_thread(tracing.run_in_turn, turn.trace, self.respond, turn.command))
+        pending = None
+        try:
+            while not turn.cancelled:
+                pending = asyncio.ensure_future(
+                    asyncio.to_thread(tracing.run_in_turn, turn.trace, next, sentences, _END))
+                # shield: при остановке конвейера поток с next() не бросаем, а дожидаемся ниже
+                sentence = await asyncio.shield(pending)
+                if sentence is _END or turn.cancelled:
+                    break
+                await self._speech.put((turn, sentence))
+        finally:
+            # Генератор нельзя закрыть, пока в потоке идет его next()
+            if pending is not None and not pending.done():
+                await asyncio.wait({pending})
+            # Закроет и HTTP-поток к LLM
+            close = getattr(sentences, 'close', None)
+            if close:
+                await asyncio.to_thread(close)
+
+    async def _speaker(self):
+        while True:
+            turn, sentence = await self._speech.get()
+            if sentence is _END:
+                self._finish(turn)
+                if self._stop_when_idle and not self._active:
+                    self._stopped.set()
+                continue
+            if turn.cancelled:
+                continue
+            if turn.first_audio is None:
+                turn.first_audio = time.perf_counter()
+            self._mute(True)
+            try:
+                await asyncio.to_thread(tracing.run_in_turn, turn.trace, self.speak, sentence)
+            finally:
+                # Следующее предложение уже готово - слух не включаем между ними
+                if self._speech.empty():
+                    self._mute(False)
+
+    def _mute(self, muted):
+        """Слух выключен, пока бот говорит (если перебивать нельзя)"""
+        if self.mute_listener and not self.barge_in and muted != self._muted:
+            self._muted = muted
+            self.mute_listener(muted)
+
+    def _finish(self, turn):
+        if turn in self._active:
+            self._active.remove(turn)
+        turn.done = time.perf_counter()
+        turn.trace.finish()
+        self.turns.append(turn)
+
+    def stats(self):
+        """Задержка команда -> первый звук и длительность ходов"""
+        answered = [t for t in self.turns if t.command and t.first_audio is not None]
+        first_audio = sorted(t.first_audio - t.created for t in answered)
+        return {
+            'turns': len([t for t in self.turns if t.command]),
+            'cancelled': self.cancelled,
+            'first_audio_mean': sum(first_audio) / len(first_audio) if first_audio else 0.0,
+            'first_audio_max': first_audio[-1] if first_audio else 0.0,
+            'turn_mean': (sum(t.done - t.created for t in answered) / len(answered)) if answered else 0.0
+        }
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from .audio_sink import SoundDeviceSink
+from .tracing import Histogram
+
+# av (PyAV) и sounddevice импортируются при первом использовании
+
+EDGE_SAMPLE_RATE = 24000  # edge-tts отдает MP3 24 кГц моно
+
+
+class PcmDecoder:
+    """PCM int16 как есть: только выравнивание по целым сэмплам"""
+
+    def __init__(self, sample_rate=EDGE_SAMPLE_RATE):
+        self._pending = b''
+
+    def feed(self, data):
+        data = self._pending + bytes(data)
+        cut = len(data) - len(data) % 2
+        self._pending = data[cut:]
+        return data[:cut]
+
+    def flush(self):
+        self._pending = b''
+        return b''
+
+
+class Mp3Decoder:
+    """
+    Потоковый декодер MP3 на PyAV: парсер собирает кадры из кусков по мере
+    прихода, готовые кадры сразу переводятся в PCM int16 моно sample_rate.
+    """
+
+    def __init__(self, sample_rate=EDGE_SAMPLE_RATE):
+        import av
+
+        self._codec = av.CodecContext.create('mp3', 'r')
+        self._resampler = av.AudioResampler(format='s16', layout='mono', rate=sample_rate)
+
+    def _pcm(self, frames):
+        out = bytearray()
+        for frame in frames:
+            for resampled in self._resampler.resample(frame):
+                out += resampled.to_ndarray().tobytes()
+        return out
+
+    def feed(self, data):
+        out = bytearray()
+        for packet in self._codec.parse(bytes(data)):
+            out += self._pcm(self._codec.decode(packet))
+        return bytes(out)
+
+    def flush(self):
+        """Хвост: последний кадр парсера, буфер декодера и ресемплера"""
+        out = bytearray()
+        for packet in self._codec.parse(None):
+            out += self._pcm(self._codec.decode(packet))
+        out += self._pcm(self._codec.decode(None))
+        for resampled in self._resampler.resample(None):
+            out += resampled.to_ndarray().tobytes()
+        return bytes(out)
+
+
+DECODERS = {'pcm': PcmDecoder, 'mp3': Mp3Decoder}
+
+_END = object()
+
+
+class StreamingPlayer:
+    """
+    Проигрывание синтеза по мере прихода: куски декодируются в памяти и
+    пишутся в постоянно открытый выход (sink), без файлов и процессов.
+    Сеть читается параллельно с выводом звука - очередь PCM между ними.
+    """
+
+    def __init__(self, sink=None, sample_rate=EDGE_SAMPLE_RATE, queue_size=8):
+        self.sample_rate = sample_rate
+        self.sink = sink or SoundDeviceSink(sample_rate)
+        # Очередь PCM ограничена: синтез ждет, пока выход не заберет звук
+        self.queue_size = queue_size
+        self._write_lock = threading.Lock()
+        self._generation = 0
+
+        # Статистика
+        self.first_sample = Histogram()  # Старт фразы -> первый сэмпл на выходе
+        self.plays = 0
+        self.cancelled = 0
+
+    async def play(self, chunks, fmt='mp3', on_first_sample=None):
+        """
+        Играет async-итератор кусков формата fmt ('mp3' или 'pcm').
+        on_first_sample() вызывается, когда первый сэмпл ушел на выход.
+        Возвращает {'first_sample', 'audio_seconds', 'cancelled'}.
+        """
+        started = time.perf_counter()
+        generation = self._generation
+        decoder = DECODERS[fmt](self.sample_rate)
+        queue = asyncio.Queue(self.queue_size)
+        result = {'first_sample': None, 'audio_seconds': 0.0, 'cancelled': False}
+        stopped = []  # Ошибка выхода или None, если play() бросили - писать больше нечего
+
+        async def writer():
+            while True:
+                pcm = await queue.get()
+                if pcm is _END:
+                    return
+                # После отмены или ошибки дочитываем очередь, чтобы play() не встал на put()
+                if stopped or generation != self._generation:
+                    continue
+                if result['first_sample'] is None:
+                    result['first_sample'] = time.perf_counter() - started + self.sink.latency
+                    if on_first_sample:
+                        on_first_sample()
+                try:
+                    await asyncio.to_thread(self._write, pcm)
+                except Exception as e:
+                    stopped.append(e)
+                    continue
+                result['audio_seconds'] += len(pcm) / 2 / self.sample_rate
+
+        writing = asyncio.create_task(writer())
+        try:
+            async for chunk in chunks:
+                if generation != self._generation or stopped:
+                    break
+                pcm = decoder.feed(chunk)
+                if pcm:
+                    await queue.put(pcm)
+            else:
+                tail = decoder.flush()
+                if tail:
+                    await queue.put(tail)
+        except BaseException:
+            # Задачу отменили (или ошибка синтеза) - недоигранное не пишем
+            stopped.append(None)
+            raise
+        finally:
+            await queue.put(_END)
+            await writing
+            # Брошенный на середине генератор синтеза закрываем сразу (и его соединение)
+            aclose = getattr(chunks, 'aclose', None)
+            if aclose:
+                await aclose()
+        if stopped:
+            raise stopped[0]
+
+        self.plays += 1
+        if generation != self._generation:
+            result['cancelled'] = True
+            self.cancelled += 1
+        elif result['first_sample'] is not None:
+            self.first_sample.observe(result['first_sample'])
+        return result
+
+    def _write(self, pcm):
+        with self._write_lock:
+            self.sink.write(pcm)
+
+    def cancel(self):
+        """Обрывает текущую фразу (из любого потока) и сбрасывает буфер выхода"""
+        self._generation += 1
+        self.sink.abort()
+
+    def close(self):
+        self.sink.close()
+
+    def stats(self):
+        summary = self.first_sample.summary()
+        return {
+            'plays': self.plays,
+            'cancelled': self.cancelled,
+            'first_sample_p50': summary['p50'],
+            'first_sample_p95': summary['p95'],
+            'audio_seconds': self.sink.audio_seconds
+        }
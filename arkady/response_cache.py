@@ -0,0 +1,169 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Слова, которые не меняют смысл вопроса
+FILLER_WORDS = {
+    "ну", "вот", "а", "и", "же", "ли", "слушай", "скажи", "скажика", "пожалуйста",
+    "короче", "типа", "блин", "значит", "вообще", "эй", "эээ", "ээ", "мм", "ммм",
+    "аркадий", "аркаша", "браток", "давай"
+}
+
+# Окончания для грубого стемминга (длинные раньше коротких)
+_ENDINGS = sorted([
+    "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ешь", "ишь", "ете", "ите",
+    "ает", "яет", "ует", "ться", "тся", "ась", "ись", "ая", "яя", "ое", "ее", "ые", "ие",
+    "ый", "ий", "ой", "ом", "ем", "ам", "ям", "ах", "ях", "ов", "ев", "ей", "ую", "юю",
+    "ть", "ет", "ит", "ут", "ют", "ат", "ят", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь"
+], key=len, reverse=True)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+
+def _stem(word):
+    """Отрезает типичное окончание у слов длиннее 4 букв"""
+    if len(word) <= 4:
+        return word
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+
+def normalize_question(text, stemming=False):
+    """Ключ кэша: нижний регистр, без пунктуации и слов-паразитов"""
+    text = _NON_WORD.sub(" ", text.lower().replace("ё", "е"))
+    words = [w for w in text.split() if w not in FILLER_WORDS]
+    if stemming:
+        words = [_stem(w) for w in words]
+    return " ".join(words)
+
+
+class ResponseCache:
+    """
+    Кэш ответов LLM на повторяющиеся вопросы: LRU + TTL, опционально файл на диске.
+
+    Хранится сырой ответ модели - личность Аркадия обрабатывает его заново
+    при каждом попадании, так что жаргон и паразиты разные.
+
+    Файл - журнал JSON Lines: put() дописывает одну строку, целиком файл
+    переписывается (сжимается) только когда строк вдвое больше max_entries.
+    """
+
+    def __init__(self, max_entries=256, ttl=24 * 3600, path=None, stemming=False):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.stemming = stemming
+        self._entries = OrderedDict()  # ключ -> {'answer', 'created', 'latency'}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.saved_seconds = 0.0  # Сколько времени генерации сэкономили попадания
+        self._journal_lines = 0
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def key(self, question):
+        return normalize_question(question, self.stemming)
+
+    def get(self, question):
+        """Сырой ответ или None"""
+        key = self.key(question)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry['created'] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry['latency']
+            return entry['answer']
+
+    def put(self, question, answer, latency=0.0):
+        """Запоминает сырой ответ и сколько стоило его получить"""
+        key = self.key(question)
+        if not key or not answer:
+            return
+        entry = {'answer': answer, 'created': time.time(), 'latency': latency}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+        if self.path:
+            self._append(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self):
+        """Загружает кэш из журнала, пропуская просроченное и битые строки"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError as e:
+            print(f"⚠️  Не удалось прочитать кэш ответов {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for line in lines:
+                try:
+                    key, entry = json.loads(line)
+                except ValueError:
+                    continue  # Строка, недописанная при падении
+                # Поздняя запись того же вопроса - свежее
+                self._entries.pop(key, None)
+                if now - entry['created'] <= self.ttl:
+                    self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._journal_lines = len(lines)
+
+    def _append(self, key, entry):
+        """Дописывает запись в журнал; разросшийся журнал сжимает"""
+        line = json.dumps([key, entry], ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self._journal_lines += 1
+            compact = self._journal_lines > 2 * self.max_entries
+        if compact:
+            self.save()
+
+    def save(self):
+        """Атомарно переписывает журнал: по строке на живую запись"""
+        with self._lock:
+            lines = [json.dumps(item, ensure_ascii=False) + "\n" for item in self._entries.items()]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.path)
+            self._journal_lines = len(lines)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'saved_seconds': self.saved_seconds,
+            'expired': self.expired,
+            'evicted': self.evicted
+        }
@@ -0,0 +1,197 @@
+import threading
+import numpy as np
+
+
+class Int16RingBuffer:
+    """
+    Кольцевой буфер сэмплов int16 на один писатель и один читатель.
+
+    Писатель (audio callback) конвертирует float32 прямо в буфер, без
+    промежуточных массивов. Читатель получает memoryview без копирования.
+    Позиции - монотонные счетчики сэмплов; каждый счетчик меняет только
+    своя сторона, поэтому блокировки на пути данных не нужны.
+
+    После основной области лежит "зеркало" из max_read сэмплов: запись в
+    начало буфера дублируется туда, и любое окно до max_read сэмплов
+    непрерывно в памяти даже на стыке.
+    """
+
+    def __init__(self, capacity, max_read):
+        if max_read > capacity:
+            raise ValueError("max_read больше емкости буфера")
+        self.capacity = capacity
+        self.max_read = max_read
+        self._buf = np.zeros(capacity + max_read, dtype=np.int16)
+        self._view = memoryview(self._buf).cast('B')
+        self._write_pos = 0  # Меняет только писатель
+        self._read_pos = 0   # Меняет только читатель
+        self._data_ready = threading.Event()
+        self._scratch = np.zeros(0, dtype=np.float32)  # Для ограничения float32 без аллокаций в callback
+
+        # Статистика вместо молчаливого pass
+        self.overruns = 0          # Блоки, выброшенные из-за полного буфера
+        self.dropped_samples = 0
+        self.underruns = 0         # Читатель прождал wait(timeout), а писатель ничего не дал
+
+    @property
+    def available(self):
+        """Сколько сэмплов можно прочитать"""
+        return self._write_pos - self._read_pos
+
+    def _mirror(self, start, count):
+        """Дублирует записанное в начало буфера в зеркало"""
+        lo, hi = start, start + count
+        if lo < self.max_read:
+            end = min(hi, self.max_read)
+            self._buf[self.capacity + lo:self.capacity + end] = self._buf[lo:end]
+        if hi > self.capacity:
+            end = min(hi - self.capacity, self.max_read)
+            self._buf[self.capacity:self.capacity + end] = self._buf[:end]
+
+    def _reserve(self, count):
+        """Проверка места под запись; при переполнении считаем потерю"""
+        if self._write_pos + count - self._read_pos > self.capacity:
+            self.overruns += 1
+            self.dropped_samples += count
+            return None
+        return self._write_pos % self.capacity
+
+    def _commit(self, start, count):
+        self._mirror(start, count)
+        self._write_pos += count
+        self._data_ready.set()
+
+    def write_float32(self, samples):
+        """Записывает float32 с конвертацией прямо в буфер. False - переполнение"""
+        count = len(samples)
+        start = self._reserve(count)
+        if start is None:
+            return False
+
+        # Выход за [-1, 1] (перегруз микрофона) при unsafe-касте завернулся
+        # бы в противоположный знак - сначала ограничиваем. Буфер для этого
+        # растет один раз, до размера блока callback
+        if len(self._scratch) < count:
+            self._scratch = np.zeros(count, dtype=np.float32)
+        clipped = self._scratch[:count]
+        np.clip(samples, -1.0, 1.0, out=clipped)
+
+        # 32767 вместо 32768: 1.0 не переполняет int16
+        first = min(count, self.capacity - start)
+        np.multiply(clipped[:first], 32767.0, out=self._buf[start:start + first], casting='unsafe')
+        if first < count:
+            np.multiply(clipped[first:], 32767.0, out=self._buf[:count - first], casting='unsafe')
+
+        self._commit(start, count)
+        return True
+
+    def write(self, samples):
+        """Записывает сэмплы int16 (массив или bytes). False - переполнение"""
+        if not isinstance(samples, np.ndarray):
+            samples = np.frombuffer(samples, dtype=np.int16)
+        count = len(samples)
+        start = self._reserve(count)
+        if start is None:
+            return False
+
+        first = min(count, self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        if first < count:
+            self._buf[:count - first] = samples[first:]
+
+        self._commit(start, count)
+        return True
+
+    def peek(self, count):
+        """
+        memoryview (байты PCM int16) на count сэмплов без копирования или None.
+        Данные валидны до вызова consume().
+        """
+        if count > self.max_read:
+            raise ValueError("Окно больше max_read")
+        if self.available < count:
+            # Сначала сбрасываем флаг, потом перепроверяем - иначе можно
+            # пропустить запись, случившуюся между проверкой и clear()
+            self._data_ready.clear()
+            if self.available < count:
+                return None  # Обычное дело: читатель быстрее микрофона
+        start = self._read_pos % self.capacity
+        return self._view[start * 2:(start + count) * 2]
+
+    def consume(self, count):
+        """Освобождает прочитанные сэмплы для писателя"""
+        self._read_pos += count
+
+    def wait(self, timeout=None):
+        """Ждет новые данные от писателя; таймаут - настоящее опустошение (звук не идет)"""
+        if self._data_ready.wait(timeout):
+            return True
+        self.underruns += 1
+        return False
+
+    def stats(self):
+        return {
+            'available': self.available,
+            'written': self._write_pos,
+            'read': self._read_pos,
+            'overruns': self.overruns,
+            'dropped_samples': self.dropped_samples,
+            'underruns': self.underruns
+        }
+
+
+class PreRollBuffer:
+    """
+    История последних seconds секунд PCM int16 с абсолютными позициями.
+    position - сколько сэмплов записано за все время; since(pos) отдает
+    записанное начиная с pos, если оно еще не вытеснено.
+    """
+
+    def __init__(self, seconds, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.capacity = int(seconds * sample_rate)
+        self._buf = np.zeros(self.capacity, dtype=np.int16)
+        self.position = 0
+        self._floor = 0  # Все что раньше - уже отдано/сброшено
+
+    def append(self, data):
+        """Дописывает блок (bytes, memoryview или массив int16) с копированием"""
+        samples = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.int16)
+        count = len(samples)
+        if not self.capacity:
+            self.position += count
+            return
+        if count >= self.capacity:
+            samples = samples[count - self.capacity:]
+
+        start = (self.position + count - len(samples)) % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._buf[start:start + first] = samples[:first]
+        if first < len(samples):
+            self._buf[:len(samples) - first] = samples[first:]
+        self.position += count
+
+    def since(self, position):
+        """bytes от абсолютной позиции до текущего конца"""
+        start = max(position, self._floor, self.position - self.capacity)
+        if start >= self.position:
+            return b''
+        lo = start % self.capacity
+        hi = self.position % self.capacity
+        if lo < hi:
+            return self._buf[lo:hi].tobytes()
+        return self._buf[lo:].tobytes() + self._buf[:hi].tobytes()
+
+    def take(self):
+        """Все накопленное с очисткой"""
+        data = self.since(self._floor)
+        self.clear()
+        return data
+
+    def clear(self):
+        self._floor = self.position
+
+    @property
+    def seconds(self):
+        """Сколько секунд истории доступно"""
+        return (self.position - max(self._floor, self.position - self.capacity)) / self.sample_rate
@@ -0,0 +1,49 @@
+import re
+
+# Конец предложения: знаки препинания (и закрывающие кавычки/скобки) + пробел
+_BOUNDARY = re.compile(r'[.!?…]+["»)]*\s+|\n+')
+
+
+class SentenceSplitter:
+    """
+    Инкрементальная нарезка потока токенов на предложения.
+
+    feed() принимает очередной кусок текста и возвращает готовые
+    предложения; flush() отдает остаток в конце потока. Слишком короткие
+    куски ("Ну.") приклеиваются к следующему предложению.
+    """
+
+    def __init__(self, min_chars=12):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text):
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            # Граница в самом конце буфера может оказаться "т." из "т.е." -
+            # ждем следующий символ (или flush)
+            if match.end() == len(self._buffer) and not match.group().endswith('\n'):
+                break
+            # После точки строчная буква - сокращение, а не конец предложения
+            if not match.group().endswith('\n') and self._buffer[match.end()].islower():
+                continue
+            sentence = self._buffer[start:match.end()].strip()
+            if len(sentence) < self.min_chars:
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+def split_sentences(text, min_chars=12):
+    """Нарезка готового текста на предложения"""
+    splitter = SentenceSplitter(min_chars)
+    return splitter.feed(text) + splitter.flush()
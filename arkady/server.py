@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Многосессионный сервер Аркадия: много разговоров на одном хосте.
+
+WebSocket (ws://host:port/): клиент шлет PCM 16 бит моно (бинарные кадры)
+или текст, сервер отвечает распознанной фразой, предложениями ответа и,
+по желанию, звуком. HTTP GET /health и /stats - для мониторинга.
+
+У каждой сессии свой ArkadyAI (история, личность, команды) и свой
+распознаватель; модель Vosk, пулы HTTP-соединений и кэш ответов общие.
+Одновременных запросов к LLM не больше llm_limit, остальные ждут в очереди.
+
+Протокол, клиент -> сервер:
+    {"type": "hello", "sample_rate": 16000, "audio": false}   необязательно
+    бинарный кадр                                             PCM
+    {"type": "end"}                                           конец фразы (дораспознать)
+    {"type": "text", "text": "..."}                           фраза текстом, без ASR
+    {"type": "reset"}                                         забыть историю
+Сервер -> клиент:
+    {"type": "session", "id": ...}
+    {"type": "transcript", "text": ...}
+    {"type": "sentence", "text": ..., "index": n}   (+ бинарные кадры MP3 при audio)
+    {"type": "done", "first_sentence": сек, "total": сек, "queued": сек}
+    {"type": "bye"}                                 после команды выхода
+
+Запуск:
+    python -m arkady.server --port 8765 --llm-limit 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+from . import vosk_models
+from .ollama_client import DEFAULT_KEEP_ALIVE
+from .response_cache import ResponseCache
+from .tracing import Histogram
+
+# websockets, requests (ArkadyAI) и edge_tts импортируются при запуске
+
+DEFAULT_MODEL_PATH = "vosk-model-small-ru-0.22"
+SAMPLE_RATE = 16000
+
+_END = object()  # Конец ответа в очереди предложений
+
+
+class LLMGate:
+    """
+    Общая очередь к LLM: не больше limit генераций одновременно (FIFO).
+
+    Одинаковый вопрос, который уже генерируется для другой сессии, второй
+    раз в модель не идет: ждет первый и получает ответ из общего кэша.
+    """
+
+    def __init__(self, limit=4, cache=None):
+        self.limit = limit
+        self.cache = cache
+        self._semaphore = None
+        self._inflight = {}  # Ключ вопроса -> Event завершения
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.coalesced = 0
+        self.wait_time = Histogram()
+
+    @asynccontextmanager
+    async def slot(self, question, shared=True):
+        """
+        async with gate.slot(вопрос): генерация. shared=False - ответ зависит
+        от разговора сессии, с чужими одинаковыми вопросами не склеиваем
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+
+        key = self.cache.key(question) if self.cache and shared else None
+        leader = self._inflight.get(key) if key else None
+        done = None
+        if key and leader is None:
+            done = self._inflight[key] = asyncio.Event()
+
+        started = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            try:
+                if leader is not None:
+                    self.coalesced += 1
+                    await leader.wait()
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.wait_time.observe(time.perf_counter() - started)
+
+            self.active += 1
+            try:
+                yield time.perf_counter() - started
+            finally:
+                self.active -= 1
+                self._semaphore.release()
+        finally:
+            if done is not None:
+                del self._inflight[key]
+                done.set()
+
+    def stats(self):
+        summary = self.wait_time.summary()
+        return {
+            'limit': self.limit,
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_waiting': self.max_waiting,
+            'coalesced': self.coalesced,
+            'wait_p50': summary['p50'],
+            'wait_p95': summary['p95']
+        }
+
+
+class Session:
+    """Разговор одного клиента: свой ArkadyAI и распознаватель из общего пула"""
+
+    def __init__(self, session_id, ai, pool=None, sample_rate=SAMPLE_RATE):
+        self.id = session_id
+        self.ai = ai
+        self.pool = pool
+        self.sample_rate = sample_rate
+        self.audio = False          # Слать ли синтезированный звук
+        self.recognizer = pool.acquire() if pool else None
+        self.created = time.perf_counter()
+        self.turns = 0
+
+    def accept_audio(self, data):
+        """PCM -> законченная фраза или None (блокирующий, вызывать в потоке)"""
+        if self.recognizer is None:
+            return None
+        if self.recognizer.AcceptWaveform(vosk_models.waveform(data)):
+            return json.loads(self.recognizer.Result()).get('text') or None
+        return None
+
+    def flush_audio(self):
+        """Дораспознает хвост фразы"""
+        if self.recognizer is None:
+            return None
+        return json.loads(self.recognizer.FinalResult()).get('text') or None
+
+    def close(self):
+        if self.recognizer is not None:
+            self.pool.release(self.recognizer)
+            self.recognizer = None
+
+
+class SessionServer:
+    """
+    Сервер сессий. serve() - корутина для своего цикла asyncio,
+    start()/stop() - сервер в фоновом потоке (бенчмарки, встраивание).
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, model_path=None, model_name="llama3.2:1b",
+                 ollama_url="http://localhost:11434", swear_intensity='medium', keep_alive=DEFAULT_KEEP_ALIVE,
+                 llm_limit=4, max_sessions=64, cache=None, sample_rate=SAMPLE_RATE, synthesizer=None):
+        self.host = host
+        self.port = port
+        self.model_path = model_path        # None - только текст, без ASR
+        self.model_name = model_name
+        self.ollama_url = ollama_url
+        self.swear_intensity = swear_intensity
+        self.keep_alive = keep_alive
+        self.max_sessions = max_sessions
+        self.sample_rate = sample_rate
+        self.cache = cache if cache is not None else ResponseCache()  # False - без кэша
+        self.gate = LLMGate(llm_limit, self.cache)
+        # Звук для клиентов - через общий кэш фраз (CachedSynthesizer), как у локального голоса
+        self.synthesizer = synthesizer
+
+        self.pool = None
+        self.sessions = {}
+        self.total_sessions = 0
+        self.rejected = 0
+        self.first_sentence = Histogram()
+        self._ids = itertools.count(1)
+        self._server = None
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def serve(self):
+        """Загружает общие модели и обслуживает клиентов до stop()"""
+        from websockets.asyncio.server import serve
+
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        await asyncio.to_thread(self._load_shared)
+
+        async with serve(self._handle, self.host, self.port, process_request=self._http,
+                         max_size=2 ** 20) as server:
+            self._server = server
+            self.port = server.sockets[0].getsockname()[1]
+            print(f"🌐 Сервер Аркадия на {self.url} (LLM одновременно: {self.gate.limit})")
+            self._ready.set()
+            await self._stopped.wait()
+
+    def _load_shared(self):
+        """Общее на все сессии: модель Vosk, кэш голоса и проверка Ollama"""
+        from .text_generation import ArkadyAI
+        if self.model_path:
+            self.pool = vosk_models.get_pool(self.model_path, self.sample_rate)
+        if self.synthesizer is None:
+            from .tts_cache import CachedSynthesizer
+            self.synthesizer = CachedSynthesizer()
+        probe = ArkadyAI(model_name=self.model_name, ollama_url=self.ollama_url, keep_alive=self.keep_alive,
+                         swear_intensity=self.swear_intensity)
+        # Если нужной модели нет, проверка выбрала другую - сессии берут ее
+        self.model_name = probe.model_name
+
+    def start(self, timeout=60):
+        """Сервер в фоновом потоке; возвращается, когда он принимает соединения"""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.serve(),), daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Сервер не запустился")
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _new_session(self, session_id):
+        from .text_generation import ArkadyAI
+        ai = ArkadyAI(model_name=self.model_name, ollama_url=self.ollama_url, keep_alive=self.keep_alive,
+                      swear_intensity=self.swear_intensity, cache=self.cache, connect=False)
+        # Ollama уже проверен при запуске сервера
+        ai.ready.set()
+        return Session(session_id, ai, self.pool, self.sample_rate)
+
+    async def _handle(self, websocket):
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            await websocket.close(1013, "Слишком много сессий")
+            return
+
+        # Место занимаем сразу, до первого await: иначе одновременные
+        # подключения проходят проверку вместе и превышают max_sessions
+        session_id = next(self._ids)
+        self.sessions[session_id] = None
+        self.total_sessions += 1
+        session = None
+        try:
+            session = await asyncio.to_thread(self._new_session, session_id)
+            self.sessions[session_id] = session
+            await websocket.send(json.dumps({'type': 'session', 'id': session.id}))
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    text = await asyncio.to_thread(session.accept_audio, message)
+                    if text and not await self._turn(websocket, session, text):
+                        break
+                    continue
+
+                request = json.loads(message)
+                kind = request.get('type')
+                if kind == 'hello':
+                    session.audio = bool(request.get('audio', False))
+                    if request.get('sample_rate', self.sample_rate) != self.sample_rate:
+                        await websocket.send(json.dumps({'type': 'error',
+                                                         'error': f"нужен PCM {self.sample_rate} Гц"}))
+                elif kind == 'text':
+                    if not await self._turn(websocket, session, request.get('text', '')):
+                        break
+                elif kind == 'end':
+                    text = await asyncio.to_thread(session.flush_audio)
+                    if text and not await self._turn(websocket, session, text):
+                        break
+                elif kind == 'reset':
+                    session.ai.memory.clear()
+                    session.ai.context = None
+        except Exception as e:
+            # Обрыв соединения клиентом - обычное дело
+            if type(e).__name__ not in ('ConnectionClosedOK', 'ConnectionClosedError'):
+                print(f"⚠️  Сессия {session_id}: {e}")
+        finally:
+            if session is not None:
+                session.close()
+            self.sessions.pop(session_id, None)
+
+    async def _turn(self, websocket, session, text):
+        """Один ход разговора; False - клиент попрощался"""
+        text = text.strip()
+        if not text:
+            return True
+        started = time.perf_counter()
+        session.turns += 1
+        await websocket.send(json.dumps({'type': 'transcript', 'text': text}, ensure_ascii=False))
+
+        special, should_exit = session.ai.handle_special_commands(text)
+        queued = 0.0
+        first = None
+        if special:
+            first = await self._send_sentence(websocket, session, special, 0, started)
+        else:
+            # Генерация держит место в очереди к LLM, отправка и звук - нет
+            sentences = asyncio.Queue()
+            producer = asyncio.create_task(self._generate(session, text, sentences))
+            try:
+                index = 0
+                while (sentence := await sentences.get()) is not _END:
+                    at = await self._send_sentence(websocket, session, sentence, index, started)
+                    first = first if first is not None else at
+                    index += 1
+                queued = await producer
+            finally:
+                # Клиент ушел посреди ответа - генерация больше не нужна
+                if not producer.done():
+                    producer.cancel()
+                    await asyncio.gather(producer, return_exceptions=True)
+
+        if first is not None:
+            self.first_sentence.observe(first)
+        await websocket.send(json.dumps({'type': 'done', 'first_sentence': first, 'queued': queued,
+                                         'total': time.perf_counter() - started}))
+        if should_exit:
+            await websocket.send(json.dumps({'type': 'bye'}))
+            return False
+        return True
+
+    async def _generate(self, session, text, sentences):
+        """Предложения ответа в очередь, пока занято место у LLM; возвращает время ожидания места"""
+        try:
+            async with self.gate.slot(text, shared=session.ai.cacheable()) as queued:
+                stream = session.ai.generate_response_stream(text)
+                pending = None
+                try:
+                    while True:
+                        pending = asyncio.ensure_future(asyncio.to_thread(next, stream, None))
+                        # shield: при отмене поток с next() не бросаем, а дожидаемся ниже
+                        sentence = await asyncio.shield(pending)
+                        if sentence is None:
+                            break
+                        sentences.put_nowait(sentence)
+                finally:
+                    # Генератор нельзя закрыть, пока в потоке идет его next()
+                    if pending is not None and not pending.done():
+                        await asyncio.wait({pending})
+                    # Закрывает и HTTP-поток к LLM, если ответ оборвали
+                    await asyncio.to_thread(stream.close)
+            return queued
+        finally:
+            sentences.put_nowait(_END)
+
+    async def _send_sentence(self, websocket, session, sentence, index, started):
+        """Предложение (и его звук); возвращает задержку от начала хода"""
+        elapsed = time.perf_counter() - started
+        await websocket.send(json.dumps({'type': 'sentence', 'text': sentence, 'index': index},
+                                        ensure_ascii=False))
+        if session.audio:
+            await self._send_audio(websocket, session, sentence)
+        return elapsed
+
+    async def _send_audio(self, websocket, session, sentence):
+        """Звук предложения кусками MP3 по мере синтеза; повторные фразы - из кэша"""
+        from .speech_synthesis import VOICE_DMITRY, RATE_FAST, PITCH_LOW, edge_volume
+        volume = edge_volume(session.ai.commands.volume)
+        async for chunk in self.synthesizer.stream(sentence, VOICE_DMITRY, RATE_FAST, volume, PITCH_LOW):
+            await websocket.send(chunk)
+
+    def _http(self, connection, request):
+        """HTTP GET /health и /stats; остальное - рукопожатие WebSocket"""
+        if request.path == '/health':
+            return connection.respond(200, "ok\n")
+        if request.path == '/stats':
+            response = connection.respond(200, json.dumps(self.stats(), indent=2) + "\n")
+            del response.headers['Content-Type']
+            response.headers['Content-Type'] = 'application/json'
+            return response
+        return None
+
+    def stats(self):
+        summary = self.first_sentence.summary()
+        return {
+            'sessions': len(self.sessions),
+            'total_sessions': self.total_sessions,
+            'rejected': self.rejected,
+            'turns': summary['count'],
+            'first_sentence_p50': summary['p50'],
+            'first_sentence_p95': summary['p95'],
+            'llm': self.gate.stats(),
+            'cache': self.cache.stats() if self.cache else None,
+            'tts_cache': self.synthesizer.cache.stats() if self.synthesizer else None,
+            'asr': self.pool.stats() if self.pool else None
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Многосессионный сервер Аркадия")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH, help="Модель Vosk ('' - только текст)")
+    parser.add_argument('--llm-model', default="llama3.2:1b")
+    parser.add_argument('--ollama-url', default="http://localhost:11434")
+    parser.add_argument('--llm-limit', type=int, default=4, help="Одновременных генераций")
+    parser.add_argument('--max-sessions', type=int, default=64)
+    parser.add_argument('--swear-level', default='medium', choices=['light', 'medium', 'hardcore'])
+    args = parser.parse_args(argv)
+
+    server = SessionServer(args.host, args.port, model_path=args.model_path or None, model_name=args.llm_model,
+                           ollama_url=args.ollama_url, swear_intensity=args.swear_level,
+                           llm_limit=args.llm_limit, max_sessions=args.max_sessions)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print("\n✅ Сервер остановлен")
+
+
+if __name__ == "__main__":
+    main()
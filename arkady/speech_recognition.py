@@ -1,34 +1,72 @@
 import json
-import pyaudio
-import vosk
 import threading
-import queue
 import time
+from collections import deque
+import numpy as np
+from concurrent.futures import Future
+from .wake_word import WakeWordDetector, DEFAULT_WAKE_WORDS, make_grammar
+from . import vosk_models
+from .vad import VoiceActivityDetector
+from .audio_source import PyAudioSource
+from .endpointing import Endpointer
 
 class SpeechRecognizer:
-    def __init__(self, model_path="models/vosk-model-small-ru-0.22"):
+    def __init__(self, model_path="models/vosk-model-small-ru-0.22", audio_source=None,
+                 trailing_silence=0.7, max_utterance=8.0, command_timeout=5.0):
         self.model_path = model_path
         self.model = None
         self.recognizer = None
+        self.wake_detector = None
         self.microphone = None
-        self.audio_queue = queue.Queue()
+        self.audio_source = audio_source  # None - микрофон через PyAudio
         self.is_listening = False
-        self.wake_words = ["аркадий", "аркаша", "арк"]
+        self.command_mode = False  # True после срабатывания wake-word
+        # Пока говорит бот, ключевое слово не ищем: без эхоподавления
+        # микрофон слышит его голос ("Ну я Аркадий, короче...")
+        self.muted = False
+        self.wake_words = list(DEFAULT_WAKE_WORDS)
+        
+        # Активации (detection, Future с текстом команды). Храним только
+        # последнюю: старая команда, пока никто не ждал, уже неактуальна
+        self._activations = deque(maxlen=1)
+        self._activation_cond = threading.Condition()
+        self._command_future = None
+        self._command_parts = []
+        self._stream_time = 0.0     # Позиция начала текущего блока в потоке (сек)
+        self._command_origin = 0.0  # Позиция активации в потоке (сек)
+        self._activated_at = None   # perf_counter() срабатывания wake-word
+        self.last_endpoint = None
         
         # Настройки аудио
-        self.RATE = 16000
-        self.CHUNK = 8000
+        self.RATE = audio_source.sample_rate if audio_source else 16000
+        self.CHUNK = 1600  # 0.1 сек - wake-word ловим по частичным результатам
         self.CHANNELS = 1
         
+        # VAD перед AcceptWaveform: тишина комнаты не грузит Kaldi
+        self.vad = VoiceActivityDetector(sample_rate=self.RATE)
+        
+        # Конец команды - по тишине в аудио-времени, а не по таймаутам очереди
+        self.endpointer = Endpointer(
+            sample_rate=self.RATE,
+            trailing_silence=trailing_silence,
+            max_utterance=max_utterance,
+            no_speech_timeout=command_timeout
+        )
+        
         self.setup_vosk()
         self.setup_microphone()
     
     def setup_vosk(self):
         """Инициализация Vosk"""
         try:
-            print(f"Загружаем модель из {self.model_path}...")
-            self.model = vosk.Model(self.model_path)
-            self.recognizer = vosk.KaldiRecognizer(self.model, self.RATE)
+            # Модель общая на процесс, распознаватели берем из пулов
+            self.model = vosk_models.get_model(self.model_path)
+            self.recognizer = vosk_models.get_pool(self.model_path, self.RATE).acquire()
+            wake_pool = vosk_models.get_pool(self.model_path, self.RATE, make_grammar(self.wake_words))
+            self.wake_detector = WakeWordDetector(
+                self.model, self.wake_words, sample_rate=self.RATE, block_size=self.CHUNK,
+                recognizer=wake_pool.acquire()
+            )
             print("✓ Vosk модель загружена")
         except Exception as e:
             print(f"✗ Ошибка загрузки Vosk: {e}")
@@ -36,8 +74,14 @@ class SpeechRecognizer:
     
     def setup_microphone(self):
         """Настройка микрофона"""
+        if self.audio_source is not None:
+            print("✓ Внешний источник аудио")
+            return
+        
         try:
+            import pyaudio
             self.microphone = pyaudio.PyAudio()
+            self.audio_source = PyAudioSource(self.RATE, self.CHUNK, pyaudio_instance=self.microphone)
             print("✓ Микрофон готов")
         except Exception as e:
             print(f"✗ Ошибка микрофона: {e}")
@@ -61,91 +105,143 @@ class SpeechRecognizer:
             self.listen_thread.join(timeout=1)
         print("🔇 Прекратил слушать")
     
+    def set_muted(self, muted):
+        """Глушит поиск ключевого слова (начатая команда дослушивается)"""
+        self.muted = muted
+    
     def _listen_loop(self):
         """Основной цикл прослушивания"""
-        stream = self.microphone.open(
-            format=pyaudio.paInt16,
-            channels=self.CHANNELS,
-            rate=self.RATE,
-            input=True,
-            frames_per_buffer=self.CHUNK
-        )
+        source = self.audio_source
+        source.open()
         
         print("Говорите 'Аркадий' чтобы активировать...")
         
+        deaf = False
         try:
             while self.is_listening:
-                data = stream.read(self.CHUNK, exception_on_overflow=False)
+                self._stream_time = source.audio_seconds
+                data = source.read(self.CHUNK)
+                if not data:
+                    print("Источник аудио закончился")
+                    break
                 
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '').lower().strip()
-                    
-                    if text:
-                        print(f"Услышал: {text}")
-                        self.audio_queue.put(text)
+                # Бот говорит: звук читаем (источник не переполняется), но не слушаем
+                if self.muted and not self.command_mode:
+                    deaf = True
+                    continue
+                if deaf:
+                    # Обрывок своей речи не должен склеиться с настоящим "Аркадий"
+                    self.wake_detector.reset()
+                    self.vad.reset()
+                    deaf = False
                 
-                time.sleep(0.01)  # Небольшая пауза
+                was_command = self.command_mode
+                for block in self.vad.process(data):
+                    self._process_block(block)
+                
+                # Блок с ключевым словом не считаем: иначе само слово сойдет за начало
+                # команды и тишина после "Аркадий..." оборвет ее раньше времени.
+                # Звук после слова в этом блоке уже учтен в _start_command
+                if self.command_mode and was_command:
+                    # Тишину считаем по всем блокам, включая отброшенные VAD
+                    reason = self.endpointer.update(len(data) // 2, self.vad.last_voiced)
+                    if reason:
+                        self._finish_command(reason)
                 
         except Exception as e:
             print(f"Ошибка в цикле прослушивания: {e}")
         finally:
-            stream.stop_stream()
-            stream.close()
+            source.close()
+            # Никто не должен зависнуть на future незавершенной команды
+            if self._command_future and not self._command_future.done():
+                self._command_future.set_result(None)
     
-    def wait_for_wake_word(self, timeout=None):
-        """Ждет ключевое слово активации"""
-        start_time = time.time()
+    def _process_block(self, data):
+        """Обработка блока, прошедшего VAD"""
+        if not self.command_mode:
+            # Режим ожидания: только дешевый грамматический распознаватель
+            detection = self.wake_detector.process(data)
+            if detection:
+                self._start_command(detection)
+            return
         
-        while True:
-            if timeout and (time.time() - start_time) > timeout:
-                return None
+        if self.recognizer.AcceptWaveform(data):
+            result = json.loads(self.recognizer.Result())
+            text = result.get('text', '').lower().strip()
             
-            try:
-                text = self.audio_queue.get(timeout=1)
-                
-                # Проверяем на wake word
-                for wake_word in self.wake_words:
-                    if wake_word in text:
-                        print(f"✓ Активация по слову: {wake_word}")
-                        return self._listen_for_command()
-                        
-            except queue.Empty:
-                continue
+            if text:
+                print(f"Услышал: {text}")
+                self._command_parts.append(text)
     
-    def _listen_for_command(self, timeout=5):
-        """Слушает команду после активации"""
-        print("Слушаю команду...")
-        start_time = time.time()
-        command_parts = []
+    def _start_command(self, detection):
+        """Активация: переключаемся на полный распознаватель и отдаем future ждущему"""
+        self.command_mode = True
+        self.recognizer.Reset()
+        self.endpointer.start()
+        self._command_origin = self._stream_time
+        self._activated_at = detection.detected_at
+        self._command_parts = []
+        self._command_future = Future()
         
-        while time.time() - start_time < timeout:
-            try:
-                text = self.audio_queue.get(timeout=1)
-                
-                # Игнорируем повторные wake words
-                if not any(word in text for word in self.wake_words):
-                    command_parts.append(text)
-                    print(f"Команда: {text}")
-                    
-                    # Если пауза больше 2 секунд - команда завершена
-                    pause_start = time.time()
-                    while time.time() - pause_start < 2:
-                        try:
-                            more_text = self.audio_queue.get(timeout=0.5)
-                            if not any(word in more_text for word in self.wake_words):
-                                command_parts.append(more_text)
-                                pause_start = time.time()  # Сбрасываем таймер паузы
-                        except queue.Empty:
-                            break
-                    
-                    break
-                    
-            except queue.Empty:
-                continue
+        # "Аркадий, который час" одним выдохом: начало команды уже прозвучало
+        # вместе с ключевым словом - подаем его из предзаписи детектора
+        if detection.tail_audio:
+            self._process_block(detection.tail_audio)
+            # Для Endpointer команда начинается с конца ключевого слова
+            tail = np.frombuffer(detection.tail_audio, dtype=np.int16)
+            self.endpointer.update(len(tail), self.vad.is_voiced(tail))
+        
+        with self._activation_cond:
+            self._activations.append((detection, self._command_future))
+            self._activation_cond.notify_all()
+    
+    def _finish_command(self, reason):
+        """Конец команды по решению Endpointer"""
+        final = json.loads(self.recognizer.FinalResult()).get('text', '').lower().strip()
+        if final:
+            self._command_parts.append(final)
+        
+        # Игнорируем повторные wake words
+        words = " ".join(self._command_parts).split()
+        while words and words[0] in self.wake_words:
+            words.pop(0)
+        command = " ".join(words)
+        
+        # Времена - в секундах от начала потока
+        speech_end = self.endpointer.speech_end
+        self.last_endpoint = {
+            'reason': reason,
+            'activation': self._command_origin,
+            'speech_end': None if speech_end is None else self._command_origin + speech_end,
+            'endpoint': self._command_origin + self.endpointer.audio_time,
+            'activated_at': self._activated_at,
+            'decided_at': time.perf_counter()
+        }
+        
+        # Назад в режим ожидания wake-word
+        self.command_mode = False
+        self.wake_detector.reset()
+        self.recognizer.Reset()
+        self._command_parts = []
+        self._command_future.set_result(command or None)
+    
+    def wait_for_wake_word(self, timeout=None):
+        """Ждет ключевое слово активации и возвращает команду (или None)"""
+        with self._activation_cond:
+            if not self._activation_cond.wait_for(lambda: self._activations, timeout):
+                return None
+            detection, future = self._activations.popleft()
+        
+        latency_ms = (time.perf_counter() - detection.detected_at) * 1000
+        print(f"✓ Активация по слову: {detection.word} "
+              f"(декод {detection.decode_time * 1000:.1f} мс, доставка {latency_ms:.1f} мс)")
+        print("Слушаю команду...")
         
-        command = " ".join(command_parts).strip()
-        return command if command else None
+        # Future завершит поток прослушивания, когда Endpointer решит что команда кончилась
+        command = future.result()
+        if command:
+            print(f"Команда: {command}")
+        return command
     
     def listen_once(self, timeout=10):
         """Одноразовое прослушивание команды"""
@@ -157,6 +253,16 @@ class SpeechRecognizer:
     def cleanup(self):
         """Очистка ресурсов"""
         self.stop_listening()
+        vad_stats = self.vad.stats()
+        print(f"VAD: пропущено {vad_stats['skipped_fraction'] * 100:.0f}% аудио")
+        # Возвращаем распознаватели в общие пулы
+        if self.recognizer:
+            vosk_models.get_pool(self.model_path, self.RATE).release(self.recognizer)
+            self.recognizer = None
+        if self.wake_detector:
+            wake_pool = vosk_models.get_pool(self.model_path, self.RATE, make_grammar(self.wake_words))
+            wake_pool.release(self.wake_detector.recognizer)
+            self.wake_detector = None
         if self.microphone:
             self.microphone.terminate()
         print("Ресурсы очищены")
\ No newline at end of file
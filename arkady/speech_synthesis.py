@@ -1,39 +1,280 @@
 import asyncio
-import tempfile
-import subprocess
-import edge_tts
+import itertools
+import threading
+from concurrent.futures import Future
+from . import tracing
+from .playback import StreamingPlayer
+from .sentences import split_sentences
+from .tts_cache import CachedSynthesizer, EdgeTTSBackend, cache_key
 
 VOICE_DMITRY = "ru-RU-DmitryNeural"
 RATE_FAST = "+20%"
 VOLUME_NORMAL = "+100%"
 PITCH_LOW = "-38Hz"
 
+_END = object()  # Конец предложения в очереди кусков
+
+
+def edge_volume(level):
+    """Громкость 0..100 из голосовой команды -> громкость edge-tts (-100%..+100%)"""
+    return f"{(level - 50) * 2:+d}%"
+
+
 class TTS:
-    def __init__(self, voice=VOICE_DMITRY, rate=RATE_FAST, volume=VOLUME_NORMAL, pitch=PITCH_LOW):
+    def __init__(self, voice=VOICE_DMITRY, rate=RATE_FAST, volume=VOLUME_NORMAL, pitch=PITCH_LOW,
+                 synthesizer=None, backend=None, player=None, concurrency=3, lookahead=4):
         self.voice = voice
         self.rate = rate
         self.volume = volume
         self.pitch = pitch
+        # CachedSynthesizer: повторяющиеся фразы берутся с диска без синтеза
+        self.synthesizer = synthesizer
+        self.backend = synthesizer.backend if synthesizer else (backend or EdgeTTSBackend())
+        # Звук играется по мере синтеза в постоянно открытый выход (по умолчанию - динамики)
+        self.player = player or StreamingPlayer()
+        # Длинный текст: сколько предложений синтезируется сразу и насколько вперед
+        self.concurrency = concurrency
+        self.lookahead = lookahead
     
     def text2speech(self, text):
-        asyncio.run(self._speak(text))
+        asyncio.run(self.play(text))
+    
+    def presynthesize(self, phrases):
+        """Заранее синтезирует постоянные фразы текущим голосом"""
+        if not self.synthesizer:
+            return 0
+        return asyncio.run(self.synthesizer.presynthesize(phrases, self.voice, self.rate, self.volume, self.pitch))
+    
+    def chunks(self, text):
+        """Куски звука фразы: через кэш, если он есть"""
+        source = self.synthesizer or self.backend
+        return source.stream(text, self.voice, self.rate, self.volume, self.pitch)
     
-    async def _speak(self, text):
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp:
-            temp_path = tmp.name
+    async def play(self, text):
+        """Синтез и проигрывание фразы; результат - StreamingPlayer.play()"""
+        return await self._play_chunks(self.chunks(text))
+    
+    async def play_text(self, text):
+        """
+        Текст из нескольких предложений: они синтезируются параллельно (не
+        больше concurrency сразу и не дальше lookahead от играющего) и
+        играются строго по порядку одним потоком, без пауз между ними.
+        Первое предложение звучит, не дожидаясь остальных. Заготовленная
+        целиком фраза (HELP_TEXT) играется из кэша одним куском.
+        """
+        sentences = split_sentences(text)
+        if len(sentences) < 2 or self._cached(text):
+            return await self.play(text)
+        
+        queues = [asyncio.Queue() for _ in sentences]
+        window = asyncio.Semaphore(self.lookahead)  # Синтезировано, но не сыграно
+        limit = asyncio.Semaphore(self.concurrency)
+        
+        async def fetch(sentence, queue):
+            await window.acquire()
+            try:
+                async with limit:
+                    async for chunk in self.chunks(sentence):
+                        queue.put_nowait(chunk)
+            except Exception as e:
+                queue.put_nowait(e)
+            queue.put_nowait(_END)
         
-        communicate = edge_tts.Communicate(text, self.voice, rate=self.rate, volume=self.volume, pitch=self.pitch)
-        await communicate.save(temp_path)
+        async def ordered():
+            for queue in queues:
+                while (chunk := await queue.get()) is not _END:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield chunk
+                window.release()
         
-        subprocess.run([
-            'powershell', '-WindowStyle', 'Hidden', '-Command',
-            f'''Add-Type -Name WinMM -Namespace Win32 -MemberDefinition '[DllImport("winmm.dll")] public static extern int mciSendString(string command, System.Text.StringBuilder buffer, int bufferSize, IntPtr hwndCallback);';
-            [Win32.WinMM]::mciSendString("open `"{temp_path}`" type mpegvideo alias media", $null, 0, 0);
-            [Win32.WinMM]::mciSendString("play media wait", $null, 0, 0);
-            [Win32.WinMM]::mciSendString("close media", $null, 0, 0);
-            Remove-Item "{temp_path}" -Force;'''
-        ], check=False, creationflags=subprocess.CREATE_NO_WINDOW)
+        fetching = asyncio.gather(*(fetch(s, q) for s, q in zip(sentences, queues)))
+        try:
+            return await self._play_chunks(ordered())
+        finally:
+            # Оборвали или ошибка - недосинтезированное больше не нужно
+            fetching.cancel()
+            await asyncio.gather(fetching, return_exceptions=True)
+    
+    def _cached(self, text):
+        """Есть ли фраза целиком в кэше синтеза"""
+        if not self.synthesizer:
+            return False
+        return cache_key(text, self.voice, self.rate, self.volume, self.pitch) in self.synthesizer.cache
+    
+    async def _play_chunks(self, chunks):
+        result = await self.player.play(
+            chunks,
+            fmt=self.backend.format,
+            on_first_sample=lambda: tracing.mark(tracing.TTS_FIRST_AUDIO)
+        )
+        tracing.mark(tracing.PLAYBACK_DONE)
+        return result
+    
+    def cancel(self):
+        """Обрывает текущую фразу"""
+        self.player.cancel()
+    
+    def close(self):
+        self.player.close()
+
+PRIORITY_URGENT = 0   # Перебивает все, что ниже
+PRIORITY_NORMAL = 1   # Ответы
+PRIORITY_LOW = 2      # Напоминания и прочее фоновое
+
+_CANCELLED = {'first_sample': None, 'audio_seconds': 0.0, 'cancelled': True}
+
+
+class Utterance:
+    """Фраза в очереди голоса"""
+
+    def __init__(self, text, priority, seq, trace):
+        self.text = text
+        self.priority = priority
+        self.seq = seq
+        self.trace = trace          # Ход, в котором фразу заказали - для меток
+        self.future = Future()
+        self.task = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class HoboVoiceSynthesizer:
+    """
+    Голос Аркадия: служба с собственным потоком и одним долгоживущим event
+    loop, где идут синтез и проигрывание. Фразы играются по очереди в
+    порядке (приоритет, поступление); speak() возвращает Future сразу,
+    speak_sync() ждет конца фразы. Фраза с более срочным приоритетом
+    обрывает текущую, cancel_all() - все сразу. Методы можно звать из
+    любого потока.
+    """
+
+    def __init__(self, tts=None):
+        self.tts = tts or TTS(synthesizer=CachedSynthesizer())
+        self._seq = itertools.count()
+        self._current = None
+
+        # Статистика
+        self.spoken = 0
+        self.interrupted = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="arkady-voice", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    @property
+    def volume(self):
+        return self.tts.volume
+
+    @volume.setter
+    def volume(self, value):
+        self.tts.volume = value
+
+    @property
+    def synthesizer(self):
+        return self.tts.synthesizer
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.PriorityQueue()
+        self._worker = self._loop.create_task(self._work())
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+
+    def speak(self, text, priority=PRIORITY_NORMAL):
+        """Ставит фразу в очередь; Future с результатом проигрывания"""
+        if self._loop.is_closed():
+            raise RuntimeError("Голос уже отключен")
+        utterance = Utterance(text, priority, next(self._seq), tracing.current_turn())
+        self._loop.call_soon_threadsafe(self._enqueue, utterance)
+        return utterance.future
+
+    def speak_sync(self, text, priority=PRIORITY_NORMAL, timeout=None):
+        """Говорит фразу и ждет, пока она доиграет или ее оборвут"""
+        return self.speak(text, priority).result(timeout)
+
+    def cancel_all(self):
+        """Обрывает текущую фразу и выбрасывает очередь"""
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._cancel_all)
+
+    def presynthesize(self, phrases):
+        """Заготовка фраз текущим голосом - в том же loop, что и проигрывание (блокирующий)"""
+        if not self.synthesizer:
+            return 0
+        tts = self.tts
+        coro = self.synthesizer.presynthesize(phrases, tts.voice, tts.rate, tts.volume, tts.pitch)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    # Дальше - только в потоке голоса
+
+    def _enqueue(self, utterance):
+        current = self._current
+        if current is not None and utterance.priority < current.priority:
+            self._interrupt(current)
+        self._queue.put_nowait(utterance)
+
+    def _interrupt(self, utterance):
+        if utterance.task and not utterance.task.done():
+            self.tts.cancel()
+            utterance.task.cancel()
+
+    def _cancel_all(self):
+        while not self._queue.empty():
+            self._resolve(self._queue.get_nowait(), _CANCELLED)
+        if self._current is not None:
+            self._interrupt(self._current)
+
+    def _resolve(self, utterance, result):
+        if not utterance.future.done():
+            utterance.future.set_result(dict(result))
+
+    async def _work(self):
+        while True:
+            utterance = await self._queue.get()
+            if utterance.future.done():
+                continue
+            self._current = utterance
+            # Задача копирует контекст: метки синтеза попадут в ход, заказавший фразу
+            utterance.task = tracing.run_in_turn(utterance.trace, asyncio.create_task, self.tts.play_text(utterance.text))
+            try:
+                await asyncio.wait({utterance.task})
+            finally:
+                self._current = None
+            task = utterance.task
+            if not task.cancelled() and task.exception() is not None:
+                print(f"❌ Ошибка синтеза речи: {task.exception()}")
+                utterance.future.set_exception(task.exception())
+            elif task.cancelled() or task.result()['cancelled']:
+                self.interrupted += 1
+                self._resolve(utterance, _CANCELLED)
+            else:
+                self.spoken += 1
+                self._resolve(utterance, task.result())
+
+    async def _shutdown(self):
+        self._cancel_all()
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+
+    def stats(self):
+        return {'spoken': self.spoken, 'interrupted': self.interrupted, **self.tts.player.stats()}
+
+    def cleanup(self):
+        """Останавливает поток голоса и закрывает выход звука"""
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self.tts.close()
+
 
 if __name__ == "__main__":
-    tts = TTS()
-    tts.text2speech("Тупорылое уёбище я сосала двум неграм?")
\ No newline at end of file
+    voice = HoboVoiceSynthesizer()
+    voice.speak_sync("Тупорылое уёбище я сосала двум неграм?")
+    voice.cleanup()
@@ -0,0 +1,210 @@
+"""
+Правила стиля Аркадия из файла: замены слов - поиском str.find с
+проверкой границ слова (только если в тексте есть хоть одно слово замены),
+вставки жаргона, паразитов и матов - срезами по готовым позициям.
+
+Файл (JSON, по умолчанию style_rules.json рядом с модулем, или
+ARKADY_STYLE_RULES):
+    replace  - слово -> замена ("" - убрать вместе с запятой/пробелом после,
+               следующее слово в начале предложения станет с большой буквы);
+               целые слова точно как в файле, регистр важен ("хорошо поёт" не трогаем)
+    jargon   - {probability, phrases}: обращение в конце ("..., браток.")
+    filler   - {probability, phrases}: паразит в начале ("ну, ...")
+
+Один общий шаблон re здесь был бы медленнее: без общего начала слов он
+проверяет каждую позицию текста, а str.find по слову - быстрый поиск
+на C, и слов замен всего несколько.
+
+Файл перечитывается на ходу, если изменился (проверка mtime не чаще
+check_interval), без перезапуска. Битый файл - предупреждение, правила
+остаются прежними.
+"""
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "style_rules.json")
+
+
+_TAIL = ".!?… \t\n"  # Финальная пунктуация: вставка в конец идет перед ней
+
+
+def _sentence_start(text, index):
+    """Стоит ли text[index] в начале предложения"""
+    while index > 0 and text[index - 1].isspace():
+        index -= 1
+    return index == 0 or text[index - 1] in ".!?…"
+
+
+def _capitalize(text):
+    return text[:1].upper() + text[1:]
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _skip_spaces(text, index):
+    while index < len(text) and text[index].isspace():
+        index += 1
+    return index
+
+
+def _drop_end(text, end):
+    """Конец убираемого слова вместе с запятой ("Пожалуйста, ...") или "!" перед следующим словом"""
+    if text.startswith(",", end):
+        return _skip_spaces(text, end + 1)
+    if text.startswith("!", end):
+        after = _skip_spaces(text, end + 1)
+        if end + 1 < after < len(text):
+            return after
+    return _skip_spaces(text, end)
+
+
+def _find_words(text, words):
+    """Вхождения целых слов по порядку; с одного места - сначала длинное"""
+    found = []
+    for word in words:
+        start = text.find(word)
+        while start != -1:
+            end = start + len(word)
+            if not (start and _is_word_char(text[start - 1])) and not (end < len(text) and _is_word_char(text[end])):
+                found.append((start, -len(word), word))
+            start = text.find(word, end)
+    found.sort()
+    return found
+
+
+def _replace(words, replacements, text):
+    """Замены слов; после убранного первого слова предложения - большая буква"""
+    parts = []
+    pos = 0
+    capital = False
+    for start, _, word in _find_words(text, words):
+        if start < pos:
+            continue  # Внутри уже замененного более длинного слова
+        piece = text[pos:start]
+        if capital and piece:
+            piece, capital = _capitalize(piece), False
+        parts.append(piece)
+        replacement = replacements[word]
+        pos = start + len(word)
+        if replacement:
+            parts.append(_capitalize(replacement) if capital else replacement)
+            capital = False
+        else:
+            capital = capital or _sentence_start(text, start)
+            pos = _drop_end(text, pos)
+    tail = text[pos:]
+    parts.append(_capitalize(tail) if capital else tail)
+    return "".join(parts)
+
+
+class StyleRules:
+    """
+    Правила, готовые к применению. Большинство ответов не содержит ни одного
+    слова замены, поэтому сначала идет быстрая проверка "слово in текст", и
+    только потом поиск вхождений с границами слов.
+    """
+
+    def __init__(self, path=None, check_interval=1.0, config=None):
+        """config - правила словарем, без файла и без перечитывания"""
+        self.path = None if config is not None else (
+            path or os.environ.get('ARKADY_STYLE_RULES') or DEFAULT_RULES_PATH)
+        self.check_interval = check_interval
+        self._mtime = None
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+        self.reloads = 0
+        if config is not None:
+            self._set_rules(config)
+        else:
+            self.load()
+
+    def load(self):
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        self._set_rules(config)
+        self._mtime = mtime
+
+    def _set_rules(self, config):
+        replacements = dict(config.get('replace', {}))
+        words = tuple(sorted(replacements, key=len, reverse=True))
+
+        # Подмена одним присваиванием - apply() в других потоках видит целый набор
+        self._replace_rules = (words, replacements)
+        self.replacements = replacements
+        self.jargon = dict(config.get('jargon', {'probability': 0.0, 'phrases': []}))
+        self.filler = dict(config.get('filler', {'probability': 0.0, 'phrases': []}))
+
+    def maybe_reload(self):
+        """Перечитывает файл, если он изменился; True - правила обновлены"""
+        if self.path is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime == self._mtime:
+                    return False
+                self._mtime = mtime  # Битый файл - одно предупреждение до следующей правки
+                self.load()
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Правила стиля не перечитаны ({e}), оставляю прежние")
+                return False
+            self.reloads += 1
+            print(f"🔁 Правила стиля обновлены: {self.path}")
+            return True
+
+    def apply(self, text, prefix="", suffix="", infix="", infix_at=0):
+        """
+        Замены - проверка "слово in текст" по каждому слову, при находке -
+        поиск вхождений str.find с проверкой границ слова; вставки - срезами:
+            prefix   - в начало ("ну, " - первая буква станет строчной)
+            suffix   - перед финальной пунктуацией (", браток")
+            infix    - слово в первый пробел между словами не раньше символа
+                       infix_at (нет такого - перед финальной пунктуацией)
+        """
+        self.maybe_reload()
+        words, replacements = self._replace_rules
+        for word in words:
+            if word in text:
+                text = _replace(words, replacements, text)
+                break
+        if not text.strip():
+            return text
+
+        if infix:
+            gap = text.find(" ", max(infix_at, 1))
+            if gap != -1 and text[gap + 1:].strip(_TAIL):
+                text = f"{text[:gap]} {infix}{text[gap:]}"
+            else:
+                suffix = ", " + infix + suffix
+        if suffix:
+            body = text.rstrip(_TAIL)
+            text = body + suffix + text[len(body):]
+        if prefix:
+            # "ну, ладно" - но аббревиатуры ("МКАД") не трогаем
+            head = text[:1] if text[1:2].isupper() else text[:1].lower()
+            text = prefix + head + text[1:]
+        return text
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_rules(path=None):
+    """Общие правила на файл: личности всех сессий делят одну компиляцию"""
+    path = path or os.environ.get('ARKADY_STYLE_RULES') or DEFAULT_RULES_PATH
+    with _shared_lock:
+        rules = _shared.get(path)
+        if rules is None:
+            rules = _shared[path] = StyleRules(path)
+        return rules
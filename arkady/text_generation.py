@@ -1,28 +1,93 @@
 import requests
 import json
 import random
+import threading
+import time
 from .personality import ArkadyPersonality
+from . import tracing
+from .sentences import SentenceSplitter, split_sentences
+from .ollama_client import get_client, DEFAULT_KEEP_ALIVE
+from .memory import ConversationMemory
+from .intents import LocalCommands, default_router
 
 class ArkadyAI:
-    def __init__(self, model_name="llama3.2:1b", ollama_url="http://localhost:11434", swear_intensity='medium'):
+    def __init__(self, model_name="llama3.2:1b", ollama_url="http://localhost:11434", swear_intensity='medium',
+                 keep_alive=DEFAULT_KEEP_ALIVE, warm_up=True, use_context=True, max_context_tokens=2048,
+                 cache=None, memory_tokens=400, summarize_with_llm=False, connect=True, llm_router=None,
+                 conversation_timeout=None):
         self.model_name = model_name
         self.ollama_url = ollama_url
+        # Общий пул keep-alive соединений; keep_alive - сколько Ollama держит модель в памяти
+        self.client = get_client(ollama_url)
+        self.keep_alive = keep_alive
         self.personality = ArkadyPersonality(swear_intensity=swear_intensity)
-        self.conversation_history = []
-        self.max_history = 5  # Храним последние 5 сообщений
+        # Память с бюджетом токенов: старые обмены сжимаются в сводку в фоне
+        self.memory = ConversationMemory(
+            token_budget=memory_tokens,
+            summarizer=self._summarize_with_llm if summarize_with_llm else None
+        )
         
-        # Проверяем соединение
-        self.check_ollama_connection()
+        # Несколько бэкендов с хеджированием (LLMRouter); без него - один Ollama
+        self.llm_router = llm_router
+        
+        # Токены диалога из прошлого ответа Ollama: с ними модель не
+        # пересчитывает системный промпт и историю, только новую реплику.
+        # context привязан к одной модели - с маршрутизатором не используется
+        self.use_context = use_context and llm_router is None
+        self.max_context_tokens = max_context_tokens
+        self.context = None
+        self.last_stats = {}  # prompt_eval_count и др. последнего ответа
+        
+        # Кэш сырых ответов на повторяющиеся вопросы (ResponseCache)
+        self.cache = cache
+        
+        # Киоск: после conversation_timeout секунд тишины говорит уже другой
+        # человек - история сбрасывается, и его вопросы снова идут в кэш
+        self.conversation_timeout = conversation_timeout
+        self._last_turn = None
+        
+        # Локальные команды (время, громкость, повтор...) - без похода в LLM
+        self.commands = LocalCommands()
+        self.router = default_router(self.commands)
+        
+        # Проверка Ollama и прогрев; connect=False - вызовите connect() сами
+        # (например, в фоне, пока бот уже слушает)
+        self.warm_up_on_connect = warm_up
+        self.ready = threading.Event()
+        self.connect_error = None
+        self.fallbacks = 0  # Сколько раз отвечали заготовкой вместо модели
+        if connect:
+            self.connect()
+    
+    def connect(self):
+        """Проверяет соединение и прогревает модель; ready выставляется в любом случае"""
+        try:
+            if self.llm_router:
+                # Бэкенды проверяются боем: упавший отдыхает, запрос уходит следующему
+                names = ", ".join(backend.name for backend in self.llm_router.backends)
+                print(f"✓ Бэкенды LLM: {names}")
+                return
+            
+            self.check_ollama_connection()
+            
+            # Загружаем модель заранее, чтобы первый вопрос не ждал холодного старта
+            if self.warm_up_on_connect:
+                self.warm_up()
+        except Exception as e:
+            self.connect_error = e
+            raise
+        finally:
+            self.ready.set()
     
     def check_ollama_connection(self):
         """Проверяет подключение к Ollama"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/version", timeout=5)
+            response = self.client.get("/api/version")
             if response.status_code == 200:
                 print("✓ Подключение к Ollama установлено")
                 
                 # Проверяем наличие модели
-                models_response = requests.get(f"{self.ollama_url}/api/tags")
+                models_response = self.client.get("/api/tags")
                 if models_response.status_code == 200:
                     models = models_response.json().get('models', [])
                     model_names = [m['name'] for m in models]
@@ -36,6 +101,7 @@ class ArkadyAI:
                         # Используем первую доступную модель
                         if model_names:
                             self.model_name = model_names[0]
+                            self.context = None
                             print(f"Использую модель: {self.model_name}")
                         else:
                             raise Exception("Нет доступных моделей в Ollama")
@@ -48,121 +114,311 @@ class ArkadyAI:
             print("Убедитесь что Ollama запущен: ollama serve")
             raise
     
+    def warm_up(self):
+        """Прогрев модели пустым запросом; ошибка прогрева не критична"""
+        try:
+            elapsed = self.client.warm_up(self.model_name, keep_alive=self.keep_alive)
+            print(f"✓ Модель {self.model_name} загружена за {elapsed:.1f}с (keep_alive={self.keep_alive})")
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Не удалось прогреть модель: {e}")
+    
     def generate_response(self, user_input):
         """Генерирует ответ в стиле Аркадия"""
+        self._maybe_new_conversation()
+        # Решаем до запроса: ответ обновит context и историю
+        cacheable = self.cacheable()
+        cached = self._cached_answer(user_input) if cacheable else None
+        if cached:
+            processed_response = self.personality.process_response(cached)
+            self._add_to_history(user_input, processed_response)
+            return processed_response
+        
         try:
-            # Подготавливаем промпт
-            prompt = self._build_prompt(user_input)
+            started = time.perf_counter()
+            tracing.mark(tracing.LLM_REQUEST_SENT)
+            
+            if self.llm_router:
+                # Маршрутизатор всегда стримит - собираем ответ целиком
+                ai_response = "".join(chunk.get('response', '') for chunk in self._stream_chunks(user_input))
+                tracing.mark(tracing.LLM_FIRST_TOKEN)
+                tracing.mark(tracing.LLM_DONE)
+                return self._finish_response(user_input, ai_response.strip(), started, cacheable)
             
             # Запрос к Ollama
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.8,  # Добавляем вариативности
-                        "top_p": 0.9,
-                        "num_predict": 100,  # Ограничиваем длину ответа
-                        "stop": ["\n\n", "Пользователь:", "User:"]
-                    }
-                },
-                timeout=60  # Увеличиваем таймаут до 60 секунд
-            )
+            response = self._post_generate(user_input, stream=False)
+            
+            # Без стриминга первый токен приходит вместе со всем ответом
+            tracing.mark(tracing.LLM_FIRST_TOKEN)
+            tracing.mark(tracing.LLM_DONE)
             
             if response.status_code == 200:
                 result = response.json()
-                ai_response = result.get('response', '').strip()
-                
-                if ai_response:
-                    # Обрабатываем ответ через личность
-                    processed_response = self.personality.process_response(ai_response)
-                    
-                    # Добавляем в историю
-                    self._add_to_history(user_input, processed_response)
-                    
-                    return processed_response
-                else:
-                    return self._get_fallback_response()
-                    
+                self._update_context(result)
+                return self._finish_response(user_input, result.get('response', '').strip(), started, cacheable)
             else:
                 print(f"Ошибка Ollama API: {response.status_code}")
                 return self._get_fallback_response()
                 
         except Exception as e:
             print(f"Ошибка генерации ответа: {e}")
+            self.context = None
+            return self._get_fallback_response()
+    
+    def _finish_response(self, user_input, ai_response, started, cacheable=False):
+        """Кэш, личность и история для готового ответа модели"""
+        if not ai_response:
             return self._get_fallback_response()
+        
+        if cacheable:
+            self._cache_answer(user_input, ai_response, started)
+        
+        # Обрабатываем ответ через личность
+        processed_response = self.personality.process_response(ai_response)
+        
+        # Добавляем в историю
+        self._add_to_history(user_input, processed_response)
+        
+        return processed_response
+    
+    def generate_response_stream(self, user_input):
+        """
+        Потоковая генерация: читает NDJSON-поток Ollama и отдает ответ
+        по предложениям, пока модель еще дописывает следующие.
+        """
+        splitter = SentenceSplitter()
+        spoken = []
+        
+        self._maybe_new_conversation()
+        cacheable = self.cacheable()
+        cached = self._cached_answer(user_input) if cacheable else None
+        if cached:
+            for sentence in split_sentences(cached):
+                processed = self.personality.process_sentence(sentence, first=not spoken)
+                spoken.append(processed)
+                yield processed
+            self._add_to_history(user_input, " ".join(spoken))
+            return
+        
+        raw = []
+        completed = False
+        try:
+            started = time.perf_counter()
+            tracing.mark(tracing.LLM_REQUEST_SENT)
+            for chunk in self._stream_chunks(user_input):
+                token = chunk.get('response', '')
+                if token:
+                    tracing.mark(tracing.LLM_FIRST_TOKEN)
+                    raw.append(token)
+                
+                for sentence in splitter.feed(token):
+                    processed = self.personality.process_sentence(sentence, first=not spoken)
+                    spoken.append(processed)
+                    yield processed
+                
+                # Не прерываем цикл: дочитанный поток возвращает соединение в пул
+                if chunk.get('done'):
+                    self._update_context(chunk)
+                    completed = True
+            
+            tracing.mark(tracing.LLM_DONE)
+            for sentence in splitter.flush():
+                processed = self.personality.process_sentence(sentence, first=not spoken)
+                spoken.append(processed)
+                yield processed
+            
+        except Exception as e:
+            print(f"Ошибка генерации ответа: {e}")
+            self.context = None
+            completed = False
+        
+        if completed and cacheable:
+            self._cache_answer(user_input, "".join(raw).strip(), started)
+        
+        if spoken:
+            self._add_to_history(user_input, " ".join(spoken))
+        else:
+            yield self._get_fallback_response()
+    
+    def _stream_chunks(self, user_input):
+        """Чанки ответа {'response', 'done'}: через маршрутизатор бэкендов или напрямую из Ollama"""
+        if self.llm_router:
+            tier = self.llm_router.classify(user_input)
+            yield from self.llm_router.stream(self._build_prompt(user_input), self._generate_options(), tier)
+            return
+        
+        with self._post_generate(user_input, stream=True) as response:
+            if response.status_code != 200:
+                print(f"Ошибка Ollama API: {response.status_code}")
+                return
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    
+    def cacheable(self):
+        """
+        Кэш - только для вопросов без предыстории: ответ на "а почему?"
+        зависит от разговора и другому собеседнику не подходит
+        """
+        return bool(self.cache) and self.context is None and not len(self.memory) and not self.memory.summary
+    
+    def _maybe_new_conversation(self):
+        """Долгая тишина - новый собеседник: чужая история ему ни к чему"""
+        if self.conversation_timeout is None or self._last_turn is None:
+            return
+        if time.monotonic() - self._last_turn < self.conversation_timeout:
+            return
+        if len(self.memory) or self.memory.summary or self.context is not None:
+            self.memory.clear()
+            self.context = None
+            print("🆕 Новый собеседник - история разговора сброшена")
+    
+    def _cache_answer(self, user_input, ai_response, started):
+        """Запоминает ответ; ошибка кэша (диск) не должна стоить готового ответа"""
+        try:
+            self.cache.put(user_input, ai_response, time.perf_counter() - started)
+        except Exception as e:
+            print(f"⚠️  Не удалось сохранить ответ в кэш: {e}")
+    
+    def _cached_answer(self, user_input):
+        """
+        Сырой ответ из кэша. Модель этот обмен не видела, поэтому context
+        сбрасываем - следующий ход соберется из истории.
+        """
+        if not self.cache:
+            return None
+        cached = self.cache.get(user_input)
+        if cached:
+            tracing.mark(tracing.LLM_REQUEST_SENT)
+            tracing.mark(tracing.LLM_FIRST_TOKEN)
+            tracing.mark(tracing.LLM_DONE)
+            self.context = None
+        return cached
+    
+    def _post_generate(self, user_input, stream):
+        """
+        POST /api/generate. С сохраненным context отправляется только новая
+        реплика; если Ollama context отверг - сбрасываем его и повторяем
+        с полным промптом из истории.
+        """
+        # Первый вопрос мог прийти раньше, чем фоновая проверка выбрала модель
+        self.ready.wait(timeout=60)
+        payload = self._turn_payload(user_input, stream)
+        response = self.client.post("/api/generate", payload, stream=stream,
+                                    timeout=60)  # Увеличиваем таймаут до 60 секунд
+        if response.status_code != 200 and 'context' in payload:
+            print(f"⚠️  Контекст Ollama отвергнут ({response.status_code}), собираю промпт заново")
+            response.close()
+            self.context = None
+            response = self.client.post("/api/generate", self._turn_payload(user_input, stream),
+                                        stream=stream, timeout=60)
+        return response
+    
+    def _turn_payload(self, user_input, stream):
+        """Тело запроса хода: новая реплика поверх context или полный промпт"""
+        if self.use_context and self.context:
+            payload = self._generate_payload(self._turn_prompt(user_input), stream)
+            payload["context"] = self.context
+            return payload
+        return self._generate_payload(self._build_prompt(user_input), stream)
+    
+    def _update_context(self, result):
+        """Запоминает context из финального ответа Ollama"""
+        self.last_stats = {
+            key: result[key] for key in ('prompt_eval_count', 'eval_count', 'total_duration') if key in result
+        }
+        if not self.use_context:
+            return
+        context = result.get('context')
+        if context and len(context) <= self.max_context_tokens:
+            self.context = context
+        else:
+            # Диалог перерос окно - следующий ход соберем из истории заново
+            self.context = None
+    
+    def _generate_payload(self, prompt, stream):
+        """Тело запроса /api/generate"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self._generate_options()
+        }
+    
+    def _generate_options(self):
+        """Параметры генерации (общие для всех бэкендов)"""
+        return {
+            "temperature": 0.8,  # Добавляем вариативности
+            "top_p": 0.9,
+            "num_predict": 100,  # Ограничиваем длину ответа
+            "stop": ["\n\n", "Пользователь:", "User:"]
+        }
     
     def _build_prompt(self, user_input):
         """Строит промпт для ИИ"""
         # Базовый системный промпт
         prompt = self.personality.system_prompt + "\n\n"
         
-        # Добавляем контекст из истории
-        if self.conversation_history:
-            prompt += "Предыдущий разговор:\n"
-            for entry in self.conversation_history[-3:]:  # Последние 3 обмена
-                prompt += f"Пользователь: {entry['user']}\n"
-                prompt += f"Аркадий: {entry['bot']}\n"
-            prompt += "\n"
+        # Добавляем контекст из памяти: сводка + последние обмены в бюджете
+        prompt += self.memory.render()
         
         # Текущий вопрос
-        prompt += f"Пользователь: {user_input}\n"
-        prompt += "Аркадий:"
+        prompt += self._turn_prompt(user_input)
         
         return prompt
     
+    def _turn_prompt(self, user_input):
+        """Реплика пользователя текущего хода"""
+        return f"Пользователь: {user_input}\nАркадий:"
+    
     def _add_to_history(self, user_input, bot_response):
         """Добавляет обмен в историю"""
-        self.conversation_history.append({
-            'user': user_input,
-            'bot': bot_response
-        })
-        
-        # Ограничиваем размер истории
-        if len(self.conversation_history) > self.max_history:
-            self.conversation_history.pop(0)
+        self.memory.add(user_input, bot_response)
+        self.commands.remember(bot_response)
+        self._last_turn = time.monotonic()
+    
+    def _summarize_with_llm(self, summary, exchanges):
+        """Сжатие вытесненных обменов моделью (вызывается из фонового потока памяти)"""
+        dialog = "\n".join(f"Пользователь: {e['user']}\nАркадий: {e['bot']}" for e in exchanges)
+        prompt = (
+            "Сожми разговор в одно-два коротких предложения: о чем спрашивал пользователь "
+            "и что важного ответили. Без вступлений.\n\n"
+            + (f"Прежняя сводка: {summary}\n\n" if summary else "")
+            + dialog + "\n\nСводка:"
+        )
+        response = self.client.post("/api/generate", {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": 0.2, "num_predict": 60}
+        }, timeout=60)
+        if response.status_code != 200:
+            return None
+        return response.json().get('response', '').strip()
     
     def _get_fallback_response(self):
         """Резервные ответы если ИИ не работает"""
-        fallback_responses = [
-            "Ну вот, не работает у меня башка сегодня, браток",
-            "Слушай, что-то я туплю сейчас",
-            "Давай по-другому спроси, а то не врубаюсь",
-            "Хм, не понял я тебя, дорогуша",
-            "Короче, не допер я, повтори",
-            "Что-то мозги не варят, скажи еще раз"
-        ]
-        return random.choice(fallback_responses)
+        self.fallbacks += 1
+        return random.choice(self.personality.fallback_responses)
     
     def get_greeting(self):
         """Приветствие при запуске"""
         return self.personality.get_greeting()
     
     def handle_special_commands(self, user_input):
-        """Обрабатывает специальные команды"""
-        input_lower = user_input.lower().strip()
-        
-        # Команды выхода
-        if any(word in input_lower for word in ['пока', 'выход', 'стоп', 'хватит', 'всё']):
-            farewell_responses = [
-                "Ну давай, браток, удачи тебе",
-                "Пока-пока, дорогуша",
-                "До встречи, корешок",
-                "Ладно, бывай",
-                "Увидимся еще, мужик"
-            ]
-            return random.choice(farewell_responses), True
-        
-        # Команды справки
-        if any(word in input_lower for word in ['помощь', 'справка', 'что умеешь']):
-            help_response = "Ну я Аркадий, короче. Говори что надо - отвечу как смогу, браток. Чтобы выйти - скажи 'пока'."
-            return help_response, False
-        
-        return None, False
+        """Обрабатывает специальные команды локально, без LLM: (ответ, выход) или (None, False)"""
+        routed = self.router.handle(user_input)
+        if routed is None:
+            return None, False
+        
+        response, intent = routed
+        if intent.name != 'repeat':
+            self.commands.remember(response)
+        return response, intent.terminal
     
     def clear_history(self):
         """Очищает историю разговора"""
-        self.conversation_history = []
+        self.memory.clear()
+        self.context = None
         print("История разговора очищена")
\ No newline at end of file
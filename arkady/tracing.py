@@ -0,0 +1,220 @@
+"""
+Легковесная трассировка хода разговора (turn): отметки на монотонных часах,
+гистограммы p50/p95/p99 и выгрузка в Prometheus text format или JSON.
+
+Выключенный трассировщик отдает NullTurn, у которого mark() ничего не делает,
+так что в проде его можно держать включенным без заметной цены.
+
+Включение: переменная окружения ARKADY_TRACE=1,
+выгрузка при завершении: ARKADY_METRICS=metrics.prom (или .json).
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+# Отметки хода в порядке наступления
+AUDIO_CAPTURED = 'audio_captured'
+ASR_FINAL = 'asr_final'
+LLM_REQUEST_SENT = 'llm_request_sent'
+LLM_FIRST_TOKEN = 'llm_first_token'
+LLM_DONE = 'llm_done'
+TTS_FIRST_AUDIO = 'tts_first_audio'
+PLAYBACK_DONE = 'playback_done'
+
+# Интервалы: имя -> (от какой отметки, до какой)
+SPANS = {
+    'asr': (AUDIO_CAPTURED, ASR_FINAL),
+    'llm_queue': (ASR_FINAL, LLM_REQUEST_SENT),
+    'llm_first_token': (LLM_REQUEST_SENT, LLM_FIRST_TOKEN),
+    'llm_total': (LLM_REQUEST_SENT, LLM_DONE),
+    'tts_first_audio': (LLM_FIRST_TOKEN, TTS_FIRST_AUDIO),
+    'response_latency': (ASR_FINAL, TTS_FIRST_AUDIO),  # Что реально ощущает пользователь
+    'playback': (TTS_FIRST_AUDIO, PLAYBACK_DONE),
+    'turn_total': (AUDIO_CAPTURED, PLAYBACK_DONE),
+}
+
+# Границы корзин гистограммы (сек)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Корзины для Prometheus + ограниченная выборка для точных перцентилей"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, reservoir=2048):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последняя - +Inf
+        self.samples = deque(maxlen=reservoir)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99)
+        }
+
+
+class Turn:
+    """Один ход разговора: отметки времени по perf_counter()"""
+
+    def __init__(self, tracer):
+        self._tracer = tracer
+        self.marks = {}
+
+    def mark(self, name, at=None):
+        """Ставит отметку (первая побеждает - повторный вызов не перетирает)"""
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() if at is None else at
+
+    def spans(self):
+        result = {}
+        for span, (start, end) in SPANS.items():
+            if start in self.marks and end in self.marks:
+                result[span] = self.marks[end] - self.marks[start]
+        return result
+
+    def finish(self):
+        self._tracer.record(self)
+
+    def __enter__(self):
+        self._token = _current_turn.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_turn.reset(self._token)
+        self.finish()
+
+
+class NullTurn:
+    """Заглушка выключенного трассировщика"""
+
+    marks = {}
+
+    def mark(self, name, at=None):
+        pass
+
+    def spans(self):
+        return {}
+
+    def finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+NULL_TURN = NullTurn()
+_current_turn = ContextVar('arkady_turn', default=NULL_TURN)
+
+
+class Tracer:
+    """Сбор ходов и гистограмм по интервалам"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.turns = 0
+        self._lock = threading.Lock()
+
+    def turn(self):
+        """Новый ход; используйте как with tracer.turn() as turn: ..."""
+        if not self.enabled:
+            return NULL_TURN
+        return Turn(self)
+
+    def record(self, turn):
+        spans = turn.spans()
+        with self._lock:
+            self.turns += 1
+            for name, value in spans.items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.observe(value)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'turns': self.turns,
+                'spans': {name: h.summary() for name, h in self.histograms.items()}
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Метрики в Prometheus text exposition format"""
+        lines = [
+            '# HELP arkady_turns_total Number of traced conversation turns',
+            '# TYPE arkady_turns_total counter',
+            f'arkady_turns_total {self.turns}',
+            '# HELP arkady_span_seconds Duration of conversation turn stages',
+            '# TYPE arkady_span_seconds histogram',
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'arkady_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'arkady_span_seconds_bucket{{span="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'arkady_span_seconds_sum{{span="{name}"}} {h.sum}')
+                lines.append(f'arkady_span_seconds_count{{span="{name}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Пишет метрики в файл: .json - JSON, иначе Prometheus text"""
+        content = self.to_json() if path.endswith('.json') else self.to_prometheus()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def report(self):
+        """Короткая сводка в консоль"""
+        for name, stats in self.to_dict()['spans'].items():
+            print(f"  {name:<18} n={stats['count']:<4} p50={stats['p50'] * 1000:.0f} мс "
+                  f"p95={stats['p95'] * 1000:.0f} мс p99={stats['p99'] * 1000:.0f} мс")
+
+
+def mark(name, at=None):
+    """Отметка в текущем ходе (из контекста); без хода - ничего не делает"""
+    _current_turn.get().mark(name, at)
+
+
+def current_turn():
+    return _current_turn.get()
+
+
+def run_in_turn(turn, func, *args):
+    """Вызывает func с turn в роли текущего хода (для потоков и задач, не завершая ход)"""
+    token = _current_turn.set(turn)
+    try:
+        return func(*args)
+    finally:
+        _current_turn.reset(token)
+
+
+# Общий трассировщик процесса
+tracer = Tracer(enabled=os.environ.get('ARKADY_TRACE', '') not in ('', '0'))
@@ -0,0 +1,273 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from .intents import STATIC_PHRASES
+
+# edge_tts импортируется при первом синтезе
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "tts")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def static_phrases(personality):
+    """Все постоянные фразы: заготовки личности и ответы локальных команд"""
+    return list(dict.fromkeys(personality.static_phrases() + STATIC_PHRASES))
+
+
+def cache_key(text, voice, rate, volume, pitch):
+    """Адрес звука: хэш текста и всех параметров голоса"""
+    data = "\x1f".join([text, voice, rate, volume, pitch]).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+class TTSCache:
+    """
+    Кэш синтезированных фраз на диске: файл <ключ>.mp3 на фразу.
+
+    Индекс (ключ -> размер) держится в памяти в порядке LRU и при запуске
+    восстанавливается из каталога по времени изменения файлов; попадание
+    обновляет mtime, так что порядок переживает перезапуск. Сверх max_bytes
+    удаляются самые давно звучавшие фразы.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, suffix=".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.stored = 0
+        self.synth_seconds = 0.0     # Потрачено на синтез сохраненных фраз
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+        self._evict()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Путь к файлу фразы или None"""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Файл удалили снаружи - забываем
+            with self._lock:
+                self._bytes -= self._index.pop(key, 0)
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return path
+
+    def put(self, key, data, synth_seconds=0.0):
+        """Сохраняет звук атомарно (через временный файл) и возвращает путь"""
+        path = self.path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.stored += 1
+            self.synth_seconds += synth_seconds
+            self._evict()
+        return path
+
+    def _evict(self):
+        # Последнюю записанную фразу не трогаем, даже если она одна больше лимита
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evicted += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._index
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._bytes = 0
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._index),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evicted': self.evicted,
+                'stored': self.stored,
+                'synth_seconds': self.synth_seconds,
+                # Оценка: каждое попадание сэкономило средний синтез
+                'saved_seconds': self.hits * self.synth_seconds / self.stored if self.stored else 0.0
+            }
+
+
+class EdgeTTSBackend:
+    """Синтез через edge-tts: MP3 кусками по мере синтеза"""
+
+    format = 'mp3'
+
+    async def stream(self, text, voice, rate, volume, pitch):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume, pitch=pitch)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    async def synthesize(self, text, voice, rate, volume, pitch):
+        audio = bytearray()
+        async for data in self.stream(text, voice, rate, volume, pitch):
+            audio += data
+        return bytes(audio)
+
+
+class StubTTSBackend:
+    """
+    Заглушка синтеза для бенчмарков и проверок без сети и звуковой карты.
+    Первый кусок приходит через delay, весь синтез занимает delay + per_char
+    на символ; звук - тихий тон PCM (seconds_per_char на символ), свой для
+    каждого ключа. blob=True - весь звук одним куском в конце синтеза.
+    """
+
+    format = 'pcm'
+
+    def __init__(self, delay=0.2, per_char=0.002, seconds_per_char=0.065, sample_rate=24000, chunk_seconds=0.1,
+                 blob=False):
+        self.delay = delay
+        self.blob = blob
+        self.per_char = per_char
+        self.seconds_per_char = seconds_per_char
+        self.sample_rate = sample_rate
+        self.chunk_seconds = chunk_seconds
+        self.calls = 0
+
+    def _audio(self, text, voice, rate, volume, pitch):
+        key = cache_key(text, voice, rate, volume, pitch)
+        frequency = 200 + int(key[:4], 16) % 400
+        samples = max(int(len(text) * self.seconds_per_char * self.sample_rate), 1)
+        t = np.arange(samples) / self.sample_rate
+        return (np.sin(2 * np.pi * frequency * t) * 3000).astype(np.int16).tobytes()
+
+    async def stream(self, text, voice, rate, volume, pitch):
+        self.calls += 1
+        audio = self._audio(text, voice, rate, volume, pitch)
+        step = int(self.chunk_seconds * self.sample_rate) * 2
+        chunks = [audio[i:i + step] for i in range(0, len(audio), step)]
+        await asyncio.sleep(self.delay)
+        if self.blob:
+            await asyncio.sleep(self.per_char * len(text))
+            yield audio
+            return
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(self.per_char * len(text) / len(chunks))
+
+    async def synthesize(self, text, voice, rate, volume, pitch):
+        audio = bytearray()
+        async for data in self.stream(text, voice, rate, volume, pitch):
+            audio += data
+        return bytes(audio)
+
+
+class CachedSynthesizer:
+    """Синтез фраз в файлы: из кэша, если фраза уже звучала с тем же голосом"""
+
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or EdgeTTSBackend()
+        self.cache = cache if cache is not None else TTSCache()
+
+    async def synthesize(self, text, voice, rate, volume, pitch):
+        """Путь к MP3 фразы (файл принадлежит кэшу - не удалять)"""
+        key = cache_key(text, voice, rate, volume, pitch)
+        path = self.cache.get(key)
+        if path is not None:
+            return path
+        started = time.perf_counter()
+        data = await self.backend.synthesize(text, voice, rate, volume, pitch)
+        return self.cache.put(key, data, time.perf_counter() - started)
+
+    async def stream(self, text, voice, rate, volume, pitch, chunk_size=16384):
+        """
+        Звук фразы кусками: из кэша - сразу с диска, иначе прямо из синтеза
+        (и по окончании - в кэш). Формат кусков - self.backend.format.
+        """
+        key = cache_key(text, voice, rate, volume, pitch)
+        path = self.cache.get(key)
+        if path is not None:
+            with open(path, 'rb') as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        return
+                    yield data
+
+        started = time.perf_counter()
+        audio = bytearray()
+        async for data in self.backend.stream(text, voice, rate, volume, pitch):
+            audio += data
+            yield data
+        # Сюда доходим, только если фразу дослушали до конца синтеза
+        self.cache.put(key, bytes(audio), time.perf_counter() - started)
+
+    async def presynthesize(self, phrases, voice, rate, volume, pitch, concurrency=4):
+        """Заранее синтезирует фразы, которых еще нет в кэше; возвращает, сколько синтезировано"""
+        todo = [text for text in dict.fromkeys(phrases)
+                if cache_key(text, voice, rate, volume, pitch) not in self.cache]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(text):
+            async with semaphore:
+                started = time.perf_counter()
+                data = await self.backend.synthesize(text, voice, rate, volume, pitch)
+                self.cache.put(cache_key(text, voice, rate, volume, pitch), data,
+                               time.perf_counter() - started)
+
+        results = await asyncio.gather(*(one(text) for text in todo), return_exceptions=True)
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            print(f"⚠️  Не удалось заготовить {len(failed)} фраз: {failed[0]}")
+        return len(todo) - len(failed)
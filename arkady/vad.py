@@ -0,0 +1,132 @@
+import numpy as np
+from .ring_buffer import PreRollBuffer
+
+
+class VoiceActivityDetector:
+    """
+    Простой VAD на NumPy: энергия + частота переходов через ноль,
+    адаптивный уровень шума, hangover и предзапись перед началом речи.
+
+    process() принимает блок PCM int16 и возвращает список блоков,
+    которые стоит отдать в AcceptWaveform (пустой список - тишина).
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=10, energy_ratio=3.0,
+                 zcr_max=0.35, hangover_ms=800, pre_roll_ms=300,
+                 noise_adapt=0.05, min_noise=1e-6):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.energy_ratio = energy_ratio    # Во сколько раз энергия выше шума
+        self.zcr_max = zcr_max              # Выше - похоже на шипение/шум
+        self.hangover = hangover_ms / 1000  # Сколько держим гейт открытым после речи
+        self.pre_roll = pre_roll_ms / 1000  # Сколько тишины отдаем перед речью
+        self.noise_adapt = noise_adapt
+        self.min_noise = min_noise
+
+        self.noise_floor = None       # Энергия шума (нормированная к [-1, 1])
+        self.is_speech = False        # Гейт открыт
+        self.last_voiced = False      # Была ли речь в последнем блоке
+        self._hangover_left = 0.0
+
+        # Предзапись - свое кольцо сэмплов: входные блоки могут быть
+        # memoryview на чужой буфер, хранить ссылки на них нельзя
+        self._pre_roll = PreRollBuffer(self.pre_roll, sample_rate)
+
+        # Статистика
+        self.total_samples = 0
+        self.passed_samples = 0
+
+    def _frame_features(self, samples):
+        """Векторно считает энергию и ZCR по кадрам блока"""
+        n_frames = len(samples) // self.frame_len
+        if n_frames == 0:
+            frames = samples.reshape(1, -1)
+        else:
+            frames = samples[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+
+        frames = frames.astype(np.float32) * (1.0 / 32768.0)
+        energy = np.mean(frames * frames, axis=1)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return energy, zcr
+
+    def is_voiced(self, samples):
+        """Есть ли речь в блоке (и обновление уровня шума)"""
+        energy, zcr = self._frame_features(samples)
+
+        if self.noise_floor is None:
+            # Первый блок считаем шумом комнаты
+            self.noise_floor = max(float(np.median(energy)), self.min_noise)
+
+        threshold = self.noise_floor * self.energy_ratio
+        # Громкие кадры считаем речью даже с высоким ZCR (шипящие звуки)
+        voiced = (energy > threshold) & ((zcr < self.zcr_max) | (energy > threshold * 4))
+        speech = bool(np.count_nonzero(voiced) >= max(1, len(voiced) // 4))
+
+        # Адаптация уровня шума по кадрам без речи; вниз подстраиваемся быстрее
+        quiet = energy[~voiced]
+        if len(quiet):
+            level = float(np.median(quiet))
+            rate = self.noise_adapt if level > self.noise_floor else self.noise_adapt * 4
+        else:
+            # Сплошная "речь": медленно тянемся к минимуму, чтобы постоянный
+            # новый шум (вентилятор) не держал гейт открытым вечно
+            level = float(np.min(energy))
+            rate = self.noise_adapt * 0.1
+        self.noise_floor = max(self.noise_floor + rate * (level - self.noise_floor), self.min_noise)
+
+        return speech
+
+    def process(self, data):
+        """Гейт: возвращает блоки для распознавателя"""
+        samples = np.frombuffer(data, dtype=np.int16)
+        duration = len(samples) / self.sample_rate
+        self.total_samples += len(samples)
+
+        self.last_voiced = self.is_voiced(samples)
+        if self.last_voiced:
+            self._hangover_left = self.hangover
+            if not self.is_speech:
+                # Начало речи: отдаем накопленную предзапись
+                self.is_speech = True
+                out = [data]
+                pre_roll = self._pre_roll.take()
+                if pre_roll:
+                    out.insert(0, pre_roll)
+                    self.passed_samples += len(pre_roll) // 2
+                self.passed_samples += len(samples)
+                return out
+            self.passed_samples += len(samples)
+            return [data]
+
+        if self.is_speech:
+            # Hangover: хвост тишины нужен Kaldi для конца фразы
+            self._hangover_left -= duration
+            if self._hangover_left > 0:
+                self.passed_samples += len(samples)
+                return [data]
+            self.is_speech = False
+
+        # Тишина: копим предзапись, в распознаватель не отдаем
+        self._pre_roll.append(samples)
+        return []
+
+    def reset(self):
+        """Сброс гейта (уровень шума сохраняется)"""
+        self.is_speech = False
+        self._hangover_left = 0.0
+        self._pre_roll.clear()
+
+    @property
+    def skipped_fraction(self):
+        if not self.total_samples:
+            return 0.0
+        return 1.0 - self.passed_samples / self.total_samples
+
+    def stats(self):
+        return {
+            'total_seconds': self.total_samples / self.sample_rate,
+            'passed_seconds': self.passed_samples / self.sample_rate,
+            'skipped_fraction': self.skipped_fraction,
+            'noise_floor': self.noise_floor
+        }
@@ -0,0 +1,172 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# vosk импортируется при первой загрузке модели: сам модуль нужен и там,
+# где до распознавания дело может не дойти (быстрый старт)
+
+
+class RecognizerPool:
+    """
+    Пул заранее созданных KaldiRecognizer для одной модели.
+    Возвращенные распознаватели сбрасываются через Reset() и переиспользуются.
+    """
+
+    def __init__(self, model, sample_rate=16000, grammar=None, max_idle=4, prealloc=0):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.grammar = grammar
+        self.max_idle = max_idle
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.discarded = 0
+
+        for _ in range(prealloc):
+            self._idle.append(self._create())
+
+    def _create(self):
+        import vosk
+        self.created += 1
+        if self.grammar is not None:
+            return vosk.KaldiRecognizer(self.model, self.sample_rate, self.grammar)
+        return vosk.KaldiRecognizer(self.model, self.sample_rate)
+
+    def acquire(self):
+        """Берет распознаватель из пула или создает новый"""
+        with self._lock:
+            if self._idle:
+                self.hits += 1
+                return self._idle.pop()
+            self.misses += 1
+        return self._create()
+
+    def release(self, recognizer):
+        """Возвращает распознаватель в пул"""
+        recognizer.Reset()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(recognizer)
+            else:
+                self.discarded += 1
+
+    @contextmanager
+    def recognizer(self):
+        """with pool.recognizer() as rec: ..."""
+        rec = self.acquire()
+        try:
+            yield rec
+        finally:
+            self.release(rec)
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'created': self.created,
+            'discarded': self.discarded,
+            'idle': idle
+        }
+
+
+class ModelRegistry:
+    """
+    Реестр моделей Vosk на весь процесс: одна модель на путь,
+    память модели разделяется всеми распознавателями.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.loads = 0
+        self.hits = 0
+
+    def get_model(self, model_path):
+        """Возвращает загруженную модель, загружая ее один раз"""
+        with self._lock:
+            model = self._models.get(model_path)
+            if model is not None:
+                self.hits += 1
+                return model
+            load_lock = self._load_locks.setdefault(model_path, threading.Lock())
+
+        # Загрузка под отдельной блокировкой: разные модели грузятся параллельно
+        with load_lock:
+            with self._lock:
+                model = self._models.get(model_path)
+                if model is not None:
+                    self.hits += 1
+                    return model
+
+            import vosk
+            print(f"Загружаем модель из {model_path}...")
+            model = vosk.Model(model_path)
+
+            with self._lock:
+                self._models[model_path] = model
+                self.loads += 1
+            return model
+
+    def get_pool(self, model_path, sample_rate=16000, grammar=None, prealloc=0):
+        """Общий пул распознавателей для (модель, частота, грамматика)"""
+        model = self.get_model(model_path)
+        key = (model_path, sample_rate, grammar)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = RecognizerPool(model, sample_rate, grammar, prealloc=prealloc)
+                self._pools[key] = pool
+            return pool
+
+    def stats(self):
+        with self._lock:
+            pools = dict(self._pools)
+            models = list(self._models)
+        return {
+            'models': models,
+            'loads': self.loads,
+            'hits': self.hits,
+            'pools': {
+                f"{path}@{rate}" + (" [grammar]" if grammar else ""): pool.stats()
+                for (path, rate, grammar), pool in pools.items()
+            }
+        }
+
+
+_from_buffer = None
+
+
+def waveform(data):
+    """
+    Аргумент для AcceptWaveform без копирования: bytes отдаем как есть,
+    memoryview/bytearray/NumPy оборачиваем через cffi from_buffer.
+    """
+    global _from_buffer
+    if isinstance(data, bytes):
+        return data
+    if _from_buffer is None:
+        import vosk
+        _from_buffer = vosk._ffi.from_buffer
+    return _from_buffer(data)
+
+
+# Общий реестр процесса
+registry = ModelRegistry()
+
+
+def get_model(model_path):
+    """Модель из общего реестра"""
+    return registry.get_model(model_path)
+
+
+def get_pool(model_path, sample_rate=16000, grammar=None, prealloc=0):
+    """Пул распознавателей из общего реестра"""
+    return registry.get_pool(model_path, sample_rate, grammar, prealloc)
@@ -0,0 +1,114 @@
+import json
+import time
+from .ring_buffer import PreRollBuffer
+
+DEFAULT_WAKE_WORDS = ["аркадий", "аркаша", "арк"]
+
+
+def make_grammar(wake_words):
+    """Грамматика Vosk: только ключевые слова + [unk] для всего остального"""
+    return json.dumps([w.lower() for w in wake_words] + ["[unk]"], ensure_ascii=False)
+
+
+class WakeWordDetection:
+    """Результат срабатывания wake-word"""
+
+    def __init__(self, word, text, audio_time, decode_time, detected_at, word_end=None, tail_audio=b''):
+        self.word = word                # Какое слово сработало
+        self.text = text                # Текст гипотезы, в которой нашли слово
+        self.audio_time = audio_time    # Позиция в потоке (сек) на момент срабатывания
+        self.decode_time = decode_time  # Время декодирования последнего блока (сек)
+        self.detected_at = detected_at  # time.perf_counter() момента срабатывания
+        self.word_end = word_end        # Позиция конца ключевого слова (сек), если известна
+        self.tail_audio = tail_audio    # PCM после ключевого слова - начало команды
+
+    def __repr__(self):
+        return (f"WakeWordDetection(word={self.word!r}, audio_time={self.audio_time:.2f}, "
+                f"decode_ms={self.decode_time * 1000:.1f})")
+
+
+class WakeWordDetector:
+    """
+    Детектор ключевого слова на грамматике из нескольких слов.
+    Срабатывает по PartialResult(), не дожидаясь конца фразы и паузы.
+    """
+
+    def __init__(self, model, wake_words=None, sample_rate=16000, block_size=1600, recognizer=None,
+                 pre_roll_seconds=3.0):
+        self.wake_words = [w.lower() for w in (wake_words or DEFAULT_WAKE_WORDS)]
+        self.sample_rate = sample_rate
+        self.block_size = block_size  # 0.1 сек при 16 кГц
+
+        # Распознаватель можно взять из пула (см. vosk_models.get_pool)
+        if recognizer is None:
+            import vosk
+            recognizer = vosk.KaldiRecognizer(model, sample_rate, make_grammar(self.wake_words))
+        self.recognizer = recognizer
+        # Тайминги слов нужны, чтобы отрезать команду сразу после ключевого слова
+        self.recognizer.SetWords(True)
+        self.recognizer.SetPartialWords(True)
+
+        # История поданного аудио: после срабатывания из нее берется
+        # хвост за ключевым словом, сам wake-сегмент повторно не декодируется
+        self.history = PreRollBuffer(pre_roll_seconds, sample_rate)
+        self._round_start = 0  # Позиция (в сэмплах) последнего Reset()
+
+        self.samples_seen = 0
+        self.detections = 0
+        self.last_detection = None
+
+    def process(self, data):
+        """Скармливает блок PCM int16, возвращает WakeWordDetection или None"""
+        self.history.append(data)
+        self.samples_seen += len(data) // 2
+
+        start = time.perf_counter()
+        if self.recognizer.AcceptWaveform(data):
+            result = json.loads(self.recognizer.Result())
+            text, words = result.get('text', ''), result.get('result', [])
+        else:
+            result = json.loads(self.recognizer.PartialResult())
+            text, words = result.get('partial', ''), result.get('partial_result', [])
+        now = time.perf_counter()
+
+        word = self._match(text)
+        if not word:
+            return None
+
+        # Конец ключевого слова в абсолютных сэмплах (времена Vosk - от последнего Reset)
+        word_end = None
+        tail_audio = b''
+        for entry in words:
+            if entry.get('word', '').lower() == word:
+                word_end = self._round_start + int(entry['end'] * self.sample_rate)
+                tail_audio = self.history.since(word_end)
+                break
+
+        self.detections += 1
+        self.last_detection = WakeWordDetection(
+            word=word,
+            text=text,
+            audio_time=self.samples_seen / self.sample_rate,
+            decode_time=now - start,
+            detected_at=now,
+            word_end=None if word_end is None else word_end / self.sample_rate,
+            tail_audio=tail_audio
+        )
+        # Сбрасываем, чтобы то же слово не сработало повторно
+        self.reset()
+        return self.last_detection
+
+    def _match(self, text):
+        """Ищет ключевое слово среди слов гипотезы"""
+        if not text:
+            return None
+        for token in text.lower().split():
+            if token in self.wake_words:
+                return token
+        return None
+
+    def reset(self):
+        """Сброс состояния распознавателя"""
+        self.recognizer.Reset()
+        self._round_start = self.samples_seen
+        self.history.clear()
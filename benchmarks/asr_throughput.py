@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность ASR-пути (VAD + KaldiRecognizer) без микрофона.
+
+Источник - любой AudioSource: WAV, сырой PCM из файла/пайпа ('-').
+Читается быстрее реального времени, на выходе RTF и секунды аудио в секунду.
+
+Примеры:
+    python benchmarks/asr_throughput.py records/*.wav
+    ffmpeg -i talk.mp3 -f s16le -ac 1 -ar 16000 - | python benchmarks/asr_throughput.py -
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vosk
+from arkady import vosk_models
+from arkady.audio_source import open_source
+from arkady.vad import VoiceActivityDetector
+
+
+def run(source, pool, use_vad):
+    """Гонит источник через распознаватель, возвращает метрики"""
+    vad = VoiceActivityDetector(sample_rate=source.sample_rate) if use_vad else None
+    finals = 0
+    cpu_start = time.process_time()
+
+    with pool.recognizer() as rec, source:
+        for data in source:
+            for block in (vad.process(data) if vad else [data]):
+                if rec.AcceptWaveform(block):
+                    finals += 1
+        rec.FinalResult()
+
+    wall = source.wall_seconds
+    audio = source.audio_seconds
+    return {
+        'audio_seconds': audio,
+        'wall_seconds': wall,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'rtf': wall / audio if audio else 0.0,
+        'speedup': audio / wall if wall else 0.0,
+        'finals': finals,
+        'skipped_fraction': vad.skipped_fraction if vad else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTF и пропускная способность ASR")
+    parser.add_argument('sources', nargs='+', help="WAV / .raw файлы или '-' для stdin")
+    parser.add_argument('--model', default="vosk-model-small-ru-0.22")
+    parser.add_argument('--rate', type=int, default=16000, help="Частота для сырого PCM")
+    parser.add_argument('--block', type=int, default=1600, help="Размер блока в сэмплах")
+    parser.add_argument('--no-vad', action='store_true', help="Без VAD-гейта")
+    parser.add_argument('--realtime', action='store_true', help="Читать со скоростью реального времени")
+    parser.add_argument('--json', action='store_true', help="Вывод в JSON")
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    load_start = time.perf_counter()
+    vosk_models.get_model(args.model)
+    load_time = time.perf_counter() - load_start
+
+    rows = []
+    for spec in args.sources:
+        source = open_source(spec, sample_rate=args.rate, block_size=args.block, realtime=args.realtime)
+        pool = vosk_models.get_pool(args.model, source.sample_rate)
+        row = run(source, pool, use_vad=not args.no_vad)
+        row['source'] = spec
+        rows.append(row)
+
+    audio = sum(r['audio_seconds'] for r in rows)
+    wall = sum(r['wall_seconds'] for r in rows)
+    summary = {
+        'model_load_seconds': load_time,
+        'audio_seconds': audio,
+        'wall_seconds': wall,
+        'rtf': wall / audio if audio else 0.0,
+        'audio_seconds_per_second': audio / wall if wall else 0.0,
+        'pools': vosk_models.registry.stats()['pools']
+    }
+
+    if args.json:
+        print(json.dumps({'sources': rows, 'summary': summary}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"Загрузка модели: {load_time:.2f} сек")
+    print(f"{'источник':<32} {'аудио':>7} {'время':>7} {'RTF':>7} {'x':>6} {'VAD skip':>8}")
+    for row in rows:
+        print(f"{os.path.basename(row['source']):<32} {row['audio_seconds']:>7.1f} "
+              f"{row['wall_seconds']:>7.2f} {row['rtf']:>7.3f} {row['speedup']:>6.1f} "
+              f"{row['skipped_fraction'] * 100:>7.0f}%")
+    print(f"\nИтого: {audio:.1f} сек аудио за {wall:.2f} сек, RTF {summary['rtf']:.3f} "
+          f"({summary['audio_seconds_per_second']:.1f} сек аудио/сек)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Повторное использование context Ollama против пересборки промпта.
+
+Разговор из --turns вопросов в двух режимах ArkadyAI:
+    промпт:   каждый ход - системный промпт + 3 последних обмена заново
+    context:  после первого хода отправляется только новая реплика
+
+По каждому ходу - prompt_eval_count (сколько токенов модель пересчитала)
+и время ответа. Заглушка Ollama оценивает промпт со скоростью
+--prompt-eval-rate токенов/сек. С --invalidate-at N перед ходом N все
+context становятся недействительными - проверка отката на полный промпт.
+
+Пример:
+    python benchmarks/context_reuse.py --turns 8 --prompt-eval-rate 400 --invalidate-at 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.text_generation import ArkadyAI
+from mock_ollama import MockOllamaServer
+
+QUESTIONS = [
+    "Как дела, Аркадий?",
+    "Что делать если скучно?",
+    "А где ты живешь?",
+    "Посоветуй что-нибудь поесть",
+    "Как найти работу?",
+    "Что думаешь про погоду?",
+    "Есть у тебя друзья?",
+    "Расскажи анекдот",
+]
+
+
+def run_conversation(server, use_context, turns, invalidate_at):
+    ai = ArkadyAI(ollama_url=server.url, use_context=use_context, warm_up=False)
+    result = []
+    for i in range(turns):
+        if invalidate_at is not None and i == invalidate_at:
+            server.invalidate_contexts()
+        start = time.perf_counter()
+        ai.generate_response(QUESTIONS[i % len(QUESTIONS)])
+        result.append({
+            'turn': i + 1,
+            'prompt_eval_count': ai.last_stats.get('prompt_eval_count', 0),
+            'latency': time.perf_counter() - start
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="context Ollama против пересборки промпта")
+    parser.add_argument('--turns', type=int, default=8)
+    parser.add_argument('--prompt-eval-rate', type=float, default=400.0, help="Токенов промпта в секунду")
+    parser.add_argument('--first-token', type=float, default=0.05, help="Задержка первого токена, сек")
+    parser.add_argument('--invalidate-at', type=int, default=None, help="Ход, перед которым сбросить context")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    server = MockOllamaServer(first_token_delay=args.first_token, token_rate=500,
+                              prompt_eval_rate=args.prompt_eval_rate).start()
+    try:
+        result = {
+            'prompt': run_conversation(server, False, args.turns, args.invalidate_at),
+            'context': run_conversation(server, True, args.turns, args.invalidate_at)
+        }
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"\n{'ход':>4} {'промпт, ток':>12} {'мс':>6} {'context, ток':>13} {'мс':>6}")
+    for full, ctx in zip(result['prompt'], result['context']):
+        print(f"{full['turn']:>4} {full['prompt_eval_count']:>12} {full['latency'] * 1000:>6.0f}"
+              f" {ctx['prompt_eval_count']:>13} {ctx['latency'] * 1000:>6.0f}")
+    for name in ('prompt', 'context'):
+        turns = result[name]
+        tokens = sum(t['prompt_eval_count'] for t in turns)
+        latency = sum(t['latency'] for t in turns) / len(turns)
+        print(f"{name:>8}: {tokens} токенов промпта всего, среднее время хода {latency * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Задержка от конца речи до готового текста команды.
+
+Каждый WAV - "аркадий <команда>" с тишиной в конце. Запись проигрывается
+со скоростью реального времени через SpeechRecognizer (VAD + Endpointer),
+задержка - от конца речи (по VAD) до возврата wait_for_wake_word().
+
+Для сравнения считается старый путь: Result() полного распознавателя
+(конец фразы по эндпоинтеру Kaldi) плюс обязательное окно паузы 2 сек.
+
+Пример:
+    python benchmarks/endpointing_latency.py records/*.wav --silence 0.5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vosk
+from arkady import vosk_models
+from arkady.audio_source import WavFileSource
+from arkady.speech_recognition import SpeechRecognizer
+
+LEGACY_PAUSE_WINDOW = 2.0  # Окно ожидания продолжения в старом _listen_for_command
+
+
+def legacy_latency(model_path, path, chunk=8000):
+    """Аудио-время от конца последнего слова до Result() старого пути + окно паузы"""
+    source = WavFileSource(path, block_size=chunk)
+    rec = vosk.KaldiRecognizer(vosk_models.get_model(model_path), source.sample_rate)
+    rec.SetWords(True)
+    last = None
+
+    with source:
+        for data in source:
+            if rec.AcceptWaveform(data):
+                words = json.loads(rec.Result()).get('result', [])
+                if words:
+                    last = (words[-1]['end'], source.audio_seconds)
+    if last is None:
+        return None
+    word_end, final_at = last
+    return final_at - word_end + LEGACY_PAUSE_WINDOW
+
+
+def event_latency(model_path, path, trailing_silence, max_utterance):
+    """Реальное время от конца речи до текста команды через SpeechRecognizer"""
+    source = WavFileSource(path, realtime=True)
+    recognizer = SpeechRecognizer(
+        model_path=model_path,
+        audio_source=source,
+        trailing_silence=trailing_silence,
+        max_utterance=max_utterance
+    )
+    recognizer.start_listening()
+    try:
+        command = recognizer.wait_for_wake_word(timeout=source.duration + 1)
+        returned_at = source.wall_seconds  # Реальное время с начала проигрывания
+        endpoint = recognizer.last_endpoint
+    finally:
+        recognizer.cleanup()
+
+    if not endpoint or endpoint['speech_end'] is None:
+        return command, None, None
+    # Источник идет в реальном времени: аудио-время = время с начала проигрывания
+    return command, returned_at - endpoint['speech_end'], endpoint['reason']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка конца команды")
+    parser.add_argument('files', nargs='+', help="WAV файлы (16 бит, моно)")
+    parser.add_argument('--model', default="vosk-model-small-ru-0.22")
+    parser.add_argument('--silence', type=float, default=0.7, help="Тишина конца команды, сек")
+    parser.add_argument('--max-utterance', type=float, default=8.0, help="Максимум команды, сек")
+    parser.add_argument('--json', action='store_true', help="Вывод в JSON")
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    rows = []
+    for path in args.files:
+        command, latency, reason = event_latency(args.model, path, args.silence, args.max_utterance)
+        rows.append({
+            'file': path,
+            'command': command,
+            'reason': reason,
+            'latency': latency,
+            'legacy_latency': legacy_latency(args.model, path)
+        })
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.0f}"
+
+    print(f"\n{'файл':<28} {'причина':<10} {'новый, мс':>9} {'старый, мс':>10}  команда")
+    for row in rows:
+        print(f"{os.path.basename(row['file']):<28} {row['reason'] or '-':<10} "
+              f"{ms(row['latency']):>9} {ms(row['legacy_latency']):>10}  {row['command'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Точность и скорость локального маршрутизатора команд против прежних
+проверок подстрок (handle_special_commands + stt.process_command).
+
+Набор фраз размечен ожидаемым намерением; None - вопрос для LLM.
+
+Пример:
+    python benchmarks/intent_router.py --repeat 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.intents import LocalCommands, default_router
+
+PHRASES = [
+    ("который час", 'time'),
+    ("Аркадий, сколько сейчас времени?", 'time'),
+    ("скажи время", 'time'),
+    ("сколько времени прошло с войны", None),  # Ловушка для "сколько времени"
+    ("какое сегодня число", 'date'),
+    ("какой сегодня день недели", 'date'),
+    ("а какая дата сегодня", 'date'),
+    ("помощь", 'help'),
+    ("что ты умеешь", 'help'),
+    ("пока", 'exit'),
+    ("ну всё пока", 'exit'),
+    ("до свидания, Аркадий", 'exit'),
+    ("стоп", 'exit'),
+    ("всё", 'exit'),
+    ("выключайся", 'exit'),
+    ("сделай громче", 'volume'),
+    ("потише пожалуйста", 'volume'),
+    ("громкость на 30", 'volume'),
+    ("поставь громкость на семьдесят пять", 'volume'),
+    ("повтори", 'repeat'),
+    ("скажи еще раз", 'repeat'),
+    ("что ты сказал", 'repeat'),
+    ("пока не знаю что делать", None),
+    ("расскажи всё про водку", None),
+    ("где купить стопку", None),
+    ("временами мне грустно", None),
+    ("почему так тихо на улице", None),
+    ("посоветуй как найти работу", None),
+    ("ты меня уважаешь", None),
+    ("где выход из метро", None),
+    ("что делать если скучно", None),
+    ("расскажи анекдот про время", None),
+    ("выход из ситуации", None),
+    ("стоп игра", None),
+    ("какое время года сейчас", None),
+    ("помощь нужна с домашкой", None),
+    ("еще раз расскажи про водку", None),
+    ("тише едешь дальше будешь", None),
+    ("почему звук на улице такой громкий", None),
+]
+
+
+def legacy_route(text):
+    """Прежняя логика: подстроки в ArkadyAI и stt.VoiceAssistant"""
+    lower = text.lower().strip()
+    if any(word in lower for word in ['пока', 'выход', 'стоп', 'хватит', 'всё']):
+        return 'exit'
+    if any(word in lower for word in ['помощь', 'справка', 'что умеешь']):
+        return 'help'
+    if "время" in lower or "который час" in lower:
+        return 'time'
+    return None
+
+
+def evaluate(route, repeat):
+    correct = sum(route(phrase) == expected for phrase, expected in PHRASES)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for phrase, _ in PHRASES:
+            route(phrase)
+    per_call = (time.perf_counter() - start) / (repeat * len(PHRASES))
+    return {'accuracy': correct / len(PHRASES), 'per_call_us': per_call * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный маршрутизатор команд")
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    router = default_router(LocalCommands())
+
+    def route(text):
+        match = router.match(text)
+        return match.name if match else None
+
+    result = {
+        'phrases': len(PHRASES),
+        'legacy': evaluate(legacy_route, args.repeat),
+        'router': evaluate(route, args.repeat),
+        'misses': [(p, e, route(p)) for p, e in PHRASES if route(p) != e]
+    }
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    for name, title in (('legacy', "Подстроки"), ('router', "Автомат")):
+        r = result[name]
+        print(f"{title:>10}: точность {r['accuracy']:.0%}, {r['per_call_us']:.1f} мкс на фразу")
+    for phrase, expected, got in result['misses']:
+        print(f"  промах: '{phrase}' ожидалось {expected}, получено {got}")
+
+
+if __name__ == "__main__":
+    main()
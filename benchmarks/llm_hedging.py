@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест маршрутизатора LLM: хвосты задержек с хеджированием и без.
+
+Поднимаются локальные заглушки (benchmarks/mock_ollama.py):
+    fast-a   Ollama API,   быстрый, с медленным хвостом
+    fast-b   OpenAI API,   такой же профиль, другой генератор случайностей
+    large    Ollama API,   модель покрупнее - медленнее
+Хвост: с вероятностью --slow-probability первый токен задерживается на --slow-delay.
+
+Сценарии:
+    один бэкенд    только fast-a, без хеджирования
+    хеджирование   fast-a + fast-b + large, дубль запроса после p95 первого токена
+
+Вопросы смешанные - простые уходят на 'fast', сложные на 'large'.
+Дедлайн по p95 срезает хвост, пока медленных запросов меньше 5%: при
+более толстом хвосте p95 сам попадает в хвост - уменьшайте --hedge-quantile.
+
+Пример:
+    python benchmarks/llm_hedging.py --requests 200 --concurrency 4
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.llm_backends import LLMRouter, OllamaBackend, OpenAIBackend
+from mock_ollama import MockOllamaServer
+
+QUESTIONS = [
+    "Как дела?", "Который день пьешь?", "Где ночуешь?", "Есть закурить?",
+    "Почему небо синее?", "Объясни, как найти работу без паспорта",
+]
+OPTIONS = {"temperature": 0.8, "top_p": 0.9, "num_predict": 100, "stop": ["\n\n"]}
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50': pick(0.5), 'p95': pick(0.95), 'p99': pick(0.99), 'max': ordered[-1]}
+
+
+def one_request(router, question):
+    start = time.perf_counter()
+    first = None
+    for chunk in router.stream(question, OPTIONS, router.classify(question)):
+        if first is None and chunk.get('response'):
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def run(router, servers, args):
+    rng = random.Random(args.seed)
+    questions = [rng.choice(QUESTIONS) for _ in range(args.warmup + args.requests)]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        # Прогрев: роутер набирает статистику первого токена для дедлайнов
+        list(executor.map(lambda q: one_request(router, q), questions[:args.warmup]))
+        time.sleep(0.5)
+        before = {name: (s.requests, s.aborted) for name, s in servers.items()}
+        hedges, hedge_wins = router.hedges, router.hedge_wins
+        results = list(executor.map(lambda q: one_request(router, q), questions[args.warmup:]))
+    # Даем отмененным запросам дойти до сервера
+    time.sleep(0.5)
+    sent = sum(s.requests - before[name][0] for name, s in servers.items())
+    return {
+        'hedges': router.hedges - hedges,
+        'hedge_wins': router.hedge_wins - hedge_wins,
+        'first_token': percentiles([r[0] for r in results]),
+        'total': percentiles([r[1] for r in results]),
+        'extra_load': sent / args.requests - 1,
+        'server_aborted': sum(s.aborted - before[name][1] for name, s in servers.items()),
+        'router': router.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Хеджирование запросов к LLM")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=60, help="Запросов до замера")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--first-token', type=float, default=0.12, help="Первый токен быстрых, сек")
+    parser.add_argument('--large-first-token', type=float, default=0.35, help="Первый токен крупной, сек")
+    parser.add_argument('--slow-probability', type=float, default=0.04)
+    parser.add_argument('--slow-delay', type=float, default=1.5)
+    parser.add_argument('--hedge-quantile', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    profile = dict(token_rate=300, slow_probability=args.slow_probability, slow_delay=args.slow_delay)
+    servers = {
+        'fast-a': MockOllamaServer(first_token_delay=args.first_token, seed=1, **profile).start(),
+        'fast-b': MockOllamaServer(first_token_delay=args.first_token, seed=2, **profile).start(),
+        'large': MockOllamaServer(model="llama3.1:8b", first_token_delay=args.large_first_token, seed=3,
+                                  **profile).start()
+    }
+    try:
+        single = LLMRouter([OllamaBackend('fast-a', servers['fast-a'].url, "llama3.2:1b")])
+        hedged = LLMRouter([
+            OllamaBackend('fast-a', servers['fast-a'].url, "llama3.2:1b", tier='fast'),
+            OpenAIBackend('fast-b', servers['fast-b'].url, "llama3.2:1b", tier='fast'),
+            OllamaBackend('large', servers['large'].url, "llama3.1:8b", tier='large'),
+        ], hedge_quantile=args.hedge_quantile)
+        result = {'single': run(single, servers, args), 'hedged': run(hedged, servers, args)}
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for name, title in (('single', "Один бэкенд"), ('hedged', "Хеджирование")):
+        r = result[name]
+        ft, total = r['first_token'], r['total']
+        print(f"\n{title}:")
+        print(f"  первый токен: p50 {ft['p50'] * 1000:.0f}  p95 {ft['p95'] * 1000:.0f}  "
+              f"p99 {ft['p99'] * 1000:.0f}  макс {ft['max'] * 1000:.0f} мс")
+        print(f"  весь ответ:   p50 {total['p50'] * 1000:.0f}  p95 {total['p95'] * 1000:.0f}  "
+              f"p99 {total['p99'] * 1000:.0f} мс")
+        print(f"  дублей: {r['hedges']} (выиграли {r['hedge_wins']}), "
+              f"лишняя нагрузка {r['extra_load']:.0%}, оборвано на серверах {r['server_aborted']}, "
+              f"по уровням {r['router']['routed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест генерации текста на заглушке Ollama.
+
+Три замера:
+    build_prompt   ArkadyAI._build_prompt с заполненной памятью (CPU)
+    personality    ArkadyPersonality.process_response (CPU)
+    generate       ArkadyAI.generate_response целиком, --concurrency параллельных
+                   разговоров (у каждого свой ArkadyAI, общий пул соединений)
+
+По каждому - пропускная способность, p50/p95/p99; для generate еще ошибки
+сервера (--error-rate) и ответы-заготовки. Результат - JSON (--output) с
+параметрами запуска, чтобы сравнивать прогоны. С --baseline прошлый файл
+сравнивается с текущим: p99 или пропускная способность хуже больше чем на
+--tolerance - код выхода 1 (для CI).
+
+Пример:
+    python benchmarks/load_test.py --concurrency 1,4,8 --requests 64 --output load.json
+    python benchmarks/load_test.py --baseline load.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.text_generation import ArkadyAI
+from arkady.tracing import Histogram
+from mock_ollama import MockOllamaServer, DEFAULT_ANSWER
+
+QUESTIONS = [
+    "Как дела, Аркадий?",
+    "Что делать если скучно?",
+    "А где ты живешь?",
+    "Посоветуй что-нибудь поесть",
+    "Как найти работу?",
+    "Что думаешь про погоду?",
+    "Есть у тебя друзья?",
+    "Расскажи анекдот",
+]
+
+
+def summarize(histogram, elapsed):
+    summary = histogram.summary()
+    return {
+        'count': summary['count'],
+        'throughput': summary['count'] / elapsed if elapsed else 0.0,
+        'mean': summary['sum'] / summary['count'] if summary['count'] else 0.0,
+        'p50': summary['p50'],
+        'p95': summary['p95'],
+        'p99': summary['p99']
+    }
+
+
+def bench_cpu(func, iterations):
+    """Микробенчмарк: задержка каждого вызова"""
+    histogram = Histogram(reservoir=iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        histogram.observe(time.perf_counter() - start)
+    return summarize(histogram, time.perf_counter() - started)
+
+
+def bench_generate(server, concurrency, requests):
+    """requests вопросов на concurrency разговоров одновременно"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        bots = [ArkadyAI(ollama_url=server.url, warm_up=False) for _ in range(concurrency)]
+    histogram = Histogram(reservoir=requests)
+    errors_before = server.errors
+
+    def conversation(index):
+        ai = bots[index]
+        for i in range(index, requests, concurrency):
+            start = time.perf_counter()
+            ai.generate_response(QUESTIONS[i % len(QUESTIONS)])
+            histogram.observe(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    # Ошибки генерации печатаются - в отчете они только мешают
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(conversation, range(concurrency)))
+    result = summarize(histogram, time.perf_counter() - started)
+    result['concurrency'] = concurrency
+    result['server_errors'] = server.errors - errors_before
+    result['fallbacks'] = sum(ai.fallbacks for ai in bots)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai = ArkadyAI(connect=False)
+    for i in range(8):
+        ai._add_to_history(QUESTIONS[i], DEFAULT_ANSWER)
+
+    result = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'params': vars(args)
+        },
+        'build_prompt': bench_cpu(lambda i: ai._build_prompt(QUESTIONS[i % len(QUESTIONS)]), args.iterations),
+        'personality': bench_cpu(lambda i: ai.personality.process_response(DEFAULT_ANSWER), args.iterations),
+        'generate': []
+    }
+
+    server = MockOllamaServer(first_token_delay=args.first_token, token_rate=args.token_rate,
+                              error_rate=args.error_rate, seed=args.seed).start()
+    try:
+        for concurrency in args.concurrency:
+            result['generate'].append(bench_generate(server, concurrency, args.requests))
+    finally:
+        server.stop()
+    return result
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:.1f} мс" if seconds >= 0.001 else f"{seconds * 1e6:.1f} мкс"
+
+
+def compare(baseline, current, tolerance):
+    """Регрессии относительно baseline: список строк"""
+    regressions = []
+
+    def check(name, old, new):
+        if old['p99'] and new['p99'] > old['p99'] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {format_seconds(old['p99'])} -> {format_seconds(new['p99'])}")
+        if new['throughput'] < old['throughput'] * (1 - tolerance):
+            regressions.append(f"{name}: {old['throughput']:.1f} -> {new['throughput']:.1f} в сек")
+
+    for name in ('build_prompt', 'personality'):
+        check(name, baseline[name], current[name])
+    old_generate = {entry['concurrency']: entry for entry in baseline['generate']}
+    for entry in current['generate']:
+        if entry['concurrency'] in old_generate:
+            check(f"generate x{entry['concurrency']}", old_generate[entry['concurrency']], entry)
+    return regressions
+
+
+def print_report(result):
+    for name in ('build_prompt', 'personality'):
+        r = result[name]
+        print(f"{name:<14} {r['throughput']:>10.0f} в сек   p50 {r['p50'] * 1e6:>7.1f}  "
+              f"p99 {r['p99'] * 1e6:>7.1f} мкс")
+    print(f"\n{'параллельно':>11} {'запросов/с':>11} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8} "
+          f"{'ошибок':>7} {'заготовок':>10}")
+    for r in result['generate']:
+        print(f"{r['concurrency']:>11} {r['throughput']:>11.1f} {r['p50'] * 1000:>8.0f} {r['p95'] * 1000:>8.0f} "
+              f"{r['p99'] * 1000:>8.0f} {r['server_errors']:>7} {r['fallbacks']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест генерации текста")
+    parser.add_argument('--concurrency', type=lambda s: [int(x) for x in s.split(',')], default=[1, 4, 8],
+                        help="Уровни параллельности через запятую")
+    parser.add_argument('--requests', type=int, default=64, help="Вопросов на каждый уровень")
+    parser.add_argument('--iterations', type=int, default=2000, help="Вызовов в CPU-замерах")
+    parser.add_argument('--first-token', type=float, default=0.05, help="Задержка первого токена, сек")
+    parser.add_argument('--token-rate', type=float, default=500.0, help="Токенов в секунду")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов заглушки с ошибкой")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Куда сохранить JSON с результатами")
+    parser.add_argument('--baseline', help="JSON прошлого прогона для сравнения")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Допустимое ухудшение, доля")
+    parser.add_argument('--json', action='store_true', help="JSON в stdout вместо таблицы")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print_report(result)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(json.load(f), result, args.tolerance)
+        if regressions:
+            print("\n❌ Регрессии:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\n✅ Без регрессий относительно baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Длина промпта и задержка первого токена: история "3 последних обмена"
+(как было) против памяти с бюджетом токенов и сводкой.
+
+Заглушка Ollama отвечает длинно (--answer-words слов) и оценивает промпт
+со скоростью --prompt-eval-rate токенов/сек; context Ollama выключен,
+промпт каждый ход собирается из памяти заново.
+
+Пример:
+    python benchmarks/memory_budget.py --turns 10 --budgets 150 300 600
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.memory import ConversationMemory
+from arkady.text_generation import ArkadyAI
+from mock_ollama import MockOllamaServer, DEFAULT_ANSWER
+
+
+class LastExchanges(ConversationMemory):
+    """Старое поведение: 3 последних обмена без учета длины"""
+
+    def __init__(self):
+        super().__init__(token_budget=float('inf'))
+        self.exchanges = deque(maxlen=3)
+
+
+def first_token(ai, question):
+    start = time.perf_counter()
+    latency = None
+    # Дочитываем ответ целиком - иначе он не попадет в память
+    for _ in ai.generate_response_stream(question):
+        if latency is None:
+            latency = time.perf_counter() - start
+    return latency
+
+
+def run(server, memory, turns):
+    ai = ArkadyAI(ollama_url=server.url, warm_up=False, use_context=False)
+    ai.memory = memory
+    result = []
+    for i in range(turns):
+        latency = first_token(ai, f"Вопрос номер {i + 1}: что посоветуешь?")
+        memory.wait()
+        result.append({'turn': i + 1, 'prompt_tokens': ai.last_stats.get('prompt_eval_count', 0),
+                       'first_token': latency})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бюджет памяти разговора и задержка первого токена")
+    parser.add_argument('--turns', type=int, default=10)
+    parser.add_argument('--budgets', type=int, nargs='+', default=[150, 300, 600])
+    parser.add_argument('--answer-words', type=int, default=120)
+    parser.add_argument('--prompt-eval-rate', type=float, default=300.0, help="Токенов промпта в секунду")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    words = DEFAULT_ANSWER.split()
+    answer = " ".join(words[i % len(words)] for i in range(args.answer_words))
+    server = MockOllamaServer(answer=answer, first_token_delay=0.02, token_rate=2000,
+                              prompt_eval_rate=args.prompt_eval_rate).start()
+    try:
+        result = {'last_3': run(server, LastExchanges(), args.turns)}
+        for budget in args.budgets:
+            result[f'budget_{budget}'] = run(server, ConversationMemory(token_budget=budget), args.turns)
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"\n{'память':>12} {'токенов промпта (последний ход)':>32} {'первый токен, мс (среднее/последний)':>38}")
+    for name, turns in result.items():
+        mean = sum(t['first_token'] for t in turns) / len(turns)
+        print(f"{name:>12} {turns[-1]['prompt_tokens']:>32} {mean * 1000:>25.0f} / {turns[-1]['first_token'] * 1000:.0f}")
+
+
+if __name__ == "__main__":
+    main()
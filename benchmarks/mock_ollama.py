@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Локальная заглушка Ollama для бенчмарков без настоящей модели.
+
+Поддерживает /api/version, /api/tags и /api/generate (stream true/false),
+а также OpenAI-совместимые /v1/models и /v1/chat/completions (SSE).
+Ответ - заготовленный текст, который "генерируется" по словам с заданной
+задержкой первого токена и скоростью токенов.
+
+Холодный старт: если модель не в памяти, запрос ждет еще load_delay.
+Модель остается загруженной на keep_alive из запроса ("5m", "30s", -1, 0),
+по умолчанию - default_keep_alive. Пустой prompt только загружает модель.
+
+Контекст: ответ содержит context (id "токенов"-слов диалога). Если запрос
+пришел с context, который сейчас в KV-кэше, оцениваются только новые токены
+промпта, иначе - весь context заново (prompt_eval_rate токенов/сек).
+Неизвестный context (после invalidate_contexts()) - ошибка 400.
+
+Хвосты задержек: с вероятностью slow_probability первый токен задерживается
+еще на slow_delay. Обрыв соединения клиентом посреди ответа считается в aborted.
+
+Ошибки: с вероятностью error_rate генерация отвечает error_status с
+{"error": ...} (как перегруженный Ollama), счетчик - errors.
+
+Запуск отдельно:
+    python benchmarks/mock_ollama.py --port 11434 --first-token 0.3 --token-rate 30
+Или из кода:
+    server = MockOllamaServer(first_token_delay=0.3).start()
+    ... server.url ...
+    server.stop()
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Обрывы соединений клиентом - норма для бенчмарка, не шумим"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+DEFAULT_ANSWER = (
+    "Слушай, водка тут не поможет, это я тебе точно говорю. "
+    "Лучше сходи поспи нормально, а утром все само решится. "
+    "Я так всю жизнь и живу, и ничего, жив пока. "
+    "Главное - не суетись и не верь всяким умникам."
+)
+
+
+class MockOllamaServer:
+    """HTTP-заглушка Ollama в фоновом потоке"""
+
+    def __init__(self, host="127.0.0.1", port=0, model="llama3.2:1b", answer=DEFAULT_ANSWER,
+                 first_token_delay=0.3, token_rate=30.0, load_delay=0.0, default_keep_alive="5m",
+                 prompt_eval_rate=0.0, slow_probability=0.0, slow_delay=0.0, error_rate=0.0,
+                 error_status=500, seed=None):
+        self.model = model
+        self.answer = answer
+        self.first_token_delay = first_token_delay  # Сек до первого токена (prompt eval)
+        self.token_rate = token_rate                # Токенов в секунду
+        self.load_delay = load_delay                # Сек на загрузку модели в память
+        self.default_keep_alive = default_keep_alive
+        self.prompt_eval_rate = prompt_eval_rate    # Токенов промпта в секунду (0 - бесплатно)
+        self.slow_probability = slow_probability    # Доля "тормозящих" запросов
+        self.slow_delay = slow_delay                # Сколько они тормозят, сек
+        self.error_rate = error_rate                # Доля запросов с ошибкой
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0                             # Отданные ошибки
+        self.aborted = 0                            # Клиент ушел, не дочитав ответ
+        self.connections = 0                        # Принятые TCP-соединения
+        self.cold_loads = 0
+        self._loaded_until = 0.0
+        self._load_lock = threading.Lock()
+        self._contexts = set()   # Выданные context (хэши)
+        self._kv_cached = None   # Хэш context, чьи токены сейчас в KV-кэше
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def do_GET(self):
+                if self.path == '/api/version':
+                    self._json({'version': '0.0.0-mock'})
+                elif self.path == '/api/tags':
+                    self._json({'models': [{'name': server.model}]})
+                elif self.path == '/v1/models':
+                    self._json({'object': 'list', 'data': [{'id': server.model, 'object': 'model'}]})
+                else:
+                    self._json({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                server.requests += 1
+                if self.path == '/api/generate':
+                    server.handle_generate(self, body)
+                elif self.path == '/v1/chat/completions':
+                    server.handle_chat(self, body)
+                else:
+                    self._json({'error': 'not found'}, status=404)
+
+            def _json(self, payload, status=200):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = _QuietHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def tokens(self):
+        """Ответ, нарезанный на "токены" (слова с пробелом)"""
+        words = self.answer.split(' ')
+        return [w + ' ' for w in words[:-1]] + [words[-1]]
+
+    @staticmethod
+    def token_ids(text):
+        """Псевдо-токенизация: id слов"""
+        return [zlib.crc32(word.encode('utf-8')) & 0xffff for word in text.split()]
+
+    def invalidate_contexts(self):
+        """Все выданные context становятся недействительными (как после смены модели)"""
+        self._contexts.clear()
+        self._kv_cached = None
+
+    def _evaluate_prompt(self, body):
+        """
+        Разбирает prompt и context запроса. Возвращает (context ответа без
+        токенов ответа, число оцениваемых токенов) или None, если context чужой.
+        """
+        context = list(body.get('context') or [])
+        prompt_ids = self.token_ids(body.get('prompt', ''))
+        key = hash(tuple(context))
+        if context and key not in self._contexts:
+            return None
+        evaluated = len(prompt_ids) if context and key == self._kv_cached else len(context) + len(prompt_ids)
+        return context + prompt_ids, evaluated
+
+    def _issue_context(self, context):
+        key = hash(tuple(context))
+        self._contexts.add(key)
+        self._kv_cached = key
+        return context
+
+    def _final_chunk(self, started, tokens, context, evaluated):
+        answer_ids = self.token_ids(''.join(tokens))
+        return {
+            'model': self.model,
+            'done': True,
+            'context': self._issue_context(context + answer_ids),
+            'total_duration': int((time.perf_counter() - started) * 1e9),
+            'prompt_eval_count': evaluated,
+            'eval_count': len(tokens)
+        }
+
+    @staticmethod
+    def parse_keep_alive(value):
+        """keep_alive Ollama в секундах: "5m", "30s", "1h", число; отрицательное - навсегда"""
+        if isinstance(value, (int, float)):
+            seconds = float(value)
+        else:
+            value = str(value).strip()
+            units = {'s': 1, 'm': 60, 'h': 3600}
+            if value and value[-1] in units:
+                seconds = float(value[:-1]) * units[value[-1]]
+            else:
+                seconds = float(value)
+        return float('inf') if seconds < 0 else seconds
+
+    def _ensure_loaded(self):
+        """Холодная загрузка, если модель выгружена; продлевает удержание"""
+        with self._load_lock:
+            if time.monotonic() >= self._loaded_until:
+                self.cold_loads += 1
+                self._kv_cached = None
+                time.sleep(self.load_delay)
+            # До конца запроса модель точно в памяти
+            self._loaded_until = float('inf')
+
+    def _release(self, keep_alive):
+        with self._load_lock:
+            self._loaded_until = time.monotonic() + self.parse_keep_alive(keep_alive)
+
+    def _prompt_delay(self, evaluated):
+        """Задержка до первого токена: prompt eval и случайный "хвост" """
+        delay = self.first_token_delay
+        if self.prompt_eval_rate:
+            delay += evaluated / self.prompt_eval_rate
+        if self.slow_probability and self._random.random() < self.slow_probability:
+            delay += self.slow_delay
+        return delay
+
+    @staticmethod
+    def _start_chunked(handler, content_type):
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+    @staticmethod
+    def _send_chunk(handler, data):
+        handler.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        handler.wfile.flush()
+
+    def _fail(self, handler):
+        """Случайная ошибка сервера; True - ответ уже отправлен"""
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            handler._json({'error': 'mock: server busy'}, status=self.error_status)
+            return True
+        return False
+
+    def handle_generate(self, handler, body):
+        if self._fail(handler):
+            return
+        keep_alive = body.get('keep_alive', self.default_keep_alive)
+        self._ensure_loaded()
+        try:
+            self._generate(handler, body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.aborted += 1
+        finally:
+            self._release(keep_alive)
+
+    def handle_chat(self, handler, body):
+        """OpenAI-совместимый /v1/chat/completions"""
+        if self._fail(handler):
+            return
+        self._ensure_loaded()
+        try:
+            self._chat(handler, body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.aborted += 1
+        finally:
+            self._release(self.default_keep_alive)
+
+    def _chat(self, handler, body):
+        prompt = "\n".join(m.get('content', '') for m in body.get('messages', []))
+        tokens = self.tokens()
+        token_delay = 1.0 / self.token_rate if self.token_rate else 0.0
+        evaluated = len(self.token_ids(prompt))
+        usage = {'prompt_tokens': evaluated, 'completion_tokens': len(tokens),
+                 'total_tokens': evaluated + len(tokens)}
+
+        if not body.get('stream', False):
+            time.sleep(self._prompt_delay(evaluated) + token_delay * len(tokens))
+            handler._json({
+                'object': 'chat.completion',
+                'model': self.model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                             'finish_reason': 'stop'}],
+                'usage': usage
+            })
+            return
+
+        # Server-Sent Events: "data: {...}" и в конце "data: [DONE]"
+        self._start_chunked(handler, 'text/event-stream')
+
+        def send(payload):
+            data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+            self._send_chunk(handler, f"data: {data}\n\n".encode('utf-8'))
+
+        time.sleep(self._prompt_delay(evaluated))
+        for token in tokens:
+            send({'object': 'chat.completion.chunk', 'model': self.model,
+                  'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]})
+            time.sleep(token_delay)
+        send({'object': 'chat.completion.chunk', 'model': self.model,
+              'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'usage': usage})
+        send("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+    def _generate(self, handler, body):
+        started = time.perf_counter()
+        prompt = body.get('prompt', '')
+        tokens = self.tokens()
+        token_delay = 1.0 / self.token_rate if self.token_rate else 0.0
+
+        if not prompt:
+            # Прогрев: только загрузка модели
+            handler._json({'model': self.model, 'response': '', 'done': True, 'done_reason': 'load'})
+            return
+
+        evaluation = self._evaluate_prompt(body)
+        if evaluation is None:
+            handler._json({'error': 'invalid context'}, status=400)
+            return
+        context, evaluated = evaluation
+        prompt_delay = self._prompt_delay(evaluated)
+
+        if not body.get('stream', True):
+            time.sleep(prompt_delay + token_delay * len(tokens))
+            payload = self._final_chunk(started, tokens, context, evaluated)
+            payload['response'] = ''.join(tokens)
+            handler._json(payload)
+            return
+
+        # NDJSON-поток чанками HTTP/1.1
+        self._start_chunked(handler, 'application/x-ndjson')
+
+        def send(payload):
+            self._send_chunk(handler, (json.dumps(payload, ensure_ascii=False) + "\n").encode('utf-8'))
+
+        time.sleep(prompt_delay)
+        for token in tokens:
+            send({'model': self.model, 'response': token, 'done': False})
+            time.sleep(token_delay)
+        send(self._final_chunk(started, tokens, context, evaluated))
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка Ollama")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--model', default="llama3.2:1b")
+    parser.add_argument('--first-token', type=float, default=0.3, help="Задержка первого токена, сек")
+    parser.add_argument('--token-rate', type=float, default=30.0, help="Токенов в секунду")
+    parser.add_argument('--load-delay', type=float, default=0.0, help="Холодная загрузка модели, сек")
+    parser.add_argument('--keep-alive', default="5m", help="keep_alive по умолчанию")
+    parser.add_argument('--prompt-eval-rate', type=float, default=0.0, help="Токенов промпта в секунду")
+    parser.add_argument('--slow-probability', type=float, default=0.0, help="Доля медленных ответов")
+    parser.add_argument('--slow-delay', type=float, default=0.0, help="Задержка медленных ответов, сек")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов с ошибкой")
+    parser.add_argument('--error-status', type=int, default=500, help="HTTP-статус ошибки")
+    args = parser.parse_args()
+
+    server = MockOllamaServer(args.host, args.port, args.model,
+                              first_token_delay=args.first_token, token_rate=args.token_rate,
+                              load_delay=args.load_delay, default_keep_alive=args.keep_alive,
+                              prompt_eval_rate=args.prompt_eval_rate,
+                              slow_probability=args.slow_probability, slow_delay=args.slow_delay,
+                              error_rate=args.error_rate, error_status=args.error_status)
+    print(f"Заглушка Ollama на {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
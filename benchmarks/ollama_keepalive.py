@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Пул keep-alive соединений и удержание модели: старый путь (голый
+requests.post, новое TCP-соединение, без keep_alive) против OllamaClient
+(Session + прогрев + keep_alive). Ollama - локальная заглушка, у которой
+модель выгружается через --server-keep-alive после запроса, а загрузка
+стоит --load-delay.
+
+Между ходами пауза --gap (пользователь думает), поэтому без keep_alive
+каждый вопрос попадает на холодную модель.
+
+Пример:
+    python benchmarks/ollama_keepalive.py --turns 5 --load-delay 1.0 --gap 1.5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.ollama_client import OllamaClient
+from mock_ollama import MockOllamaServer
+
+MODEL = "llama3.2:1b"
+
+
+def first_token(post, payload):
+    """Время до первого непустого токена потокового ответа"""
+    start = time.perf_counter()
+    ttft = None
+    with post(payload) as response:
+        # Дочитываем поток до конца, чтобы соединение вернулось в пул
+        for line in response.iter_lines():
+            if ttft is None and line and json.loads(line).get('response'):
+                ttft = time.perf_counter() - start
+    return ttft if ttft is not None else time.perf_counter() - start
+
+
+def run_turns(server, post, turns, gap):
+    connections = server.connections
+    cold = server.cold_loads
+    latencies = []
+    for i in range(turns):
+        if i:
+            time.sleep(gap)
+        latencies.append(first_token(post, {'model': MODEL, 'prompt': "Что делать если скучно?", 'stream': True}))
+    return {
+        'first_token': latencies,
+        'first_token_mean': sum(latencies) / len(latencies),
+        'connections': server.connections - connections,
+        'cold_loads': server.cold_loads - cold
+    }
+
+
+def bare(server, args):
+    url = f"{server.url}/api/generate"
+    post = lambda payload: requests.post(url, json=payload, stream=True, timeout=60)
+    return run_turns(server, post, args.turns, args.gap)
+
+
+def pooled(server, args):
+    client = OllamaClient(server.url, keep_alive=args.keep_alive)
+    connections = server.connections
+    warm_up = client.warm_up(MODEL)
+    post = lambda payload: client.post('/api/generate', payload, stream=True)
+    result = run_turns(server, post, args.turns, args.gap)
+    # Прогрев тоже считается: соединение открывается на нем и дальше живет
+    result['connections'] = server.connections - connections
+    result['requests'] = args.turns + 1
+    result['warm_up'] = warm_up
+    result['client'] = client.stats()
+    client.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep-alive соединения и удержание модели Ollama")
+    parser.add_argument('--turns', type=int, default=5)
+    parser.add_argument('--gap', type=float, default=1.5, help="Пауза между ходами, сек")
+    parser.add_argument('--load-delay', type=float, default=1.0, help="Холодная загрузка модели, сек")
+    parser.add_argument('--first-token', type=float, default=0.15, help="Задержка первого токена, сек")
+    parser.add_argument('--server-keep-alive', default="1s", help="keep_alive заглушки по умолчанию")
+    parser.add_argument('--keep-alive', default="30m", help="keep_alive клиента")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    server = MockOllamaServer(model=MODEL, first_token_delay=args.first_token, token_rate=200,
+                              load_delay=args.load_delay, default_keep_alive=args.server_keep_alive).start()
+    try:
+        result = {'bare': bare(server, args)}
+        # Модель после первого сценария должна успеть выгрузиться
+        time.sleep(server.parse_keep_alive(args.server_keep_alive) + 0.1)
+        result['pooled'] = pooled(server, args)
+    finally:
+        server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for name, title in (('bare', "requests.post"), ('pooled', "OllamaClient")):
+        r = result[name]
+        print(f"\n{title}:")
+        print(f"  первый токен:   {' '.join(f'{t * 1000:.0f}' for t in r['first_token'])} мс "
+              f"(среднее {r['first_token_mean'] * 1000:.0f} мс)")
+        print(f"  соединений:     {r['connections']} на {r.get('requests', args.turns)} запросов")
+        print(f"  холодных загрузок: {r['cold_loads']}")
+    pooled_result = result['pooled']
+    print(f"\nПрогрев: {pooled_result['warm_up'] * 1000:.0f} мс, "
+          f"переиспользовано соединений: {pooled_result['client']['connections_reused']}"
+          f" из {pooled_result['client']['requests']}")
+
+
+if __name__ == "__main__":
+    main()
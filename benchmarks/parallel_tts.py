@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Длинный ответ: синтез одним куском против параллельного синтеза
+предложений с проигрыванием по порядку.
+
+    целиком:     весь текст - один запрос синтеза (как было)
+    параллельно: TTS.play_text() - предложения синтезируются по --concurrency
+                 сразу, не дальше --lookahead от играющего
+
+Синтез - заглушка StubTTSBackend: сетевая задержка --synth-delay на запрос,
+--per-char на символ и --audio-per-char звука на символ (меньше настоящих
+0.065 с, чтобы прогон не шел минутами). Заглушка либо отдает звук по мере синтеза
+(поток), либо одним куском в конце (blob, как edge_tts save()).
+Выход - NullSink со скоростью звука; паузы = полное время - первый звук -
+длительность звука. Пик памяти - tracemalloc за проигрывание.
+
+Пример:
+    python benchmarks/parallel_tts.py --repeat 2 --synth-delay 0.3 --per-char 0.015
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.audio_sink import NullSink
+from arkady.playback import StreamingPlayer
+from arkady.sentences import split_sentences
+from arkady.speech_synthesis import TTS
+from mock_ollama import DEFAULT_ANSWER
+
+
+def run(tts, text, parallel):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = asyncio.run(tts.play_text(text) if parallel else tts.play(text))
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'first_audio': result['first_sample'],
+        'wall': wall,
+        'audio_seconds': result['audio_seconds'],
+        'gaps': max(wall - result['first_sample'] - result['audio_seconds'], 0.0),
+        'peak_mb': peak / 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Параллельный синтез длинного ответа")
+    parser.add_argument('--repeat', type=int, default=2, help="Сколько раз повторить ответ заглушки")
+    parser.add_argument('--synth-delay', type=float, default=0.3, help="Сетевая задержка запроса, сек")
+    parser.add_argument('--per-char', type=float, default=0.015, help="Синтез на символ, сек")
+    parser.add_argument('--audio-per-char', type=float, default=0.03, help="Звука на символ, сек")
+    parser.add_argument('--concurrency', type=int, default=3)
+    parser.add_argument('--lookahead', type=int, default=4)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    from arkady.tts_cache import StubTTSBackend
+    text = " ".join([DEFAULT_ANSWER] * args.repeat)
+    result = {'sentences': len(split_sentences(text)), 'chars': len(text)}
+    for blob in (False, True):
+        for parallel in (False, True):
+            backend = StubTTSBackend(delay=args.synth_delay, per_char=args.per_char,
+                                     seconds_per_char=args.audio_per_char, blob=blob)
+            tts = TTS(backend=backend, player=StreamingPlayer(NullSink(realtime=True)),
+                      concurrency=args.concurrency, lookahead=args.lookahead)
+            name = f"{'blob' if blob else 'stream'}_{'parallel' if parallel else 'single'}"
+            result[name] = run(tts, text, parallel)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"\nТекст: {result['chars']} символов, {result['sentences']} предложений")
+    print(f"\n{'синтез':<7} {'режим':<12} {'первый звук':>12} {'всего':>8} {'паузы':>8} {'память':>8}")
+    for blob in ('stream', 'blob'):
+        for mode, title in (('single', 'целиком'), ('parallel', 'параллельно')):
+            r = result[f"{blob}_{mode}"]
+            print(f"{blob:<7} {title:<12} {r['first_audio'] * 1000:>9.0f} мс {r['wall']:>6.2f} с "
+                  f"{r['gaps']:>6.2f} с {r['peak_mb']:>5.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Конвейер asyncio против последовательного главного цикла на заглушках.
+
+Пользователь задает --commands вопросов каждые --interval секунд. Заглушки:
+    LLM:    первый токен --first-token, затем --sentences предложений по --per-sentence
+    голос:  --speak секунд на предложение (прерываемо)
+
+Последовательный цикл (как был main_loop): слушать -> думать -> говорить,
+следующее предложение генерируется только после того, как сказано прошлое.
+Конвейер: генерация, синтез и слух идут одновременно.
+
+Отдельно - barge-in: новый вопрос посреди длинного ответа.
+
+Пример:
+    python benchmarks/pipeline_latency.py --commands 6 --interval 2.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.pipeline import ConversationPipeline
+
+
+class Script:
+    """Вопросы пользователя по расписанию"""
+
+    def __init__(self, times):
+        self.times = list(times)
+        self.start = None
+        self.asked = {}  # команда -> когда прозвучала
+
+    def listen(self, timeout=0.2):
+        if self.start is None:
+            self.start = time.perf_counter()
+        if not self.times:
+            time.sleep(timeout)
+            return None
+        wait = self.start + self.times[0] - time.perf_counter()
+        if wait > timeout:
+            time.sleep(timeout)
+            return None
+        time.sleep(max(wait, 0))
+        command = f"вопрос {len(self.asked) + 1}"
+        self.asked[command] = self.start + self.times.pop(0)
+        return command
+
+
+class Stubs:
+    def __init__(self, args):
+        self.args = args
+        self.first_audio = {}  # команда -> первый звук ответа
+        self.spoken = []
+        self._interrupt = threading.Event()
+
+    def respond(self, command):
+        time.sleep(self.args.first_token)
+        for i in range(self.args.sentences):
+            if i:
+                time.sleep(self.args.per_sentence)
+            yield (command, i)
+
+    def speak(self, item):
+        command, i = item
+        self.first_audio.setdefault(command, time.perf_counter())
+        self._interrupt.clear()
+        if not self._interrupt.wait(self.args.speak):
+            self.spoken.append(item)
+
+    def stop_speaking(self):
+        self._interrupt.set()
+
+
+def latencies(script, stubs):
+    values = [stubs.first_audio[c] - script.asked[c] for c in script.asked if c in stubs.first_audio]
+    return {'first_audio_mean': sum(values) / len(values), 'first_audio_max': max(values)}
+
+
+def run_serial(args, times):
+    script, stubs = Script(times), Stubs(args)
+    start = time.perf_counter()
+    answered = 0
+    while answered < len(times):
+        command = script.listen()
+        if not command:
+            continue
+        for sentence in stubs.respond(command):
+            stubs.speak(sentence)
+        answered += 1
+    result = latencies(script, stubs)
+    result['total'] = time.perf_counter() - start
+    return result
+
+
+def run_pipeline(args, times, barge_in=False):
+    script, stubs = Script(times), Stubs(args)
+    pipeline = None
+
+    def respond(command):
+        if command == f"вопрос {len(times)}":
+            pipeline.stop_after_reply()
+        return stubs.respond(command)
+
+    pipeline = ConversationPipeline(script.listen, respond, stubs.speak, stop_speaking=stubs.stop_speaking,
+                                    barge_in=barge_in, queue_size=len(times))
+    start = time.perf_counter()
+    asyncio.run(pipeline.run())
+    result = latencies(script, stubs)
+    result['total'] = time.perf_counter() - start
+    result['cancelled'] = pipeline.cancelled
+    result['sentences_spoken'] = len(stubs.spoken)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвейер asyncio против последовательного цикла")
+    parser.add_argument('--commands', type=int, default=6)
+    parser.add_argument('--interval', type=float, default=2.0, help="Пауза между вопросами, сек")
+    parser.add_argument('--first-token', type=float, default=0.4)
+    parser.add_argument('--sentences', type=int, default=3)
+    parser.add_argument('--per-sentence', type=float, default=0.3, help="Генерация предложения, сек")
+    parser.add_argument('--speak', type=float, default=0.6, help="Проигрывание предложения, сек")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    times = [i * args.interval for i in range(args.commands)]
+    result = {
+        'serial': run_serial(args, times),
+        'pipeline': run_pipeline(args, times)
+    }
+    # Barge-in: второй вопрос через секунду после первого, посреди ответа
+    result['barge_in'] = run_pipeline(args, [0.0, args.first_token + 1.0], barge_in=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for name, title in (('serial', "Последовательно"), ('pipeline', "Конвейер")):
+        r = result[name]
+        print(f"{title:>16}: первый звук {r['first_audio_mean'] * 1000:.0f} мс "
+              f"(макс {r['first_audio_max'] * 1000:.0f}), всего {r['total']:.1f} с")
+    r = result['barge_in']
+    print(f"{'Barge-in':>16}: отменено ходов {r['cancelled']}, сказано предложений {r['sentences_spoken']} "
+          f"из {2 * args.sentences}, первый звук {r['first_audio_mean'] * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Время до первого сэмпла: файл + процесс-проигрыватель против потокового
+проигрывания в памяти.
+
+    файл:   синтез целиком -> временный файл -> новый процесс играет файл
+            (как было: edge_tts save + powershell; здесь процесс - пустой
+            python, то есть нижняя оценка стоимости запуска)
+    поток:  куски синтеза декодируются и сразу пишутся в открытый выход
+
+Синтез по умолчанию - заглушка StubTTSBackend (PCM, первый кусок через
+--synth-delay), выход - NullSink со скоростью звука, так что звуковая
+карта не нужна. --edge - настоящий edge-tts (сеть, MP3, нужен av),
+--output file.wav - записать сыгранное потоком.
+
+Пример:
+    python benchmarks/playback_ttfs.py --runs 10 --synth-delay 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.audio_sink import NullSink, open_sink
+from arkady.playback import StreamingPlayer
+from arkady.tracing import Histogram
+from arkady.tts_cache import EdgeTTSBackend, StubTTSBackend
+
+VOICE = ("ru-RU-DmitryNeural", "+20%", "+100%", "-38Hz")
+
+SENTENCES = [
+    "Слышь, братан, ну ты и вопрос задал.",
+    "Короче, сейчас объясню по-нашему, по-простому, без всяких там заумных слов.",
+    "Давай, спрашивай еще, я тут весь день на лавочке сижу.",
+]
+
+
+async def via_file(backend, text):
+    """Старый путь: первый звук - только после файла и запуска процесса"""
+    started = time.perf_counter()
+    data = await backend.synthesize(text, *VOICE)
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.' + backend.format) as tmp:
+        tmp.write(data)
+    subprocess.run([sys.executable, '-c', 'pass'], check=False)
+    first_sample = time.perf_counter() - started
+    os.remove(tmp.name)
+    return first_sample
+
+
+async def via_stream(player, backend, text):
+    result = await player.play(backend.stream(text, *VOICE), fmt=backend.format)
+    return result['first_sample']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время до первого сэмпла: файл vs поток")
+    parser.add_argument('--runs', type=int, default=5, help="Проходов по всем фразам")
+    parser.add_argument('--synth-delay', type=float, default=0.25, help="Задержка первого куска, сек")
+    parser.add_argument('--per-char', type=float, default=0.004, help="Синтез на символ, сек")
+    parser.add_argument('--edge', action='store_true', help="Настоящий edge-tts вместо заглушки")
+    parser.add_argument('--output', default=None, help="Выход потока: null (по умолчанию), speaker, file.wav")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    backend = EdgeTTSBackend() if args.edge else StubTTSBackend(delay=args.synth_delay, per_char=args.per_char)
+    sink = open_sink(args.output) if args.output else NullSink(realtime=True)
+    player = StreamingPlayer(sink)
+    file_path, stream = Histogram(), Histogram()
+
+    async def run():
+        for _ in range(args.runs):
+            for text in SENTENCES:
+                file_path.observe(await via_file(backend, text))
+                stream.observe(await via_stream(player, backend, text))
+
+    try:
+        asyncio.run(run())
+    finally:
+        player.close()
+
+    result = {
+        'file': file_path.summary(),
+        'stream': stream.summary(),
+        'audio_seconds': sink.audio_seconds,
+        'backend': 'edge' if args.edge else 'stub'
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"\n{'путь':<8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, title in (('file', 'файл'), ('stream', 'поток')):
+        s = result[name]
+        print(f"{title:<8} {s['p50'] * 1000:>6.0f} мс {s['p95'] * 1000:>6.0f} мс {s['p99'] * 1000:>6.0f} мс")
+    print(f"\nСыграно потоком: {result['audio_seconds']:.1f} с звука")
+
+
+if __name__ == "__main__":
+    main()
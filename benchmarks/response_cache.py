@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Кэш ответов на повторяющиеся вопросы: поток киоска, где одни и те же
+вопросы звучат в разных формулировках ("Аркадий, который час?",
+"ну который час"). Сравнивается время ответа с кэшем и без.
+
+Как в настоящем цикле, история сама не чистится: посетитель задает
+вопрос и, бывает, пару уточнений ("а почему?") - они зависят от
+разговора и в кэш не идут. Между посетителями - тишина дольше
+--conversation-timeout, и ArkadyAI начинает разговор заново.
+
+Пример:
+    python benchmarks/response_cache.py --visitors 30 --first-token 0.3 --stemming
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.response_cache import ResponseCache
+from arkady.text_generation import ArkadyAI
+from mock_ollama import MockOllamaServer
+
+VARIANTS = [
+    ["Что делать если скучно?", "ну что делать, если скучно", "Аркадий, что делать если скучно!"],
+    ["Где поесть недорого?", "слушай, где поесть недорого?"],
+    ["Как пройти к вокзалу?", "Аркаша, как пройти к вокзалу", "как пройти к вокзалу, пожалуйста"],
+    ["Какая завтра погода?", "какая завтра погода, браток"],
+    ["Расскажи анекдот", "Расскажи анекдоты"],
+]
+FOLLOW_UPS = ["а почему?", "а еще что?", "серьезно?", "и что потом?"]
+
+
+def run(server, visitors, cache, timeout):
+    ai = ArkadyAI(ollama_url=server.url, warm_up=False, use_context=False, cache=cache,
+                  conversation_timeout=timeout)
+    latencies = []
+    for questions in visitors:
+        for question in questions:
+            start = time.perf_counter()
+            ai.generate_response(question)
+            latencies.append(time.perf_counter() - start)
+        # Посетитель ушел, следующий подходит не сразу
+        time.sleep(timeout * 1.5)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Кэш ответов на повторяющиеся вопросы")
+    parser.add_argument('--visitors', type=int, default=30)
+    parser.add_argument('--follow-ups', type=float, default=0.4, help="Вероятность каждого уточнения (до двух)")
+    parser.add_argument('--conversation-timeout', type=float, default=0.05, help="Тишина до нового разговора, сек")
+    parser.add_argument('--first-token', type=float, default=0.3, help="Задержка первого токена, сек")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--stemming', action='store_true', help="Грубый стемминг ключа (анекдот/анекдоты)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    visitors = []
+    for _ in range(args.visitors):
+        questions = [rng.choice(rng.choice(VARIANTS))]
+        while len(questions) < 3 and rng.random() < args.follow_ups:
+            questions.append(rng.choice(FOLLOW_UPS))
+        visitors.append(questions)
+    questions = sum(visitors, [])
+
+    server = MockOllamaServer(first_token_delay=args.first_token, token_rate=100).start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # "Новый собеседник" на каждого
+            plain = run(server, visitors, None, args.conversation_timeout)
+            cache = ResponseCache(stemming=args.stemming)
+            cached = run(server, visitors, cache, args.conversation_timeout)
+    finally:
+        server.stop()
+
+    result = {
+        'visitors': len(visitors),
+        'questions': len(questions),
+        'plain_mean': sum(plain) / len(plain),
+        'cached_mean': sum(cached) / len(cached),
+        'cache': cache.stats()
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    stats = result['cache']
+    print(f"Без кэша:  {result['plain_mean'] * 1000:.0f} мс на ответ")
+    print(f"С кэшем:   {result['cached_mean'] * 1000:.0f} мс на ответ")
+    print(f"\nПосетителей {len(visitors)}, вопросов {len(questions)}")
+    print(f"Попаданий: {stats['hits']}/{len(questions)} ({stats['hits'] / len(questions):.0%} вопросов), "
+          f"записей {stats['entries']}, сэкономлено {stats['saved_seconds']:.1f}с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Сколько сессий держит сервер Аркадия на ядро при целевой задержке.
+
+Сервер (arkady/server.py) работает с заглушкой Ollama, клиенты - по
+WebSocket текстом. Каждый клиент задает --turns вопросов с паузой
+--think сек ("пользователь слушает ответ и думает"). Число сессий растет
+по --sessions; на каждом уровне - p50/p95 задержки до первого предложения,
+ожидание в очереди к LLM и загрузка CPU процесса (в ядрах).
+
+Итог: самый большой уровень, где p95 <= --target, и сколько таких сессий
+пришлось бы на одно полностью занятое ядро. CPU считается по всему
+процессу - вместе с заглушкой и клиентами, так что оценка с запасом.
+
+Пример:
+    python benchmarks/server_sessions.py --sessions 1,4,8,16,32 --llm-limit 4 --target 1.0
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.server import SessionServer
+from arkady.tracing import Histogram
+from mock_ollama import MockOllamaServer
+
+QUESTIONS = [
+    "Как дела, Аркадий?", "Что делать если скучно?", "А где ты живешь?",
+    "Посоветуй что-нибудь поесть", "Как найти работу?", "Что думаешь про погоду?",
+    "Есть у тебя друзья?", "Расскажи анекдот", "Сколько тебе лет?", "Где взять денег?",
+]
+
+
+async def client(url, turns, think, rng, first_sentence, queued):
+    from websockets.asyncio.client import connect
+    async with connect(url) as websocket:
+        json.loads(await websocket.recv())  # session
+        for _ in range(turns):
+            await asyncio.sleep(rng.uniform(0, think * 2))
+            started = time.perf_counter()
+            await websocket.send(json.dumps({'type': 'text', 'text': rng.choice(QUESTIONS)}))
+            first = None
+            while True:
+                message = json.loads(await websocket.recv())
+                if message['type'] == 'sentence' and first is None:
+                    first = time.perf_counter() - started
+                elif message['type'] == 'done':
+                    queued.observe(message['queued'])
+                    break
+            if first is not None:
+                first_sentence.observe(first)
+
+
+async def run_level(url, sessions, args):
+    first_sentence = Histogram()
+    queued = Histogram()
+    rng = random.Random(args.seed)
+    wall, cpu = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(client(url, args.turns, args.think, random.Random(rng.random()), first_sentence, queued)
+                           for _ in range(sessions)))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    summary = first_sentence.summary()
+    return {
+        'sessions': sessions,
+        'turns': summary['count'],
+        'first_sentence_p50': summary['p50'],
+        'first_sentence_p95': summary['p95'],
+        'queued_p95': queued.percentile(0.95),
+        'cpu_cores': cpu / wall
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сессий на ядро при целевой задержке")
+    parser.add_argument('--sessions', type=lambda s: [int(x) for x in s.split(',')], default=[1, 4, 8, 16, 32])
+    parser.add_argument('--turns', type=int, default=4, help="Вопросов на сессию")
+    parser.add_argument('--think', type=float, default=2.0, help="Средняя пауза между вопросами, сек")
+    parser.add_argument('--llm-limit', type=int, default=4, help="Одновременных генераций")
+    parser.add_argument('--target', type=float, default=1.0, help="Целевая p95 до первого предложения, сек")
+    parser.add_argument('--first-token', type=float, default=0.3, help="Первый токен заглушки, сек")
+    parser.add_argument('--token-rate', type=float, default=60.0, help="Токенов в секунду заглушки")
+    parser.add_argument('--cache', action='store_true', help="Общий кэш ответов (вопросы повторяются)")
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    mock = MockOllamaServer(first_token_delay=args.first_token, token_rate=args.token_rate).start()
+    # Без кэша каждый вопрос идет в модель - честная нагрузка на LLM
+    server = SessionServer(port=0, ollama_url=mock.url, llm_limit=args.llm_limit,
+                           max_sessions=max(args.sessions), cache=None if args.cache else False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        server.start()
+    try:
+        levels = [asyncio.run(run_level(server.url, sessions, args)) for sessions in args.sessions]
+    finally:
+        server.stop()
+        mock.stop()
+
+    passing = [level for level in levels if level['first_sentence_p95'] <= args.target]
+    best = passing[-1] if passing else None
+    result = {
+        'cores': os.cpu_count(),
+        'target': args.target,
+        'levels': levels,
+        'max_sessions': best['sessions'] if best else 0,
+        'sessions_per_core': best['sessions'] / max(best['cpu_cores'], 1e-3) if best else 0.0,
+        'server': server.stats()
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+    print(f"\n{'сессий':>7} {'ходов':>6} {'p50, мс':>8} {'p95, мс':>8} {'очередь p95':>12} {'CPU, ядер':>10}")
+    for level in levels:
+        mark = "✓" if level['first_sentence_p95'] <= args.target else "✗"
+        print(f"{level['sessions']:>7} {level['turns']:>6} {level['first_sentence_p50'] * 1000:>8.0f} "
+              f"{level['first_sentence_p95'] * 1000:>8.0f} {level['queued_p95'] * 1000:>10.0f}мс "
+              f"{level['cpu_cores']:>10.2f} {mark}")
+    llm = result['server']['llm']
+    print(f"\nLLM: одновременно до {llm['limit']}, в очереди до {llm['max_waiting']}, "
+          f"склеено одинаковых вопросов {llm['coalesced']}")
+    if result['server']['cache']:
+        print(f"Кэш ответов: {result['server']['cache']['hit_rate']:.0%} попаданий")
+    print(f"При p95 <= {args.target * 1000:.0f} мс: {result['max_sessions']} сессий; "
+          f"по CPU - до ~{result['sessions_per_core']:.0f} сессий на ядро ({result['cores']} ядер)")
+    print("Если задержка растет при низкой загрузке CPU - упор в очередь к LLM (--llm-limit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Время старта: стоимость импортов и инициализации компонентов,
+последовательный старт (как был initialize) против параллельного с
+проверкой LLM в фоне.
+
+Импорты мерятся в отдельных процессах (холодный кэш модулей).
+Компоненты:
+    мозги:  ArkadyAI против заглушки Ollama с холодной загрузкой --load-delay
+    слух:   SpeechRecognizer с моделью --model; если модель не грузится -
+            заглушка на --ears-delay сек
+    голос:  импорт arkady.speech_synthesis; если edge_tts нет - заглушка --voice-delay
+
+Пример:
+    python benchmarks/startup_time.py --load-delay 2.0 --model vosk-model-small-ru-0.22
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_ollama import MockOllamaServer
+
+MODULES = ['numpy', 'requests', 'vosk', 'pyaudio', 'sounddevice', 'edge_tts', 'main']
+
+
+def import_cost(module):
+    """Секунды на импорт модуля в свежем процессе или None, если его нет"""
+    code = ("import time; t = time.perf_counter(); import {}; "
+            "print(time.perf_counter() - t)").format(module)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+class Components:
+    def __init__(self, args, server_url):
+        self.args = args
+        self.server_url = server_url
+        self.timings = {}
+        self.stubbed = []
+
+    def _timed(self, name, func):
+        start = time.perf_counter()
+        result = func()
+        self.timings[name] = time.perf_counter() - start
+        return result
+
+    def brain(self, connect):
+        from arkady.text_generation import ArkadyAI
+        return self._timed('brain', lambda: ArkadyAI(ollama_url=self.server_url, connect=connect))
+
+    def ears(self):
+        def build():
+            from arkady.audio_source import GeneratorSource
+            from arkady.speech_recognition import SpeechRecognizer
+            try:
+                return SpeechRecognizer(self.args.model, audio_source=GeneratorSource([]))
+            except Exception:
+                self.stubbed.append('ears')
+                time.sleep(self.args.ears_delay)
+        return self._timed('ears', build)
+
+    def voice(self):
+        def build():
+            try:
+                import arkady.speech_synthesis
+            except ImportError:
+                self.stubbed.append('voice')
+                time.sleep(self.args.voice_delay)
+        return self._timed('voice', build)
+
+
+def run_serial(args, server):
+    parts = Components(args, server.url)
+    start = time.perf_counter()
+    parts.brain(connect=True)
+    parts.voice()
+    parts.ears()
+    ready = time.perf_counter() - start
+    return {'listening': ready, 'llm_ready': ready, 'components': parts.timings, 'stubbed': parts.stubbed}
+
+
+def run_concurrent(args, server):
+    parts = Components(args, server.url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        brain = executor.submit(parts.brain, False)
+        voice = executor.submit(parts.voice)
+        ears = executor.submit(parts.ears)
+        check = executor.submit(brain.result().connect)
+        voice.result()
+        ears.result()
+        listening = time.perf_counter() - start
+        check.result()
+        llm_ready = time.perf_counter() - start
+    return {'listening': listening, 'llm_ready': llm_ready, 'components': parts.timings, 'stubbed': parts.stubbed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время старта Аркадия")
+    parser.add_argument('--model', default=os.path.join(ROOT, "vosk-model-small-ru-0.22"))
+    parser.add_argument('--load-delay', type=float, default=2.0, help="Холодная загрузка LLM, сек")
+    parser.add_argument('--ears-delay', type=float, default=1.5, help="Заглушка загрузки Vosk, сек")
+    parser.add_argument('--voice-delay', type=float, default=0.3, help="Заглушка импорта edge_tts, сек")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    imports = {module: import_cost(module) for module in MODULES}
+
+    result = {'imports': imports}
+    for name, run in (('serial', run_serial), ('concurrent', run_concurrent)):
+        # Каждый сценарий - со своей холодной моделью
+        server = MockOllamaServer(load_delay=args.load_delay).start()
+        try:
+            result[name] = run(args, server)
+        finally:
+            server.stop()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print("\nИмпорт (свежий процесс):")
+    for module, cost in imports.items():
+        print(f"  {module:>12}: " + (f"{cost * 1000:.0f} мс" if cost is not None else "не установлен"))
+    for name, title in (('serial', "Последовательно"), ('concurrent', "Параллельно")):
+        r = result[name]
+        parts = ", ".join(f"{k} {v:.2f}с" for k, v in r['components'].items())
+        stubbed = f" (заглушки: {', '.join(r['stubbed'])})" if r['stubbed'] else ""
+        print(f"{title:>16}: слушает через {r['listening']:.2f}с, LLM готов через {r['llm_ready']:.2f}с"
+              f" [{parts}]{stubbed}")
+
+
+if __name__ == "__main__":
+    main()
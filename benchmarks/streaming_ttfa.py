@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Время до первого звука (TTFA): обычная генерация против потоковой
+с нарезкой на предложения. LLM - локальная заглушка Ollama, синтез -
+заглушка с задержкой base + per_char * len(text).
+
+    обычная:  generate_response() целиком -> синтез всего ответа
+    поток:    первое предложение из generate_response_stream() -> его синтез
+
+Пример:
+    python benchmarks/streaming_ttfa.py --runs 5 --first-token 0.3 --token-rate 25
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.text_generation import ArkadyAI
+from mock_ollama import MockOllamaServer
+
+
+def synth_latency(text, base, per_char):
+    """Модель задержки синтеза"""
+    return base + per_char * len(text)
+
+
+def run_blocking(ai, question, base, per_char):
+    start = time.perf_counter()
+    response = ai.generate_response(question)
+    return time.perf_counter() - start + synth_latency(response, base, per_char)
+
+
+def run_streaming(ai, question, base, per_char):
+    start = time.perf_counter()
+    ttfa = None
+    for sentence in ai.generate_response_stream(question):
+        if ttfa is None:
+            ttfa = time.perf_counter() - start + synth_latency(sentence, base, per_char)
+        # Остальные предложения синтезируются, пока играет первое
+    return ttfa
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTFA: обычная vs потоковая генерация")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--first-token', type=float, default=0.3, help="Задержка первого токена, сек")
+    parser.add_argument('--token-rate', type=float, default=25.0, help="Токенов в секунду")
+    parser.add_argument('--synth-base', type=float, default=0.25, help="Базовая задержка синтеза, сек")
+    parser.add_argument('--synth-per-char', type=float, default=0.004, help="Синтез, сек на символ")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    server = MockOllamaServer(first_token_delay=args.first_token, token_rate=args.token_rate).start()
+    try:
+        ai = ArkadyAI(ollama_url=server.url)
+        question = "Что делать если скучно?"
+        blocking = [run_blocking(ai, question, args.synth_base, args.synth_per_char) for _ in range(args.runs)]
+        ai.clear_history()
+        streaming = [run_streaming(ai, question, args.synth_base, args.synth_per_char) for _ in range(args.runs)]
+    finally:
+        server.stop()
+
+    result = {
+        'blocking_ttfa': sum(blocking) / len(blocking),
+        'streaming_ttfa': sum(streaming) / len(streaming),
+        'runs': args.runs
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"\nTTFA обычная:  {result['blocking_ttfa'] * 1000:.0f} мс")
+    print(f"TTFA поток:    {result['streaming_ttfa'] * 1000:.0f} мс "
+          f"(x{result['blocking_ttfa'] / result['streaming_ttfa']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
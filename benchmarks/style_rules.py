@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Правила стиля: цепочка str.replace + split/join (как было) против правил
+из файла (arkady/style_rules.py): проверка "слово in текст", шаблон - только
+если слово нашлось, вставки срезами.
+
+    длинный текст  ответ заглушки, повторенный --repeat раз: clean_response
+                   (только замены) и process_response (замены + вставки)
+    фрагменты      тот же текст предложениями, как в потоковом ответе:
+                   process_sentence(first=...) на каждое
+    перечитывание  сколько стоит компиляция правил после правки файла
+
+Случайность фиксирована (--seed), так что оба варианта делают одинаковое
+количество вставок.
+
+Пример:
+    python benchmarks/style_rules.py --repeat 50 --iterations 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.personality import ArkadyPersonality
+from arkady.sentences import split_sentences
+from arkady.style_rules import StyleRules
+from mock_ollama import DEFAULT_ANSWER
+
+
+class LegacyStyle:
+    """Прежняя обработка: шесть replace подряд и вставки через split/join"""
+
+    def __init__(self, personality):
+        self.p = personality
+        self.jargon_phrases = personality.style.jargon['phrases']
+        self.fillers = personality.style.filler['phrases']
+
+    def clean_response(self, text):
+        response = text.replace("Пожалуйста", "")
+        response = response.replace("Извините", "")
+        response = response.replace("Спасибо", "")
+        response = response.replace("Хорошо", "Ладно")
+        response = response.replace("Отлично", "Нормально")
+        response = response.replace("Замечательно", "Годно")
+        return response
+
+    def process_response(self, text):
+        text = self.clean_response(text)
+        if random.random() < 0.3:
+            jargon = random.choice(self.jargon_phrases)
+            text = text + ", " + jargon if not text.endswith('.') else text[:-1] + ", " + jargon + "."
+        if random.random() < 0.4:
+            text = random.choice(self.fillers) + ", " + text.lower()
+        if random.random() < self.p.swear_probability:
+            if random.random() < 0.6:
+                words = text.split()
+                if len(words) > 2:
+                    words.insert(random.randint(1, len(words) - 1), random.choice(self.p.swear_words))
+                    text = " ".join(words)
+                else:
+                    text = random.choice(self.p.swear_words) + ", " + text
+            elif random.random() < 0.5:
+                text = random.choice(self.p.swear_phrases) + ", " + text.lower()
+            else:
+                text = text + ", " + random.choice(self.p.swear_phrases)
+        return text
+
+    def process_sentence(self, sentence, first=False):
+        return self.process_response(sentence) if first else self.clean_response(sentence)
+
+
+def bench(func, iterations, seed):
+    random.seed(seed)
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (time.perf_counter() - started) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Правила стиля: цепочка replace vs правила из файла")
+    parser.add_argument('--repeat', type=int, default=50, help="Длина длинного текста в ответах заглушки")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=3)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    personality = ArkadyPersonality()
+    variants = {'legacy': LegacyStyle(personality), 'rules': personality}
+    long_text = " ".join([DEFAULT_ANSWER] * args.repeat)
+    fragments = split_sentences(long_text)
+
+    result = {'chars': len(long_text), 'fragments': len(fragments)}
+    for name, style in variants.items():
+        clean = bench(lambda i: style.clean_response(long_text), args.iterations, args.seed)
+        process = bench(lambda i: style.process_response(long_text), args.iterations, args.seed)
+        stream = bench(lambda i: [style.process_sentence(s, first=j == 0) for j, s in enumerate(fragments)],
+                       max(args.iterations // 10, 1), args.seed)
+        result[name] = {
+            'clean_us': clean * 1e6,
+            'process_us': process * 1e6,
+            'process_mb_s': len(long_text.encode('utf-8')) / process / 1e6,
+            'stream_us_per_fragment': stream / len(fragments) * 1e6
+        }
+
+    rules = StyleRules()
+    started = time.perf_counter()
+    for _ in range(100):
+        rules.load()
+    result['reload_ms'] = (time.perf_counter() - started) / 100 * 1000
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"\nДлинный текст: {result['chars']} символов, {result['fragments']} фрагментов")
+    print(f"\n{'вариант':<10} {'clean':>10} {'process':>10} {'МБ/с':>7} {'фрагмент':>10}")
+    for name, title in (('legacy', 'цепочка'), ('rules', 'правила')):
+        r = result[name]
+        print(f"{title:<10} {r['clean_us']:>7.0f} мкс {r['process_us']:>6.0f} мкс {r['process_mb_s']:>7.1f} "
+              f"{r['stream_us_per_fragment']:>6.1f} мкс")
+    print(f"\nПеречитывание правил: {result['reload_ms']:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
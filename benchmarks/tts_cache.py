@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Кэш синтеза речи: задержка до звука для постоянных и новых фраз.
+
+Синтез - заглушка StubTTSBackend (--synth-delay + --per-char на символ),
+так что сеть и edge-tts не нужны. "День" из --utterances реплик: доля
+--static - постоянные фразы (приветствия, напоминания, прощания,
+заготовки), остальное - новые предложения LLM.
+
+Режимы:
+    без кэша       каждая фраза синтезируется заново (как было)
+    кэш            синтез при первом промахе, дальше - с диска
+    кэш + заготовка  постоянные фразы синтезируются при запуске
+
+Отдельно - сколько занимает восстановление индекса при запуске,
+когда в каталоге --index-files файлов.
+
+Пример:
+    python benchmarks/tts_cache.py --utterances 120 --static 0.4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.personality import ArkadyPersonality
+from arkady.tracing import Histogram
+from arkady.tts_cache import TTSCache, CachedSynthesizer, StubTTSBackend, static_phrases
+from mock_ollama import DEFAULT_ANSWER
+
+VOICE = ("ru-RU-DmitryNeural", "+20%", "+100%", "-38Hz")
+
+
+def day(utterances, static_share, seed):
+    """Реплики дня: постоянные фразы и уникальные предложения LLM"""
+    rng = random.Random(seed)
+    phrases = static_phrases(ArkadyPersonality())
+    words = DEFAULT_ANSWER.split()
+    result = []
+    for i in range(utterances):
+        if rng.random() < static_share:
+            result.append((True, rng.choice(phrases)))
+        else:
+            rng.shuffle(words)
+            result.append((False, " ".join(words[:rng.randint(6, 14)]) + f" ({i})"))
+    return result
+
+
+async def run_mode(script, backend, synthesizer=None, presynthesize=False):
+    static, fresh = Histogram(), Histogram()
+    prepared = 0.0
+    if presynthesize:
+        started = time.perf_counter()
+        await synthesizer.presynthesize(static_phrases(ArkadyPersonality()), *VOICE)
+        prepared = time.perf_counter() - started
+    for is_static, text in script:
+        started = time.perf_counter()
+        if synthesizer:
+            await synthesizer.synthesize(text, *VOICE)
+        else:
+            await backend.synthesize(text, *VOICE)
+        (static if is_static else fresh).observe(time.perf_counter() - started)
+    return {
+        'static_p50': static.percentile(0.5),
+        'static_p95': static.percentile(0.95),
+        'fresh_p50': fresh.percentile(0.5),
+        'presynthesis_seconds': prepared,
+        'backend_calls': backend.calls,
+        'cache': synthesizer.cache.stats() if synthesizer else None
+    }
+
+
+def index_load(files):
+    """Время восстановления индекса из каталога с files файлами"""
+    directory = tempfile.mkdtemp(prefix="tts-index-")
+    try:
+        for i in range(files):
+            with open(os.path.join(directory, f"{i:064x}.mp3"), 'wb') as f:
+                f.write(b"ID3" * 100)
+        started = time.perf_counter()
+        cache = TTSCache(directory)
+        return {'files': files, 'entries': len(cache._index), 'seconds': time.perf_counter() - started}
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Кэш синтеза речи")
+    parser.add_argument('--utterances', type=int, default=120)
+    parser.add_argument('--static', type=float, default=0.4, help="Доля постоянных фраз")
+    parser.add_argument('--synth-delay', type=float, default=0.25, help="Задержка синтеза, сек")
+    parser.add_argument('--per-char', type=float, default=0.002, help="Добавка на символ, сек")
+    parser.add_argument('--index-files', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    script = day(args.utterances, args.static, args.seed)
+    stub = lambda: StubTTSBackend(delay=args.synth_delay, per_char=args.per_char)
+    directory = tempfile.mkdtemp(prefix="tts-cache-")
+    try:
+        plain_backend = stub()
+        result = {'no_cache': asyncio.run(run_mode(script, plain_backend))}
+        backend = stub()
+        result['cache'] = asyncio.run(run_mode(script, backend, CachedSynthesizer(
+            backend, TTSCache(os.path.join(directory, "a")))))
+        backend = stub()
+        result['presynthesized'] = asyncio.run(run_mode(script, backend, CachedSynthesizer(
+            backend, TTSCache(os.path.join(directory, "b"))), presynthesize=True))
+    finally:
+        shutil.rmtree(directory)
+    result['index_load'] = index_load(args.index_files)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    titles = {'no_cache': "без кэша", 'cache': "кэш", 'presynthesized': "кэш + заготовка"}
+    print(f"\n{'режим':<17} {'постоянные p50':>15} {'p95':>7} {'новые p50':>10} {'синтезов':>9} {'попадания':>10}")
+    for name, title in titles.items():
+        r = result[name]
+        hit_rate = f"{r['cache']['hit_rate']:.0%}" if r['cache'] else "-"
+        print(f"{title:<17} {r['static_p50'] * 1000:>12.1f} мс {r['static_p95'] * 1000:>7.1f} "
+              f"{r['fresh_p50'] * 1000:>7.0f} мс {r['backend_calls']:>9} {hit_rate:>10}")
+    print(f"\nЗаготовка при запуске: {result['presynthesized']['presynthesis_seconds']:.2f} с (в фоне)")
+    load = result['index_load']
+    print(f"Индекс из {load['files']} файлов: {load['seconds'] * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Replay-бенчмарк VAD-гейта перед AcceptWaveform.
+
+Прогоняет WAV через полный распознаватель дважды: без гейта и с
+VoiceActivityDetector. Показывает долю отброшенного аудио, сэкономленное
+процессорное время и совпадение итоговых текстов.
+
+Пример:
+    python benchmarks/vad_replay.py records/*.wav --block 512
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vosk
+from arkady.audio_source import WavFileSource
+from arkady.vad import VoiceActivityDetector
+
+
+def read_wav(path):
+    """Читает WAV целиком, возвращает (pcm_bytes, sample_rate)"""
+    with WavFileSource(path, block_size=1 << 20) as source:
+        return b''.join(source), source.sample_rate
+
+
+def transcribe(model, pcm, rate, block_size, vad=None):
+    """Возвращает (текст, cpu секунд на распознавание + VAD)"""
+    rec = vosk.KaldiRecognizer(model, rate)
+    texts = []
+    step = block_size * 2
+
+    start = time.process_time()
+    for offset in range(0, len(pcm), step):
+        data = pcm[offset:offset + step]
+        for block in (vad.process(data) if vad else [data]):
+            if rec.AcceptWaveform(block):
+                texts.append(json.loads(rec.Result()).get('text', ''))
+    texts.append(json.loads(rec.FinalResult()).get('text', ''))
+    cpu = time.process_time() - start
+
+    return " ".join(t for t in texts if t), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay-бенчмарк VAD-гейта")
+    parser.add_argument('files', nargs='+', help="WAV файлы (16 бит, моно)")
+    parser.add_argument('--model', default="vosk-model-small-ru-0.22")
+    parser.add_argument('--block', type=int, default=512, help="Размер блока в сэмплах")
+    parser.add_argument('--json', action='store_true', help="Вывод в JSON")
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(args.model)
+    rows = []
+
+    for path in args.files:
+        pcm, rate = read_wav(path)
+        plain_text, plain_cpu = transcribe(model, pcm, rate, args.block)
+        vad = VoiceActivityDetector(sample_rate=rate)
+        gated_text, gated_cpu = transcribe(model, pcm, rate, args.block, vad)
+        rows.append({
+            'file': path,
+            'duration': len(pcm) / 2 / rate,
+            'skipped_fraction': vad.skipped_fraction,
+            'cpu_plain': plain_cpu,
+            'cpu_gated': gated_cpu,
+            'same_text': plain_text == gated_text,
+            'text_plain': plain_text,
+            'text_gated': gated_text
+        })
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'файл':<32} {'длит.':>6} {'пропущено':>9} {'cpu без':>8} {'cpu с VAD':>9} {'текст':>6}")
+    for row in rows:
+        print(f"{os.path.basename(row['file']):<32} {row['duration']:>6.1f} "
+              f"{row['skipped_fraction'] * 100:>8.0f}% {row['cpu_plain']:>8.2f} "
+              f"{row['cpu_gated']:>9.2f} {'=' if row['same_text'] else '≠':>6}")
+
+    total = sum(r['duration'] for r in rows)
+    skipped = sum(r['duration'] * r['skipped_fraction'] for r in rows)
+    plain = sum(r['cpu_plain'] for r in rows)
+    gated = sum(r['cpu_gated'] for r in rows)
+    print(f"\nВсего {total:.1f} сек, отброшено {skipped / total * 100 if total else 0:.0f}%, "
+          f"CPU {plain:.2f} → {gated:.2f} сек "
+          f"(экономия {(1 - gated / plain) * 100 if plain else 0:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Сравнение детекции wake-word на записанных WAV:
+старый путь (полный распознаватель, Result() по концу фразы, поиск подстроки)
+против WakeWordDetector (грамматика + PartialResult() на блоках по 0.1 сек).
+
+Задержка считается в аудио-времени от конца ключевого слова
+(по таймингам слов полного распознавателя) до момента срабатывания.
+
+Пример:
+    python benchmarks/wake_word_replay.py records/*.wav
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vosk
+from arkady.audio_source import WavFileSource
+from arkady.wake_word import WakeWordDetector, DEFAULT_WAKE_WORDS
+
+
+def read_wav(path):
+    """Читает WAV целиком, возвращает (pcm_bytes, sample_rate)"""
+    with WavFileSource(path, block_size=1 << 20) as source:
+        return b''.join(source), source.sample_rate
+
+
+def blocks(pcm, block_size):
+    step = block_size * 2
+    for offset in range(0, len(pcm), step):
+        yield pcm[offset:offset + step]
+
+
+def run_legacy(model, pcm, rate, wake_words, chunk=8000):
+    """Старый путь SpeechRecognizer: Result() + подстрока. Возвращает (время срабатывания, конец слова, cpu)"""
+    rec = vosk.KaldiRecognizer(model, rate)
+    rec.SetWords(True)
+    samples = 0
+    cpu = 0.0
+    detected_at = None
+    word_end = None
+
+    for data in blocks(pcm, chunk):
+        samples += len(data) // 2
+        start = time.process_time()
+        final = rec.AcceptWaveform(data)
+        result = json.loads(rec.Result()) if final else None
+        cpu += time.process_time() - start
+
+        if not result:
+            continue
+        for word in result.get('result', []):
+            if word_end is None and any(w in word['word'] for w in wake_words):
+                word_end = word['end']
+        if detected_at is None and any(w in result.get('text', '') for w in wake_words):
+            detected_at = samples / rate
+
+    if detected_at is None:
+        result = json.loads(rec.FinalResult())
+        for word in result.get('result', []):
+            if word_end is None and any(w in word['word'] for w in wake_words):
+                word_end = word['end']
+        if any(w in result.get('text', '') for w in wake_words):
+            detected_at = samples / rate
+
+    return detected_at, word_end, cpu
+
+
+def run_detector(model, pcm, rate, wake_words, block_size=1600):
+    """Новый путь: WakeWordDetector. Возвращает (время срабатывания, cpu)"""
+    detector = WakeWordDetector(model, wake_words, sample_rate=rate, block_size=block_size)
+    cpu = 0.0
+    for data in blocks(pcm, block_size):
+        start = time.process_time()
+        detection = detector.process(data)
+        cpu += time.process_time() - start
+        if detection:
+            return detection.audio_time, cpu
+    return None, cpu
+
+
+def fmt_ms(value):
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay-бенчмарк wake-word детекции")
+    parser.add_argument('files', nargs='+', help="WAV файлы (16 бит, моно)")
+    parser.add_argument('--model', default="vosk-model-small-ru-0.22")
+    parser.add_argument('--block', type=int, default=1600, help="Размер блока детектора в сэмплах")
+    parser.add_argument('--json', action='store_true', help="Вывод в JSON")
+    args = parser.parse_args()
+
+    vosk.SetLogLevel(-1)
+    model = vosk.Model(args.model)
+    wake_words = DEFAULT_WAKE_WORDS
+    rows = []
+
+    for path in args.files:
+        pcm, rate = read_wav(path)
+        legacy_at, word_end, legacy_cpu = run_legacy(model, pcm, rate, wake_words)
+        fast_at, fast_cpu = run_detector(model, pcm, rate, wake_words, args.block)
+        rows.append({
+            'file': path,
+            'duration': len(pcm) / 2 / rate,
+            'word_end': word_end,
+            'legacy_latency': None if legacy_at is None or word_end is None else legacy_at - word_end,
+            'detector_latency': None if fast_at is None or word_end is None else fast_at - word_end,
+            'legacy_cpu': legacy_cpu,
+            'detector_cpu': fast_cpu,
+        })
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'файл':<32} {'конец слова':>11} {'старый, мс':>10} {'детектор, мс':>12} {'cpu ст.':>8} {'cpu дет.':>8}")
+    for row in rows:
+        print(f"{os.path.basename(row['file']):<32} {fmt_ms(row['word_end']):>11} "
+              f"{fmt_ms(row['legacy_latency']):>10} {fmt_ms(row['detector_latency']):>12} "
+              f"{row['legacy_cpu']:>8.2f} {row['detector_cpu']:>8.2f}")
+
+    def mean(key):
+        values = [r[key] for r in rows if r[key] is not None]
+        return sum(values) / len(values) if values else None
+
+    print(f"\nСредняя задержка: старый {fmt_ms(mean('legacy_latency'))} мс, "
+          f"детектор {fmt_ms(mean('detector_latency'))} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import sys
 import time
+import random
 import signal
-from arkady.speech_recognition import SpeechRecognizer
-from arkady.speech_synthesis import HoboVoiceSynthesizer
-from arkady.text_generation import ArkadyAI
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+# vosk, pyaudio, requests и edge_tts импортируются в потоках инициализации
+from arkady.response_cache import ResponseCache
+from arkady.pipeline import ConversationPipeline
+from arkady import tracing
 
 class ArkadyBot:
     def __init__(self, swear_level='medium'):
@@ -14,7 +19,10 @@ class ArkadyBot:
         self.speech_recognizer = None
         self.voice_synthesizer = None
         self.ai_brain = None
+        self.pipeline = None
+        self.executor = None
         self.swear_level = swear_level
+        self.barge_in = os.environ.get('ARKADY_BARGE_IN', '') not in ('', '0')
         
         # Обработка Ctrl+C
         signal.signal(signal.SIGINT, self.signal_handler)
@@ -26,25 +34,30 @@ class ArkadyBot:
         sys.exit(0)
     
     def initialize(self):
-        """Инициализация всех компонентов"""
+        """Инициализация всех компонентов: параллельно, проверка LLM - в фоне"""
         print("🤖 Запуск Аркадия...")
         print("=" * 50)
         
+        started = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="arkady-init")
         try:
-            # 1. Инициализация ИИ
-            print("1️⃣  Подключение к мозгам...")
-            self.ai_brain = ArkadyAI(swear_intensity=self.swear_level)
+            # Загрузка модели Vosk, подключение к Ollama и голос не зависят друг от друга
+            brain = self.executor.submit(self.init_brain)
+            voice = self.executor.submit(self.init_voice)
+            ears = self.executor.submit(self.init_ears)
+            self.ai_brain = brain.result()
             
-            # 2. Инициализация синтеза речи
-            print("2️⃣  Настройка русского голоса...")
-            self.voice_synthesizer = HoboVoiceSynthesizer()
+            # Проверка Ollama и прогрев модели идут, пока грузится слух и бот уже слушает
+            self.executor.submit(self.connect_brain)
             
-            # 3. Инициализация распознавания речи
-            print("3️⃣  Настройка слуха...")
-            self.speech_recognizer = SpeechRecognizer()
+            self.voice_synthesizer = voice.result()
+            # Звук постоянных фраз синтезируется заранее, пока бот уже слушает
+            self.executor.submit(self.presynthesize)
+            self.speech_recognizer = ears.result()
+            self.ai_brain.commands.on_volume = self.set_volume
             
             print("=" * 50)
-            print("✅ Аркадий готов к работе!")
+            print(f"✅ Аркадий готов к работе! ({time.perf_counter() - started:.1f}с)")
             
             return True
             
@@ -52,6 +65,54 @@ class ArkadyBot:
             print(f"❌ Ошибка инициализации: {e}")
             return False
     
+    def init_brain(self):
+        """1. ИИ (тяжелые модули импортируются только здесь)"""
+        print("1️⃣  Подключение к мозгам...")
+        from arkady.text_generation import ArkadyAI
+        # Сколько Ollama держит модель в памяти между вопросами ("30m", "-1m" - всегда)
+        keep_alive = os.environ.get('ARKADY_KEEP_ALIVE', '30m')
+        # Кэш ответов на повторяющиеся вопросы; ARKADY_CACHE - файл для сохранения
+        cache = ResponseCache(path=os.environ.get('ARKADY_CACHE'))
+        # Несколько LLM-бэкендов (JSON-список {kind, url, model, tier}) - с хеджированием
+        llm_router = None
+        backends_path = os.environ.get('ARKADY_BACKENDS')
+        if backends_path:
+            from arkady.llm_backends import LLMRouter
+            llm_router = LLMRouter.from_file(backends_path)
+        # Киоск: после стольких секунд тишины разговор начинается заново (новый посетитель)
+        conversation_timeout = float(os.environ.get('ARKADY_CONVERSATION_TIMEOUT', '90'))
+        return ArkadyAI(swear_intensity=self.swear_level, keep_alive=keep_alive, cache=cache,
+                        connect=False, llm_router=llm_router, conversation_timeout=conversation_timeout)
+    
+    def connect_brain(self):
+        """Фоновая проверка Ollama: без нее работают локальные команды и заготовки"""
+        try:
+            self.ai_brain.connect()
+        except Exception as e:
+            print(f"⚠️  Мозги недоступны ({e}), отвечаю заготовками")
+    
+    def init_voice(self):
+        """2. Синтез речи"""
+        print("2️⃣  Настройка русского голоса...")
+        from arkady.speech_synthesis import HoboVoiceSynthesizer
+        return HoboVoiceSynthesizer()
+    
+    def presynthesize(self):
+        """Заготовка звука приветствий, напоминаний, прощаний и заготовок"""
+        from arkady.tts_cache import static_phrases
+        try:
+            count = self.voice_synthesizer.presynthesize(static_phrases(self.ai_brain.personality))
+            if count:
+                print(f"🔊 Заготовлено фраз: {count}")
+        except Exception as e:
+            print(f"⚠️  Не удалось заготовить фразы: {e}")
+    
+    def init_ears(self):
+        """3. Распознавание речи"""
+        print("3️⃣  Настройка слуха...")
+        from arkady.speech_recognition import SpeechRecognizer
+        return SpeechRecognizer()
+    
     def test_components(self):
         """Тест всех компонентов"""
         print("\n🧪 Тестирование компонентов...")
@@ -80,57 +141,36 @@ class ArkadyBot:
         self.main_loop()
     
     def main_loop(self):
-        """Главный цикл взаимодействия"""
+        """Главный цикл взаимодействия: слух, мозги и голос работают параллельно"""
         print("\n" + "=" * 50)
         print("🎤 Аркадий слушает...")
         print("Скажите 'Аркадий' чтобы активировать")
         print("Для выхода скажите 'пока' или нажмите Ctrl+C")
         print("=" * 50)
         
-        # Приветствие
-        greeting = self.ai_brain.get_greeting()
-        self.voice_synthesizer.speak(greeting)
-        
         # Запуск прослушивания
         self.speech_recognizer.start_listening()
         
+        self.pipeline = ConversationPipeline(
+            # Короткий таймаут - слушатель не держит поток при остановке
+            listen=lambda: self.speech_recognizer.wait_for_wake_word(timeout=1.0),
+            respond=self.respond,
+            # Конвейер ждет конца фразы; голос играет в своем потоке, слух не блокируется
+            speak=self.voice_synthesizer.speak_sync,
+            stop_speaking=self.voice_synthesizer.cancel_all,
+            idle_phrase=self.reminder,
+            on_turn=self.on_turn,
+            idle_timeout=30.0,
+            # Перебивать можно только со входом с эхоподавлением (гарнитура, AEC),
+            # иначе бот слышит себя - тогда на время речи слух глушится
+            barge_in=self.barge_in,
+            mute_listener=self.speech_recognizer.set_muted
+        )
+        
         try:
-            while self.running:
-                # Ждем активационное слово и команду
-                user_command = self.speech_recognizer.wait_for_wake_word(timeout=30)
-                
-                if user_command:
-                    print(f"👤 Пользователь: {user_command}")
-                    
-                    # Проверяем специальные команды
-                    special_response, should_exit = self.ai_brain.handle_special_commands(user_command)
-                    
-                    if special_response:
-                        self.voice_synthesizer.speak(special_response)
-                        
-                        if should_exit:
-                            print("👋 До свидания!")
-                            break
-                    else:
-                        # Генерируем обычный ответ
-                        response = self.ai_brain.generate_response(user_command)
-                        self.voice_synthesizer.speak(response)
-                
-                else:
-                    # Таймаут - напоминаем о себе
-                    if self.running:  # Проверяем что не завершаемся
-                        reminders = [
-                            "Я тут, браток",
-                            "Слушаю тебя, дорогуша", 
-                            "Говори, не стесняйся",
-                            "Че молчишь?"
-                        ]
-                        import random
-                        reminder = random.choice(reminders)
-                        self.voice_synthesizer.speak(reminder)
-                
-                # Небольшая пауза между циклами
-                time.sleep(0.1)
+            # Приветствие говорим уже внутри конвейера
+            asyncio.run(self.pipeline.run(initial=[self.ai_brain.get_greeting()]))
+            print("👋 До свидания!")
                 
         except KeyboardInterrupt:
             print("\nПрерывание пользователем")
@@ -139,22 +179,79 @@ class ArkadyBot:
         finally:
             self.shutdown()
     
+    def on_turn(self, turn):
+        """Новая команда: печать и метки трассировки"""
+        print(f"👤 Пользователь: {turn.command}")
+        endpoint = self.speech_recognizer.last_endpoint
+        if endpoint:
+            turn.trace.mark(tracing.AUDIO_CAPTURED, endpoint['activated_at'])
+            turn.trace.mark(tracing.ASR_FINAL, endpoint['decided_at'])
+    
+    def respond(self, command):
+        """Ответ на команду - предложения по мере генерации"""
+        # Проверяем специальные команды
+        special_response, should_exit = self.ai_brain.handle_special_commands(command)
+        if special_response:
+            if should_exit:
+                self.pipeline.stop_after_reply()
+            return [special_response]
+        
+        # Каждое готовое предложение сразу уходит в синтез, пока модель пишет следующее
+        return self.ai_brain.generate_response_stream(command)
+    
+    def set_volume(self, level):
+        """Громкость 0..100 из голосовой команды -> громкость edge-tts (-100%..+100%)"""
+        from arkady.speech_synthesis import edge_volume
+        self.voice_synthesizer.volume = edge_volume(level)
+    
+    def reminder(self):
+        """Таймаут - напоминаем о себе"""
+        return random.choice(self.ai_brain.personality.reminders)
+    
     def shutdown(self):
         """Корректное завершение работы"""
         print("🔄 Завершение работы...")
         
         self.running = False
         
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        
         if self.speech_recognizer:
             self.speech_recognizer.cleanup()
         
         if self.voice_synthesizer:
             self.voice_synthesizer.cleanup()
         
+        if self.ai_brain and self.ai_brain.cache:
+            stats = self.ai_brain.cache.stats()
+            print(f"💾 Кэш ответов: {stats['hits']} попаданий ({stats['hit_rate']:.0%}), "
+                  f"сэкономлено {stats['saved_seconds']:.1f}с")
+        
+        if self.voice_synthesizer and self.voice_synthesizer.synthesizer:
+            stats = self.voice_synthesizer.synthesizer.cache.stats()
+            print(f"🔊 Кэш голоса: {stats['hits']} попаданий ({stats['hit_rate']:.0%}), "
+                  f"{stats['entries']} фраз, {stats['bytes'] / 1e6:.1f} МБ")
+        
+        # Метрики задержек по ходам разговора
+        if tracing.tracer.enabled:
+            print("📊 Задержки:")
+            tracing.tracer.report()
+            metrics_path = os.environ.get('ARKADY_METRICS')
+            if metrics_path:
+                tracing.tracer.dump(metrics_path)
+                print(f"📊 Метрики сохранены в {metrics_path}")
+        
         print("✅ Аркадий отключен")
 
 def main():
     """Точка входа"""
+    # python main.py serve [...] - многосессионный сервер вместо микрофона
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from arkady.server import main as serve
+        serve(sys.argv[2:])
+        return
+
     print("🚀 Запуск голосового помощника 'Аркадий'")
     print("Версия: 2.0 (Русский Бомжара Edition)")
     print()
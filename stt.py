@@ -4,113 +4,187 @@
 Оптимизирован для работы на слабых ПК с минимальной задержкой
 """
 
-import queue
 import threading
 import numpy as np
-import sounddevice as sd
 import vosk
 import json
 import sys
-from collections import deque
 from time import time
+from arkady import vosk_models
+from arkady.vad import VoiceActivityDetector
+from arkady.audio_source import open_source
+from arkady.ring_buffer import Int16RingBuffer, PreRollBuffer
+from arkady.intents import LocalCommands, default_router
 
 class VoiceAssistant:
     def __init__(self, model_path="vosk-model-small-ru-0.22", wake_word="привет ассистент"):
-        # Инициализация модели Vosk (легковесная, работает оффлайн)
-        self.model = vosk.Model(model_path)
+        # Оптимизация: отключаем логирование Vosk для производительности
+        vosk.SetLogLevel(-1)
+        
+        # Модель Vosk из общего реестра процесса (легковесная, работает оффлайн)
+        self.model_path = model_path
+        self.model = vosk_models.get_model(model_path)
         self.wake_word = wake_word.lower()
         
+        # Локальные команды: один проход автомата вместо цепочки проверок подстрок
+        self.router = default_router(LocalCommands())
+        
         # Параметры аудио (оптимизированы для баланса качество/производительность)
         self.sample_rate = 16000  # Оптимальная частота для распознавания
         self.block_size = 512     # Малый размер блока для быстрого отклика
         self.channels = 1
         
-        # Очередь аудио с ограничением для предотвращения переполнения памяти
-        self.audio_queue = queue.Queue(maxsize=100)
+        # Кольцевой буфер int16 (~3.2 сек, как прежняя очередь на 100 блоков):
+        # callback пишет прямо в него, обработка читает memoryview без копий
+        self.ring = Int16RingBuffer(capacity=100 * self.block_size, max_read=self.block_size)
         
-        # Буфер для детекции wake-word (3 секунды)
-        self.wake_buffer = deque(maxlen=int(3 * self.sample_rate / self.block_size))
+        # Предзапись: последние 3 секунды аудио, поданного в wake_rec.
+        # После активации из нее берется все, что сказано сразу за wake-word
+        self.wake_buffer = PreRollBuffer(3.0, self.sample_rate)
+        self.wake_round_start = 0  # Позиция wake_buffer на момент Reset() wake_rec
         self.is_listening = False
         
-        # Распознаватели
-        self.wake_rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
-        self.main_rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        # Распознаватели из пула: создаются заранее и переиспользуются через Reset()
+        self.recognizer_pool = vosk_models.get_pool(model_path, self.sample_rate, prealloc=2)
+        self.wake_rec = self.recognizer_pool.acquire()
+        self.wake_rec.SetWords(True)  # Тайминги слов - чтобы найти конец wake-word
+        self.main_rec = None
         
-        # Оптимизация: отключаем логирование Vosk для производительности
-        vosk.SetLogLevel(-1)
+        # VAD: тишину не отдаем в Kaldi
+        self.vad = VoiceActivityDetector(sample_rate=self.sample_rate)
         
     def audio_callback(self, indata, frames, time_info, status):
         """Callback для захвата аудио (выполняется в отдельном потоке)"""
         if status:
             print(f"Ошибка аудио: {status}", file=sys.stderr)
         
-        # Копируем данные в очередь без блокировки
-        try:
-            self.audio_queue.put_nowait(indata.copy())
-        except queue.Full:
-            pass  # Пропускаем кадр при переполнении
+        # Конвертация float32 -> int16 прямо в кольцо, без аллокаций.
+        # При переполнении блок теряется, но это видно в self.ring.overruns
+        self.ring.write_float32(indata[:, 0])
     
     def process_audio(self):
         """Основной цикл обработки аудио"""
         while True:
             try:
-                # Получаем аудио с таймаутом для отзывчивости
-                audio_chunk = self.audio_queue.get(timeout=0.1)
+                # memoryview на блок прямо в кольце, без копирования
+                audio_block = self.ring.peek(self.block_size)
+                if audio_block is None:
+                    # Ждем callback с таймаутом для отзывчивости
+                    self.ring.wait(timeout=0.1)
+                    continue
                 
-                # Конвертируем в bytes для Vosk
-                audio_bytes = (audio_chunk * 32768).astype(np.int16).tobytes()
+                try:
+                    self.process_block(audio_block)
+                finally:
+                    # Блок, на котором упала обработка, тоже освобождаем - иначе
+                    # он читался бы снова и снова, а кольцо переполнялось
+                    self.ring.consume(self.block_size)
                 
-                if not self.is_listening:
-                    # Режим ожидания wake-word
-                    if self.wake_rec.AcceptWaveform(audio_bytes):
-                        result = json.loads(self.wake_rec.Result())
-                        text = result.get('text', '').lower()
-                        
-                        if self.wake_word in text:
-                            self.is_listening = True
-                            print("\n🎤 Слушаю...")
-                            # Сброс основного распознавателя
-                            self.main_rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
-                else:
-                    # Режим распознавания команды
-                    if self.main_rec.AcceptWaveform(audio_bytes):
-                        result = json.loads(self.main_rec.Result())
-                        text = result.get('text', '').strip()
-                        
-                        if text:
-                            print(f"📝 Распознано: {text}")
-                            self.process_command(text)
-                            self.is_listening = False
-                            print("💤 Жду wake-word...")
-                    else:
-                        # Проверяем промежуточный результат для отзывчивости
-                        partial = json.loads(self.main_rec.PartialResult())
-                        if partial.get('partial'):
-                            print(f"\r🔄 {partial['partial']}", end='', flush=True)
-                
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"Ошибка обработки: {e}", file=sys.stderr)
     
+    def process_block(self, audio_bytes):
+        """Обработка блока PCM int16 (bytes или memoryview) с микрофона или из AudioSource"""
+        # Тишину отбрасываем до AcceptWaveform
+        for block in self.vad.process(audio_bytes):
+            if not self.is_listening:
+                self.detect_wake_word(block)
+            else:
+                self.feed_command(block)
+    
+    def detect_wake_word(self, block):
+        """Режим ожидания wake-word"""
+        self.wake_buffer.append(block)
+        if not self.wake_rec.AcceptWaveform(vosk_models.waveform(block)):
+            return
+        
+        result = json.loads(self.wake_rec.Result())
+        text = result.get('text', '').lower()
+        if self.wake_word not in text:
+            return
+        
+        self.is_listening = True
+        print("\n🎤 Слушаю...")
+        # Берем готовый распознаватель из пула вместо создания нового
+        self.main_rec = self.recognizer_pool.acquire()
+        
+        # Команда, сказанная на одном дыхании с wake-word, уже в предзаписи:
+        # подаем в main_rec только то, что после wake-word
+        wake_end = self.find_wake_word_end(result.get('result', []))
+        tail = self.wake_buffer.since(wake_end) if wake_end is not None else b''
+        
+        self.wake_rec.Reset()
+        self.wake_round_start = self.wake_buffer.position
+        self.wake_buffer.clear()
+        
+        if tail:
+            self.feed_command(tail)
+    
+    def find_wake_word_end(self, words):
+        """Позиция конца wake-word в wake_buffer по таймингам слов (или None)"""
+        wake_tokens = self.wake_word.split()
+        tokens = [w.get('word', '').lower() for w in words]
+        for i in range(len(tokens) - len(wake_tokens) + 1):
+            if tokens[i:i + len(wake_tokens)] == wake_tokens:
+                end = words[i + len(wake_tokens) - 1]['end']
+                return self.wake_round_start + int(end * self.sample_rate)
+        return None
+    
+    def feed_command(self, block):
+        """Режим распознавания команды"""
+        if self.main_rec.AcceptWaveform(vosk_models.waveform(block)):
+            result = json.loads(self.main_rec.Result())
+            text = result.get('text', '').strip()
+            
+            if text:
+                print(f"📝 Распознано: {text}")
+                self.process_command(text)
+                self.recognizer_pool.release(self.main_rec)
+                self.main_rec = None
+                self.is_listening = False
+                print("💤 Жду wake-word...")
+        else:
+            # Проверяем промежуточный результат для отзывчивости
+            partial = json.loads(self.main_rec.PartialResult())
+            if partial.get('partial'):
+                print(f"\r🔄 {partial['partial']}", end='', flush=True)
+    
+    def run_source(self, source):
+        """Обработка из AudioSource (WAV, PCM-пайп, генератор) без микрофона"""
+        with source:
+            for audio_bytes in source:
+                self.process_block(audio_bytes)
+        
+        rtf = source.wall_seconds / source.audio_seconds if source.audio_seconds else 0.0
+        print(f"📊 Обработано {source.audio_seconds:.1f} сек аудио за "
+              f"{source.wall_seconds:.2f} сек (RTF {rtf:.3f})")
+    
     def process_command(self, text):
         """Обработка распознанной команды"""
-        # Здесь добавьте логику обработки команд
-        if "время" in text or "который час" in text:
-            from datetime import datetime
-            print(f"⏰ Сейчас {datetime.now().strftime('%H:%M')}")
-        elif "стоп" in text or "выход" in text:
+        routed = self.router.handle(text)
+        if routed is None:
+            print(f"❓ Команда не распознана: {text}")
+            return
+        response, intent = routed
+        print(f"💬 {response}")
+        if intent.terminal:
             print("👋 До свидания!")
             self.stop()
-        else:
-            print(f"❓ Команда не распознана: {text}")
     
-    def start(self):
+    def start(self, source=None):
         """Запуск голосового помощника"""
         print(f"🚀 Голосовой помощник запущен")
         print(f"🔊 Wake-word: '{self.wake_word}'")
         print(f"💤 Жду wake-word...")
         
+        if source is not None:
+            # Воспроизведение без микрофона
+            self.run_source(source)
+            return
+        
+        # sounddevice нужен только для микрофона - на headless машине не импортируем
+        import sounddevice as sd
+        
         # Запуск аудио потока
         with sd.InputStream(
             samplerate=self.sample_rate,
@@ -124,6 +198,12 @@ class VoiceAssistant:
     
     def stop(self):
         """Остановка помощника"""
+        stats = self.recognizer_pool.stats()
+        print(f"📊 Пул распознавателей: попаданий {stats['hits']}, промахов {stats['misses']}")
+        print(f"📊 VAD: пропущено {self.vad.skipped_fraction * 100:.0f}% аудио")
+        ring = self.ring.stats()
+        print(f"📊 Аудио-буфер: переполнений {ring['overruns']} "
+              f"({ring['dropped_samples']} сэмплов), опустошений {ring['underruns']}")
         sys.exit(0)
 
 # Быстрая инициализация и запуск
@@ -134,7 +214,11 @@ if __name__ == "__main__":
             model_path="vosk-model-small-ru-0.22",  # Используйте small модель для скорости
             wake_word="аркаша"  # Можно изменить на любое слово
         )
-        assistant.start()
+        # python stt.py record.wav  или  arecord -f S16_LE -r 16000 | python stt.py -
+        source = None
+        if len(sys.argv) > 1:
+            source = open_source(sys.argv[1], sample_rate=assistant.sample_rate, block_size=assistant.block_size)
+        assistant.start(source)
         
     except KeyboardInterrupt:
         print("\n👋 Остановлено пользователем")
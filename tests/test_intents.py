@@ -0,0 +1,62 @@
+"""
+Локальный маршрутизатор команд (arkady/intents.py): команда срабатывает,
+только если она - вся фраза (кроме паразитов и аргументов вроде чисел).
+
+Запуск:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.intents import LocalCommands, default_router
+
+
+class DefaultRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.volumes = []
+        commands = LocalCommands(on_volume=self.volumes.append)
+        self.router = default_router(commands)
+
+    def route(self, text):
+        match = self.router.match(text)
+        return match.name if match else None
+
+    def test_commands(self):
+        cases = [
+            ("Аркаша, который час?", 'time'),
+            ("а какая дата сегодня", 'date'),
+            ("что ты умеешь", 'help'),
+            ("ну всё, пока, Аркадий", 'exit'),
+            ("стоп", 'exit'),
+            ("повтори пожалуйста", 'repeat'),
+            ("сделай чуть погромче", 'volume'),
+            ("потише пожалуйста", 'volume'),
+            ("поставь громкость на 70 процентов", 'volume'),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(self.route(text), expected)
+
+    def test_command_words_inside_questions_go_to_llm(self):
+        for text in ["выход из ситуации", "стоп игра", "какое время года сейчас", "помощь нужна с домашкой",
+                     "еще раз расскажи про водку", "пока не знаю что делать", "тише едешь дальше будешь",
+                     "почему звук на улице такой громкий", "громкости не хватает в колонках"]:
+            with self.subTest(text=text):
+                self.assertIsNone(self.route(text))
+
+    def test_proverb_does_not_change_volume(self):
+        self.assertIsNone(self.router.handle("тише едешь - дальше будешь"))
+        self.assertEqual(self.volumes, [])
+
+    def test_volume_number_slot(self):
+        response, intent = self.router.handle("громкость на тридцать пять")
+        self.assertEqual(intent.name, 'volume')
+        self.assertEqual(self.volumes, [35])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Память разговора (arkady/memory.py): сжиматель всегда один, вытесненное
+не теряется, сводка модели укладывается в свой бюджет.
+
+Запуск:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.memory import ConversationMemory, estimate_tokens
+
+
+class SlowSummarizer:
+    """Считает одновременные вызовы и сжатые обмены"""
+
+    def __init__(self, delay=0.01, answer=None):
+        self.delay = delay
+        self.answer = answer
+        self.active = 0
+        self.max_active = 0
+        self.exchanges = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, summary, exchanges):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.exchanges += len(exchanges)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return self.answer or f"{summary} +{len(exchanges)}".strip()
+
+
+def wait_idle(memory, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        memory.wait(timeout)
+        with memory._lock:
+            if not memory._summarizing and not memory._evicted:
+                return
+        time.sleep(0.001)
+    raise AssertionError("сжатие не закончилось")
+
+
+class ConversationMemoryTest(unittest.TestCase):
+    def test_one_summarizer_and_nothing_lost_under_concurrent_adds(self):
+        summarizer = SlowSummarizer()
+        memory = ConversationMemory(token_budget=20, summarizer=summarizer)
+
+        def talk(n):
+            for i in range(25):
+                memory.add(f"вопрос {n}-{i}", "ответ подлиннее, чтобы вытеснять")
+
+        threads = [threading.Thread(target=talk, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wait_idle(memory)
+
+        self.assertEqual(summarizer.max_active, 1)
+        self.assertEqual(summarizer.exchanges + len(memory), 8 * 25)
+
+    def test_lazy_render_does_not_race_worker(self):
+        summarizer = SlowSummarizer()
+        memory = ConversationMemory(token_budget=20, summarizer=summarizer, background=False)
+        for i in range(10):
+            memory.add(f"вопрос {i}", "ответ подлиннее, чтобы вытеснять")
+
+        threads = [threading.Thread(target=memory.render) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(summarizer.max_active, 1)
+        self.assertEqual(summarizer.exchanges + len(memory), 10)
+
+    def test_long_llm_summary_fits_budget(self):
+        long_summary = " ".join(f"слово{i}" for i in range(500))
+        memory = ConversationMemory(token_budget=20, summary_budget=30,
+                                    summarizer=SlowSummarizer(delay=0, answer=long_summary))
+        for i in range(5):
+            memory.add(f"вопрос {i}", "ответ подлиннее, чтобы вытеснять")
+        wait_idle(memory)
+
+        self.assertLessEqual(estimate_tokens(memory.summary), 30)
+        # Срезается начало, свежий конец остается, слова целые
+        self.assertTrue(memory.summary.endswith("слово499"))
+        self.assertTrue(memory.summary.startswith("слово"))
+
+    def test_clear_drops_summary_in_flight(self):
+        memory = ConversationMemory(token_budget=20, summarizer=SlowSummarizer(delay=0.1))
+        for i in range(5):
+            memory.add(f"вопрос {i}", "ответ подлиннее, чтобы вытеснять")
+        memory.clear()
+        wait_idle(memory)
+
+        self.assertEqual(memory.summary, "")
+        self.assertEqual(len(memory), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
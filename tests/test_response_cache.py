@@ -0,0 +1,70 @@
+"""
+Кэш ответов в разговоре (ArkadyAI + ResponseCache) против заглушки
+Ollama: уточнения внутри разговора в кэш не идут, новый собеседник
+после тишины снова получает ответы из кэша.
+
+Запуск:
+    python -m pytest tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from arkady.response_cache import ResponseCache
+from arkady.text_generation import ArkadyAI
+from mock_ollama import MockOllamaServer
+
+TIMEOUT = 0.05
+
+
+class ConversationCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockOllamaServer(first_token_delay=0, token_rate=1000).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.cache = ResponseCache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.ai = ArkadyAI(ollama_url=self.server.url, warm_up=False, use_context=False, cache=self.cache,
+                               conversation_timeout=TIMEOUT)
+
+    def ask(self, question):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.ai.generate_response(question)
+
+    def test_follow_up_is_not_cached(self):
+        self.ask("Что делать если скучно?")
+        self.ask("а почему?")
+
+        self.assertEqual(self.cache.stats()['entries'], 1)
+        self.assertIsNone(self.cache.get("а почему?"))
+
+    def test_new_visitor_after_silence_hits_cache(self):
+        for _ in range(3):
+            self.ask("Где поесть недорого?")
+            time.sleep(TIMEOUT * 1.5)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_same_conversation_does_not_use_cache(self):
+        self.ask("Где поесть недорого?")
+        self.ask("Где поесть недорого?")
+
+        self.assertEqual(self.cache.stats()['hits'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Сервер сессий (arkady/server.py) против заглушки Ollama и заглушки
+синтеза: звук повторной фразы идет из общего кэша голоса, одновременные
+подключения не превышают max_sessions.
+
+Запуск:
+    python -m pytest tests
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from arkady.server import SessionServer
+from arkady.tts_cache import CachedSynthesizer, StubTTSBackend, TTSCache
+from mock_ollama import MockOllamaServer
+
+
+class SlowSessionServer(SessionServer):
+    """Сессия создается дольше: одновременные подключения успевают столкнуться"""
+
+    def _new_session(self, *args):
+        time.sleep(0.1)
+        return super()._new_session(*args)
+
+
+class SessionServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ollama = MockOllamaServer(first_token_delay=0, token_rate=1000).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ollama.stop()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.backend = StubTTSBackend(delay=0, per_char=0)
+        synthesizer = CachedSynthesizer(self.backend, TTSCache(self._tmp.name))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.server = SlowSessionServer(port=0, ollama_url=self.ollama.url, max_sessions=2, cache=False,
+                                           synthesizer=synthesizer).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self._tmp.cleanup()
+
+    async def ask(self, websocket, text):
+        """Предложения ответа и число бинарных кадров звука"""
+        await websocket.send(json.dumps({'type': 'text', 'text': text}))
+        sentences, frames = [], 0
+        while True:
+            message = await websocket.recv()
+            if isinstance(message, bytes):
+                frames += 1
+                continue
+            reply = json.loads(message)
+            if reply['type'] == 'sentence':
+                sentences.append(reply['text'])
+            elif reply['type'] == 'done':
+                return sentences, frames
+
+    def test_repeated_sentence_audio_comes_from_cache(self):
+        from websockets.asyncio.client import connect
+
+        async def talk():
+            async with connect(self.server.url) as websocket:
+                await websocket.recv()
+                await websocket.send(json.dumps({'type': 'hello', 'audio': True}))
+                # Громкость - из голосовых команд этой сессии, как у локального голоса
+                first = await self.ask(websocket, "громкость 30")
+                second = await self.ask(websocket, "громкость 30")
+                return first, second
+
+        first, second = asyncio.run(talk())
+
+        self.assertEqual(first[0], second[0])
+        self.assertGreater(second[1], 0)
+        self.assertEqual(self.backend.calls, len(first[0]))
+        stats = self.server.stats()['tts_cache']
+        self.assertEqual(stats['hits'], len(second[0]))
+
+    def test_simultaneous_connections_respect_max_sessions(self):
+        from websockets.asyncio.client import connect
+        from websockets.exceptions import ConnectionClosed
+
+        async def join():
+            try:
+                async with connect(self.server.url) as websocket:
+                    await websocket.recv()
+                    await asyncio.sleep(0.3)
+                    return True
+            except ConnectionClosed:
+                return False
+
+        async def crowd():
+            return await asyncio.gather(*(join() for _ in range(6)))
+
+        accepted = asyncio.run(crowd())
+
+        self.assertEqual(sum(accepted), 2)
+        stats = self.server.stats()
+        self.assertEqual((stats['total_sessions'], stats['rejected']), (2, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Голос Аркадия (arkady/speech_synthesis.py) на заглушке синтеза и выходе
+в никуда: заготовленные фразы играются из кэша без синтеза.
+
+Запуск:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.audio_sink import NullSink
+from arkady.intents import HELP_TEXT
+from arkady.playback import StreamingPlayer
+from arkady.sentences import split_sentences
+from arkady.speech_synthesis import TTS, HoboVoiceSynthesizer
+from arkady.tts_cache import CachedSynthesizer, StubTTSBackend, TTSCache
+
+
+class VoiceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.backend = StubTTSBackend(delay=0, per_char=0, seconds_per_char=0.001)
+        synthesizer = CachedSynthesizer(self.backend, TTSCache(self._tmp.name))
+        tts = TTS(synthesizer=synthesizer, player=StreamingPlayer(sink=NullSink()))
+        self.voice = HoboVoiceSynthesizer(tts)
+
+    def tearDown(self):
+        self.voice.cleanup()
+        self._tmp.cleanup()
+
+    def test_presynthesized_multi_sentence_phrase_is_not_synthesized_again(self):
+        self.assertGreater(len(split_sentences(HELP_TEXT)), 1)
+        self.assertEqual(self.voice.presynthesize([HELP_TEXT]), 1)
+        calls = self.backend.calls
+
+        result = self.voice.speak_sync(HELP_TEXT, timeout=10)
+
+        self.assertFalse(result['cancelled'])
+        self.assertGreater(result['audio_seconds'], 0)
+        self.assertEqual(self.backend.calls, calls)
+        self.assertEqual(self.voice.synthesizer.cache.stats()['misses'], 0)
+
+    def test_new_multi_sentence_phrase_is_synthesized_by_sentence(self):
+        text = "Ну здорово. Как сам? Давно не виделись."
+        self.voice.speak_sync(text, timeout=10)
+        self.assertEqual(self.backend.calls, len(split_sentences(text)))
+
+
+if __name__ == "__main__":
+    unittest.main()
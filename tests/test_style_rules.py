@@ -0,0 +1,52 @@
+"""
+Замены слов в правилах стиля (arkady/style_rules.py): целые слова с
+точным регистром, наложение замен, большая буква после убранного слова.
+
+Запуск:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.style_rules import StyleRules
+
+
+class ReplaceTest(unittest.TestCase):
+    def rules(self, replace):
+        return StyleRules(config={'replace': replace})
+
+    def test_case_exact_whole_words(self):
+        rules = self.rules({"Хорошо": "Ладно"})
+        self.assertEqual(rules.apply("Хорошо, давай."), "Ладно, давай.")
+        self.assertEqual(rules.apply("Он хорошо поёт."), "Он хорошо поёт.")
+        self.assertEqual(rules.apply("Нехорошо вышло. Хорошоо"), "Нехорошо вышло. Хорошоо")
+
+    def test_overlapping_words_prefer_longest(self):
+        rules = self.rules({"Спасибо": "", "Спасибо большое": "", "Хорошо": "Ладно", "Хорошо бы": "Неплохо бы"})
+        self.assertEqual(rules.apply("Спасибо большое, пока."), "Пока.")
+        self.assertEqual(rules.apply("Хорошо бы поесть. Хорошо."), "Неплохо бы поесть. Ладно.")
+
+    def test_overlapping_words_at_different_positions(self):
+        # "Хорошо" внутри "Очень Хорошо" - замена одна, по более раннему слову
+        rules = self.rules({"Очень Хорошо": "Годно", "Хорошо": "Ладно"})
+        self.assertEqual(rules.apply("Очень Хорошо. Хорошо."), "Годно. Ладно.")
+
+    def test_deleted_sentence_start_recapitalizes(self):
+        rules = self.rules({"Извините": "", "Пожалуйста": ""})
+        self.assertEqual(rules.apply("Извините, не понял."), "Не понял.")
+        self.assertEqual(rules.apply("Ну ладно. Пожалуйста, садись."), "Ну ладно. Садись.")
+        self.assertEqual(rules.apply("Извините Пожалуйста, пока."), "Пока.")
+        self.assertEqual(rules.apply("Давай, Пожалуйста, быстрее."), "Давай, быстрее.")
+
+    def test_text_without_rule_words_is_unchanged(self):
+        rules = self.rules({"Спасибо": ""})
+        text = "Слушай, водка тут не поможет."
+        self.assertIs(rules.apply(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Кэш синтезированных фраз (arkady/tts_cache.py) на заглушке синтеза:
+вытеснение по размеру, порядок LRU после перезапуска, статистика
+попаданий и заготовка фраз.
+
+Запуск:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arkady.tts_cache import CachedSynthesizer, StubTTSBackend, TTSCache, cache_key
+
+VOICE = ("ru-RU-DmitryNeural", "+20%", "+100%", "-38Hz")
+
+
+class TTSCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def age(self, cache, key, seconds_ago):
+        """Сдвигает mtime файла фразы в прошлое"""
+        stamp = time.time() - seconds_ago
+        os.utime(cache.path(key), (stamp, stamp))
+
+    def test_evicts_least_recent_over_max_bytes(self):
+        cache = TTSCache(self.directory, max_bytes=250)
+        for key in ("a", "b", "c"):
+            cache.put(key, b"x" * 100)
+
+        self.assertNotIn("a", cache)
+        self.assertFalse(os.path.exists(cache.path("a")))
+        self.assertIn("b", cache)
+        self.assertIn("c", cache)
+        stats = cache.stats()
+        self.assertEqual(stats['bytes'], 200)
+        self.assertEqual(stats['evicted'], 1)
+
+    def test_hit_refreshes_lru_order(self):
+        cache = TTSCache(self.directory, max_bytes=250)
+        cache.put("a", b"x" * 100)
+        cache.put("b", b"x" * 100)
+        cache.get("a")
+        cache.put("c", b"x" * 100)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+
+    def test_lru_order_survives_restart(self):
+        cache = TTSCache(self.directory)
+        for age, key in ((30, "a"), (20, "b"), (10, "c")):
+            cache.put(key, b"x" * 100)
+            self.age(cache, key, age)
+        # Попадание обновляет mtime: "a" теперь самая свежая
+        self.assertIsNotNone(cache.get("a"))
+
+        reloaded = TTSCache(self.directory, max_bytes=200)
+        self.assertEqual(reloaded.stats()['entries'], 2)
+        self.assertNotIn("b", reloaded)
+        self.assertIn("c", reloaded)
+        self.assertIn("a", reloaded)
+        self.assertFalse(os.path.exists(reloaded.path("b")))
+
+    def test_hit_and_miss_stats(self):
+        cache = TTSCache(self.directory)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", b"x" * 10, synth_seconds=0.5)
+        self.assertEqual(cache.get("a"), cache.path("a"))
+        self.assertEqual(cache.get("a"), cache.path("a"))
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stored']), (2, 1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3)
+        self.assertAlmostEqual(stats['saved_seconds'], 1.0)
+
+    def test_file_removed_outside_is_a_miss(self):
+        cache = TTSCache(self.directory)
+        cache.put("a", b"x" * 10)
+        os.remove(cache.path("a"))
+
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['bytes']), (0, 1, 0))
+
+
+class CachedSynthesizerTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.backend = StubTTSBackend(delay=0, per_char=0, seconds_per_char=0.001)
+        self.synthesizer = CachedSynthesizer(self.backend, TTSCache(self._tmp.name))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_second_synthesis_comes_from_cache(self):
+        first = asyncio.run(self.synthesizer.synthesize("Здорово, браток", *VOICE))
+        second = asyncio.run(self.synthesizer.synthesize("Здорово, браток", *VOICE))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.backend.calls, 1)
+        stats = self.synthesizer.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_other_voice_is_another_entry(self):
+        asyncio.run(self.synthesizer.synthesize("Здорово, браток", *VOICE))
+        asyncio.run(self.synthesizer.synthesize("Здорово, браток", VOICE[0], "+0%", VOICE[2], VOICE[3]))
+
+        self.assertEqual(self.backend.calls, 2)
+        self.assertEqual(self.synthesizer.cache.stats()['entries'], 2)
+
+    def test_stream_caches_finished_phrase(self):
+        async def collect():
+            return b"".join([chunk async for chunk in self.synthesizer.stream("Ну давай, удачи", *VOICE)])
+
+        played = asyncio.run(collect())
+        replayed = asyncio.run(collect())
+
+        self.assertEqual(played, replayed)
+        self.assertEqual(self.backend.calls, 1)
+        self.assertIn(cache_key("Ну давай, удачи", *VOICE), self.synthesizer.cache)
+
+    def test_presynthesize_skips_cached_phrases(self):
+        count = asyncio.run(self.synthesizer.presynthesize(["Пока", "Ладно, молчу", "Пока"], *VOICE))
+        self.assertEqual(count, 2)
+        self.assertEqual(self.backend.calls, 2)
+
+        count = asyncio.run(self.synthesizer.presynthesize(["Пока", "Ладно, молчу", "Так лучше слышно?"], *VOICE))
+        self.assertEqual(count, 1)
+        self.assertEqual(self.backend.calls, 3)
+        self.assertEqual(self.synthesizer.cache.stats()['entries'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()